@@ -1,7 +1,16 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import UserProfile, Genre, Movie, Cinema, Screen, ShowTime, Seat, Booking, Payment, Review, BankAccount
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from .forms import BulkScheduleForm, ShowTimeAdminForm
+from .archive import restore
+from .scheduling import create_schedule
+from .services import transition_bookings
+from .exports import export_bookings, export_payments, export_sales
+from .models import UserProfile, Genre, Movie, Cinema, Screen, ShowTime, Seat, Booking, Payment, Review, BankAccount, DailySales, PricingRule, Notification, DomainEvent, EventConsumer, ArchivedBooking
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -76,11 +85,68 @@ class ScreenAdmin(admin.ModelAdmin):
 
 @admin.register(ShowTime)
 class ShowTimeAdmin(admin.ModelAdmin):
-    list_display = ('movie', 'screen', 'date', 'time', 'price', 'created_at')
+    form = ShowTimeAdminForm
+    list_display = ('movie', 'screen', 'date', 'time', 'price', 'admission_rate', 'created_at')
     list_filter = ('movie', 'screen__cinema', 'date')
     search_fields = ('movie__title', 'screen__name', 'screen__cinema__name')
     readonly_fields = ('created_at',)
     date_hierarchy = 'date'
+    change_list_template = 'admin/booking/showtime/change_list.html'
+    
+    def get_urls(self):
+        urls = [
+            path('bulk-schedule/', self.admin_site.admin_view(self.bulk_schedule_view),
+                 name='booking_showtime_bulk_schedule'),
+        ]
+        return urls + super().get_urls()
+    
+    def bulk_schedule_view(self, request):
+        # Lên lịch chiếu cho nhiều phòng, nhiều ngày trong một lần
+        if not self.has_add_permission(request):
+            return redirect('admin:booking_showtime_changelist')
+        
+        conflicts = []
+        if request.method == 'POST':
+            form = BulkScheduleForm(request.POST)
+            if form.is_valid():
+                data = form.cleaned_data
+                movie = data['movie']
+                result = create_schedule(
+                    movie=movie,
+                    screens=list(data['screens']),
+                    start_date=data['start_date'],
+                    end_date=data['end_date'],
+                    times=data['times'],
+                    price=data['price'] if data['price'] is not None else movie.price,
+                    buffer_minutes=data['buffer_minutes'],
+                )
+                conflicts = result['conflicts']
+                if not conflicts:
+                    rate = result['show_times'] / result['elapsed'] if result['elapsed'] else 0
+                    self.message_user(
+                        request,
+                        f"Đã tạo {result['show_times']} suất chiếu và {result['seats']} ghế "
+                        f"trong {result['elapsed']:.2f} giây ({rate:.0f} suất/giây).",
+                        messages.SUCCESS,
+                    )
+                    return redirect('admin:booking_showtime_changelist')
+                self.message_user(
+                    request,
+                    f'Có {len(conflicts)} suất chiếu bị trùng lịch, chưa tạo suất nào.',
+                    messages.ERROR,
+                )
+        else:
+            form = BulkScheduleForm()
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Lên lịch chiếu hàng loạt',
+            'form': form,
+            'conflicts': conflicts[:100],
+            'conflict_count': len(conflicts),
+        }
+        return TemplateResponse(request, 'admin/booking/showtime/bulk_schedule.html', context)
 
 @admin.register(Seat)
 class SeatAdmin(admin.ModelAdmin):
@@ -102,10 +168,59 @@ class BookingAdmin(admin.ModelAdmin):
     readonly_fields = ('booking_date', 'updated_at', 'expiry_date')
     filter_horizontal = ('seats',)
     inlines = [PaymentInline]
+    actions = ['export_csv', 'mark_paid', 'mark_cancelled', 'mark_refunded', 'mark_expired']
+    change_list_template = 'admin/booking/export_change_list.html'
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('user', 'show_time__movie')
     
+    def _transition(self, request, queryset, new_status):
+        # Một transaction cho cả lô (services.transition_bookings); báo số thành công và lỗi đầu tiên
+        results = transition_bookings(list(queryset.values_list('id', flat=True)), new_status)
+        succeeded = [result for result in results if result['success']]
+        failed = [result for result in results if not result['success']]
+        label = dict(Booking.PAYMENT_STATUS)[new_status]
+        if succeeded:
+            self.message_user(request, f'Đã chuyển {len(succeeded)} đặt vé sang "{label}".', messages.SUCCESS)
+        if failed:
+            self.message_user(
+                request, f'{len(failed)} đặt vé không chuyển được, VD #{failed[0]["id"]}: {failed[0]["error"]}',
+                messages.WARNING,
+            )
+    
+    @admin.action(description='Đánh dấu đã thanh toán')
+    def mark_paid(self, request, queryset):
+        self._transition(request, queryset, 'paid')
+    
+    @admin.action(description='Hủy (trả ghế)')
+    def mark_cancelled(self, request, queryset):
+        self._transition(request, queryset, 'cancelled')
+    
+    @admin.action(description='Hoàn tiền (trả ghế)')
+    def mark_refunded(self, request, queryset):
+        self._transition(request, queryset, 'refunded')
+    
+    @admin.action(description='Đánh dấu hết hạn (trả ghế)')
+    def mark_expired(self, request, queryset):
+        self._transition(request, queryset, 'expired')
+    
+    def get_urls(self):
+        urls = [
+            path('export/', self.admin_site.admin_view(self.export_view),
+                 name='booking_booking_export'),
+        ]
+        return urls + super().get_urls()
+    
+    def export_view(self, request):
+        # Xuất toàn bộ kết quả theo bộ lọc hiện tại của danh sách
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+        return export_bookings(self.get_changelist_instance(request).get_queryset(request))
+    
+    @admin.action(description='Xuất CSV các đặt vé đã chọn')
+    def export_csv(self, request, queryset):
+        return export_bookings(queryset)
+    
     def is_expired_display(self, obj):
         if obj.expiry_date is None:
             return 'Chưa có thời hạn'
@@ -121,6 +236,25 @@ class PaymentAdmin(admin.ModelAdmin):
     search_fields = ('booking__user__username', 'transaction_id')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'created_at'
+    actions = ['export_csv']
+    change_list_template = 'admin/booking/export_change_list.html'
+    
+    def get_urls(self):
+        urls = [
+            path('export/', self.admin_site.admin_view(self.export_view),
+                 name='booking_payment_export'),
+        ]
+        return urls + super().get_urls()
+    
+    def export_view(self, request):
+        # Xuất toàn bộ kết quả theo bộ lọc hiện tại của danh sách
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+        return export_payments(self.get_changelist_instance(request).get_queryset(request))
+    
+    @admin.action(description='Xuất CSV các thanh toán đã chọn')
+    def export_csv(self, request, queryset):
+        return export_payments(queryset)
     fieldsets = (
         ('Thông tin cơ bản', {
             'fields': ('booking', 'amount', 'payment_method', 'payment_status', 'transaction_id', 'payment_date')
@@ -160,4 +294,115 @@ class ReviewAdmin(admin.ModelAdmin):
     list_display = ('user', 'movie', 'rating', 'created_at')
     list_filter = ('rating', 'created_at', 'movie')
     search_fields = ('user__username', 'movie__title', 'comment')
-    readonly_fields = ('created_at', 'updated_at') 
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    # Chỉ đọc: dữ liệu do booking/rollups.py và lệnh backfill_sales ghi
+    list_display = ('date', 'movie', 'cinema', 'screen', 'show_time', 'payment_method', 'tickets', 'revenue', 'refunds')
+    list_filter = ('date', 'payment_method', 'cinema', 'movie')
+    date_hierarchy = 'date'
+    list_select_related = ('movie', 'cinema', 'screen', 'show_time__movie')
+    actions = ['export_csv']
+    change_list_template = 'admin/booking/export_change_list.html'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def get_urls(self):
+        urls = [
+            path('export/', self.admin_site.admin_view(self.export_view),
+                 name='booking_dailysales_export'),
+        ]
+        return urls + super().get_urls()
+    
+    def export_view(self, request):
+        # Xuất toàn bộ kết quả theo bộ lọc hiện tại của danh sách
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+        return export_sales(self.get_changelist_instance(request).get_queryset(request))
+    
+    @admin.action(description='Xuất CSV các dòng doanh số đã chọn')
+    def export_csv(self, request, queryset):
+        return export_sales(queryset)
+
+@admin.register(PricingRule)
+class PricingRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'rows', 'weekdays', 'start_time', 'end_time', 'min_occupancy', 'min_days_before', 'multiplier', 'amount', 'is_active')
+    list_filter = ('kind', 'is_active', 'cinema', 'movie')
+    search_fields = ('name',)
+    list_editable = ('is_active',)
+    fieldsets = (
+        ('Luật', {
+            'fields': ('name', 'kind', 'is_active')
+        }),
+        ('Điều kiện', {
+            'fields': ('rows', 'weekdays', 'start_time', 'end_time', 'min_occupancy', 'min_days_before', 'movie', 'cinema')
+        }),
+        ('Điều chỉnh giá', {
+            'fields': ('multiplier', 'amount')
+        }),
+    )
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    # Chỉ đọc: outbox do booking/notifications.py ghi và lệnh dispatch_notifications gửi
+    list_display = ('kind', 'user', 'booking', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('user__username', 'user__email', 'dedup_key')
+    list_select_related = ('user', 'booking__user', 'booking__show_time__movie')
+    readonly_fields = [field.name for field in Notification._meta.fields]
+    actions = ['retry_now']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Gửi lại ngay các thông báo đã chọn')
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status='sent').update(status='pending', claim_token='', next_attempt_at=timezone.now())
+        self.message_user(request, f'Đã đưa {count} thông báo vào hàng gửi lại.', messages.SUCCESS)
+
+@admin.register(DomainEvent)
+class DomainEventAdmin(admin.ModelAdmin):
+    # Chỉ đọc: nhật ký sự kiện chỉ được ghi thêm bởi booking/events.py
+    list_display = ('id', 'created_at', 'entity', 'entity_id', 'show_time_id', 'kind', 'old', 'new')
+    list_filter = ('entity', 'kind', 'day')
+    search_fields = ('=entity_id',)
+    date_hierarchy = 'day'
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(EventConsumer)
+class EventConsumerAdmin(admin.ModelAdmin):
+    list_display = ('name', 'offset', 'updated_at')
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    # Chỉ đọc: dòng lưu trữ do booking/archive.py ghi; "Khôi phục" đưa booking về lại các bảng gốc
+    list_display = ('id', 'user', 'show_time', 'seat_numbers', 'total_amount', 'payment_status', 'booking_date', 'archived_at')
+    list_filter = ('payment_status',)
+    search_fields = ('=id', 'user__username')
+    list_select_related = ('user', 'show_time__movie')
+    readonly_fields = [field.name for field in ArchivedBooking._meta.fields]
+    actions = ['restore_selected']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Khôi phục các đặt vé đã chọn')
+    def restore_selected(self, request, queryset):
+        for archived_booking in queryset:
+            restore(archived_booking)
+        self.message_user(request, f'Đã khôi phục {len(queryset)} đặt vé.', messages.SUCCESS)
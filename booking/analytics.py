@@ -0,0 +1,144 @@
+"""
+Thống kê lấp đầy theo phòng chiếu: ghế nào, hàng nào, khung giờ nào bán chạy.
+
+Phần đếm nặng được đẩy xuống SQLite bằng GROUP BY trên bảng trung gian
+Booking.seats (chỉ booking đã thanh toán), nên Python chỉ nhận về vài nghìn dòng
+đã gộp dù lịch sử có hàng triệu vé. Kết quả của mỗi phòng là các mảng số nguyên
+(array 'I') lưu dạng bytes trong ScreenOccupancy:
+
+- seat_sales: rows x cols, số lần mỗi ghế được bán trong kỳ
+- hour_sold / hour_capacity: 7 x 24 theo giờ bắt đầu suất chiếu (thứ Hai = 0)
+"""
+import time
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Booking, ScreenOccupancy, ShowTime
+from .scheduling import parse_seat_number, row_label
+
+TYPECODE = 'I'
+HOURS_PER_WEEK = 7 * 24
+WEEKDAYS = ['T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'CN']
+
+
+def pack(values):
+    return array(TYPECODE, values).tobytes()
+
+
+def unpack(data):
+    values = array(TYPECODE)
+    values.frombytes(bytes(data))
+    return values
+
+
+def compute_occupancy(start_date, end_date, screen_ids=None):
+    # """Tính và lưu ScreenOccupancy cho các phòng có suất chiếu trong [start_date, end_date]"""
+    started = time.perf_counter()
+    shows = ShowTime.objects.filter(date__range=(start_date, end_date))
+    links = Booking.seats.through.objects.filter(
+        booking__payment_status='paid', booking__show_time__date__range=(start_date, end_date)
+    )
+    if screen_ids is not None:
+        shows = shows.filter(screen_id__in=screen_ids)
+        links = links.filter(booking__show_time__screen_id__in=screen_ids)
+
+    sold_by_show = dict(
+        links.values_list('booking__show_time_id').annotate(total=Count('id')).order_by()
+    )
+    seat_counts = defaultdict(list)
+    for screen_id, seat_number, total in links.values_list(
+        'booking__show_time__screen_id', 'seat__seat_number'
+    ).annotate(total=Count('id')).order_by():
+        position = parse_seat_number(seat_number)
+        if position is not None:
+            seat_counts[screen_id].append((position, total))
+
+    per_row = getattr(settings, 'SEATS_PER_ROW', 10)
+    stats = {}
+    for show_id, screen_id, date, show_time, capacity in shows.values_list(
+        'id', 'screen_id', 'date', 'time', 'screen__capacity'
+    ).iterator(chunk_size=5000):
+        screen = stats.get(screen_id)
+        if screen is None:
+            screen = stats[screen_id] = {
+                'capacity': capacity,
+                'show_times': 0,
+                'hour_sold': array(TYPECODE, [0]) * HOURS_PER_WEEK,
+                'hour_capacity': array(TYPECODE, [0]) * HOURS_PER_WEEK,
+            }
+        slot = date.weekday() * 24 + show_time.hour
+        screen['show_times'] += 1
+        screen['hour_sold'][slot] += sold_by_show.get(show_id, 0)
+        screen['hour_capacity'][slot] += capacity
+
+    now = timezone.now()
+    with transaction.atomic():
+        for screen_id, screen in stats.items():
+            positions = seat_counts.get(screen_id, [])
+            rows = max([-(-screen['capacity'] // per_row)] + [row + 1 for (row, _), _ in positions])
+            cols = max([min(screen['capacity'], per_row)] + [col + 1 for (_, col), _ in positions])
+            seat_sales = array(TYPECODE, [0]) * (rows * cols)
+            for (row, col), total in positions:
+                seat_sales[row * cols + col] += total
+            ScreenOccupancy.objects.update_or_create(screen_id=screen_id, defaults={
+                'period_start': start_date,
+                'period_end': end_date,
+                'show_times': screen['show_times'],
+                'rows': rows,
+                'cols': cols,
+                'seat_sales': seat_sales.tobytes(),
+                'hour_sold': screen['hour_sold'].tobytes(),
+                'hour_capacity': screen['hour_capacity'].tobytes(),
+                'computed_at': now,
+            })
+        if screen_ids is None:
+            ScreenOccupancy.objects.exclude(screen_id__in=list(stats)).delete()
+    return {
+        'screens': len(stats),
+        'show_times': sum(screen['show_times'] for screen in stats.values()),
+        'tickets': sum(sold_by_show.values()),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def _cell(rate):
+    # Giá trị opacity cho CSS luôn dùng dấu chấm, không phụ thuộc locale
+    return {'rate': rate, 'percent': round(rate * 100), 'opacity': f'{min(rate, 1):.2f}'}
+
+
+def heatmap(occupancy):
+    # """Dữ liệu hiển thị: ma trận ghế, tỉ lệ theo hàng và lưới giờ trong tuần"""
+    seat_sales = unpack(occupancy.seat_sales)
+    show_times = occupancy.show_times or 1
+    seat_rows = []
+    for row in range(occupancy.rows):
+        sales = seat_sales[row * occupancy.cols:(row + 1) * occupancy.cols]
+        seat_rows.append({
+            'label': row_label(row),
+            'seats': [dict(_cell(total / show_times), number=f'{row_label(row)}{col + 1}')
+                      for col, total in enumerate(sales)],
+            'average': _cell(sum(sales) / (show_times * len(sales))) if sales else _cell(0),
+        })
+
+    hour_sold, hour_capacity = unpack(occupancy.hour_sold), unpack(occupancy.hour_capacity)
+    hours = []
+    for day, name in enumerate(WEEKDAYS):
+        cells = []
+        for hour in range(24):
+            slot = day * 24 + hour
+            capacity = hour_capacity[slot]
+            cells.append(dict(_cell(hour_sold[slot] / capacity if capacity else 0), scheduled=bool(capacity)))
+        hours.append({'label': name, 'cells': cells})
+
+    total_capacity = sum(hour_capacity)
+    return {
+        'occupancy': occupancy,
+        'seat_rows': seat_rows,
+        'hours': hours,
+        'overall': _cell(sum(hour_sold) / total_capacity if total_capacity else 0),
+    }
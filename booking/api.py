@@ -0,0 +1,482 @@
+"""
+API JSON cho front-end (static/js/main.js, booking.js, payment.js).
+
+- Dữ liệu đọc bằng values_list() theo đúng các trường được yêu cầu (?fields=...),
+  không khởi tạo model.
+- Danh sách dùng cursor (keyset) thay vì OFFSET: ?cursor=<next_cursor>&limit=N.
+- Mọi response GET có ETag; client gửi If-None-Match sẽ nhận 304.
+"""
+import base64
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_http_methods
+
+from . import events, pricing, reviews, search_index, seatmap, waiting_room
+from .forms import PaymentMethodForm
+from .models import Booking, DomainEvent, Movie, Payment, Seat, ShowTime
+from .ratelimit import ratelimit
+from .services import BookingError, claim_seats
+
+DEFAULT_LIMIT = 12
+MAX_LIMIT = 50
+# Giống giới hạn chọn ghế trên trang booking_seats
+MAX_GROUP_SIZE = 10
+# Số thay đổi ghế tối đa mỗi lần gọi seat-events; client gọi tiếp với offset mới nếu còn
+SEAT_EVENTS_LIMIT = 500
+
+
+def _media_url(value):
+    return f'{settings.MEDIA_URL}{value}' if value else None
+
+
+# Tên trường công khai -> (lookup ORM, hàm chuyển đổi)
+MOVIE_FIELDS = {
+    'id': ('id', None),
+    'title': ('title', None),
+    'description': ('description', None),
+    'duration': ('duration', None),
+    'release_date': ('release_date', None),
+    'genre': ('genre__name', None),
+    'genre_id': ('genre_id', None),
+    'rating': ('rating', None),
+    'price': ('price', None),
+    'poster': ('poster', _media_url),
+    'is_hot': ('is_hot', None),
+    'views_count': ('views_count', None),
+}
+MOVIE_DEFAULT = ['id', 'title', 'description', 'poster', 'genre', 'rating', 'release_date', 'price']
+
+# Autocomplete đọc từ chỉ mục trong bộ nhớ, chỉ có các trường này
+SEARCH_FIELDS = ['id', 'title', 'genre', 'genre_id', 'poster', 'rating', 'views_count', 'url']
+SEARCH_DEFAULT = ['id', 'title', 'genre', 'poster', 'rating', 'url']
+
+SHOWTIME_FIELDS = {
+    'id': ('id', None),
+    'movie_id': ('movie_id', None),
+    'date': ('date', None),
+    'time': ('time', None),
+    'price': ('price', None),
+    'cinema': ('screen__cinema__name', None),
+    'screen': ('screen__name', None),
+    'available_seats': ('available_seats', None),
+}
+SHOWTIME_DEFAULT = list(SHOWTIME_FIELDS)
+
+SEAT_FIELDS = {
+    'id': ('id', None),
+    'seat_number': ('seat_number', None),
+    'status': ('status', None),
+}
+
+BOOKING_FIELDS = {
+    'id': ('id', None),
+    'show_time_id': ('show_time_id', None),
+    'movie': ('show_time__movie__title', None),
+    'cinema': ('show_time__screen__cinema__name', None),
+    'screen': ('show_time__screen__name', None),
+    'date': ('show_time__date', None),
+    'time': ('show_time__time', None),
+    'total_amount': ('total_amount', None),
+    'payment_status': ('payment_status', None),
+    'booking_status': ('booking_status', None),
+    'booking_date': ('booking_date', None),
+    'expiry_date': ('expiry_date', None),
+}
+BOOKING_DEFAULT = list(BOOKING_FIELDS)
+
+PAYMENT_FIELDS = {
+    'id': ('id', None),
+    'booking_id': ('booking_id', None),
+    'amount': ('amount', None),
+    'payment_method': ('payment_method', None),
+    'payment_status': ('payment_status', None),
+    'payment_date': ('payment_date', None),
+    'created_at': ('created_at', None),
+}
+PAYMENT_DEFAULT = list(PAYMENT_FIELDS)
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def api_view(view_func):
+    # """Chuyển ApiError thành JSON {'detail': ...} với status tương ứng"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'detail': e.detail}, status=e.status)
+    return wrapper
+
+
+def require_user(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Vui lòng đăng nhập!', status=401)
+
+
+def json_response(request, payload, status=200):
+    # """JSON response có ETag; trả 304 nếu client đã có đúng phiên bản này"""
+    body = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(body, status=status, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def requested_fields(request, available, default):
+    # """Sparse fieldsets: ?fields=id,title"""
+    raw = request.GET.get('fields')
+    if not raw:
+        return default
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ApiError(f'Trường không hợp lệ: {", ".join(unknown)}')
+    return fields
+
+
+def serialize(queryset, available, fields, extra=()):
+    """
+    Đọc values_list của các trường cần thiết và trả về list dict.
+    `extra` là các lookup nội bộ (khóa cursor) được thêm vào cuối mỗi dict dưới dạng tuple.
+    """
+    lookups = [available[name][0] for name in fields] + list(extra)
+    transforms = [available[name][1] for name in fields]
+    results = []
+    for row in queryset.values_list(*lookups):
+        item = {
+            name: transform(value) if transform else value
+            for name, transform, value in zip(fields, transforms, row)
+        }
+        results.append((item, row[len(fields):]))
+    return results
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError('limit không hợp lệ')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ApiError('cursor không hợp lệ')
+
+
+def keyset_page(request, queryset, ordering, available, fields):
+    """
+    Phân trang keyset theo `ordering` (vd ['-release_date', '-id']).
+    Trả về payload {'results': [...], 'next_cursor': ...}.
+    """
+    keys = [key.lstrip('-') for key in ordering]
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ApiError('cursor không hợp lệ')
+        try:
+            # Cursor do client gửi lại: JSON hợp lệ nhưng sai kiểu (chuỗi thay cho số...) là lỗi 400
+            values = [queryset.model._meta.get_field(key).to_python(value) for key, value in zip(keys, values)]
+            after = Q()
+            for i, key in enumerate(ordering):
+                condition = dict(zip(keys[:i], values[:i]))
+                op = 'lt' if key.startswith('-') else 'gt'
+                condition[f'{keys[i]}__{op}'] = values[i]
+                after |= Q(**condition)
+            queryset = queryset.filter(after)
+        except (ValidationError, TypeError, ValueError):
+            raise ApiError('cursor không hợp lệ')
+
+    limit = get_limit(request)
+    rows = serialize(queryset[:limit + 1], available, fields, extra=keys)
+    next_cursor = encode_cursor(rows[limit - 1][1]) if len(rows) > limit else None
+    return {'results': [item for item, _ in rows[:limit]], 'next_cursor': next_cursor}
+
+
+@require_GET
+@api_view
+def movies(request):
+    # """Danh sách phim đang chiếu: ?genre=&hot=1&cursor=&limit=&fields="""
+    fields = requested_fields(request, MOVIE_FIELDS, MOVIE_DEFAULT)
+    queryset = Movie.objects.filter(is_active=True)
+    if request.GET.get('genre'):
+        try:
+            genre_id = int(request.GET['genre'])
+        except ValueError:
+            raise ApiError('genre không hợp lệ')
+        queryset = queryset.filter(genre_id=genre_id)
+    if request.GET.get('hot'):
+        queryset = queryset.filter(is_hot=True)
+    payload = keyset_page(request, queryset, ['-release_date', '-id'], MOVIE_FIELDS, fields)
+    return json_response(request, payload)
+
+
+@require_GET
+@api_view
+def movie(request, movie_id):
+    fields = requested_fields(request, MOVIE_FIELDS, list(MOVIE_FIELDS))
+    rows = serialize(Movie.objects.filter(id=movie_id, is_active=True), MOVIE_FIELDS, fields)
+    if not rows:
+        raise ApiError('Không tìm thấy phim', status=404)
+    return json_response(request, rows[0][0])
+
+
+@require_GET
+@api_view
+def movie_reviews(request, movie_id):
+    # """Trang đánh giá tiếp theo cho nút "Xem thêm": ?cursor= -> {'results', 'html', 'next_cursor'}"""
+    after = None
+    if request.GET.get('cursor'):
+        after = reviews.parse_key(decode_cursor(request.GET['cursor']))
+        if after is None:
+            raise ApiError('cursor không hợp lệ')
+    limit = get_limit(request) if 'limit' in request.GET else reviews.REVIEWS_PER_PAGE
+    page, next_key = reviews.review_page(movie_id, after, limit)
+    payload = {
+        'results': [{
+            'id': review.id,
+            'user': review.user.get_full_name() or review.user.username,
+            'rating': review.rating,
+            'comment': review.comment,
+            'created_at': review.created_at,
+        } for review in page],
+        'html': render_to_string('booking/_review_cards.html', {'reviews': page}, request=request),
+        'next_cursor': encode_cursor(next_key) if next_key else None,
+    }
+    return json_response(request, payload)
+
+
+@require_GET
+@api_view
+def search(request):
+    # """Gợi ý phim theo tiền tố tên hoặc thể loại (không dấu): ?q=&limit=&fields="""
+    query = request.GET.get('q', '').strip()
+    fields = requested_fields(request, SEARCH_FIELDS, SEARCH_DEFAULT)
+    results = search_index.search(query, get_limit(request)) if query else []
+    return json_response(request, {'results': [{name: doc[name] for name in fields} for doc in results]})
+
+
+@require_GET
+@api_view
+def showtimes(request, movie_id):
+    # """Các suất chiếu sắp tới của phim, kèm số ghế còn trống"""
+    fields = requested_fields(request, SHOWTIME_FIELDS, SHOWTIME_DEFAULT)
+    queryset = ShowTime.objects.filter(movie_id=movie_id, date__gte=timezone.localdate())
+    if 'available_seats' in fields:
+        queryset = queryset.annotate(
+            available_seats=Count('seats', filter=Q(seats__status='available'))
+        )
+    payload = keyset_page(request, queryset, ['date', 'time', 'id'], SHOWTIME_FIELDS, fields)
+    return json_response(request, payload)
+
+
+@require_GET
+@api_view
+@ratelimit('get_seats')
+def seats(request, show_time_id):
+    # """Sơ đồ ghế của suất chiếu (dùng cho polling, có ETag)"""
+    if not ShowTime.objects.filter(id=show_time_id).exists():
+        raise ApiError('Không tìm thấy suất chiếu', status=404)
+    fields = requested_fields(request, SEAT_FIELDS, list(SEAT_FIELDS))
+    # Đọc offset trước sơ đồ ghế: client theo dõi tiếp từ offset sẽ không bỏ sót thay đổi nào
+    offset = DomainEvent.objects.filter(show_time_id=show_time_id).aggregate(offset=Max('id'))['offset'] or 0
+    queryset = Seat.objects.filter(show_time_id=show_time_id).order_by('id')
+    return json_response(request, {
+        'show_time_id': show_time_id,
+        'offset': offset,
+        'seats': [item for item, _ in serialize(queryset, SEAT_FIELDS, fields)],
+    })
+
+
+@require_GET
+@api_view
+@ratelimit('get_seats')
+def seat_events(request, show_time_id):
+    # """Feed thay đổi ghế sau offset lấy từ /seats/: ?after=<offset> -> {'events', 'offset'}"""
+    try:
+        after = int(request.GET.get('after', 0))
+    except ValueError:
+        raise ApiError('after không hợp lệ')
+    changes = events.read(after, SEAT_EVENTS_LIMIT, entities=['seat'], show_time_id=show_time_id)
+    return json_response(request, {
+        'events': [
+            {'offset': event.id, 'seat_id': event.entity_id, 'kind': event.kind, 'value': event.new}
+            for event in changes
+        ],
+        'offset': changes[-1].id if changes else after,
+    })
+
+
+@require_GET
+@api_view
+@ratelimit('get_seats')
+def best_seats(request, show_time_id):
+    # """Gợi ý N ghế trống liền nhau tốt nhất: ?count=N (không giữ ghế)"""
+    show_time = ShowTime.objects.select_related('screen').filter(id=show_time_id).first()
+    if show_time is None:
+        raise ApiError('Không tìm thấy suất chiếu', status=404)
+    try:
+        count = int(request.GET.get('count', 2))
+    except ValueError:
+        raise ApiError('count không hợp lệ')
+    if not 1 <= count <= MAX_GROUP_SIZE:
+        raise ApiError(f'Chỉ tìm được từ 1 đến {MAX_GROUP_SIZE} ghế')
+
+    seats = seatmap.find_best_seats(show_time.id, count)
+    if not seats:
+        raise ApiError(f'Không còn {count} ghế trống liền nhau', status=404)
+    prices = pricing.seat_prices(show_time)
+    return JsonResponse({
+        'show_time_id': show_time.id,
+        'count': count,
+        'seats': [
+            {'id': seat_id, 'seat_number': seat_number, 'price': prices.price_for(seat_number)}
+            for seat_id, seat_number in seats
+        ],
+        'total_amount': prices.total(seat_number for _, seat_number in seats),
+    })
+
+
+def _list_values(request, name):
+    # """Nhận list từ form (seats=1&seats=2) hoặc chuỗi JSON ('[1, 2]')"""
+    values = request.POST.getlist(name)
+    for value in values:
+        if value.startswith('['):
+            try:
+                return json.loads(value)
+            except ValueError:
+                raise ApiError('Dữ liệu ghế không hợp lệ')
+    return values
+
+
+@require_GET
+@api_view
+def queue(request, show_time_id):
+    # """Vị trí trong phòng chờ: lần đầu bốc số (cookie ký), tới lượt thì nhận vé vào"""
+    require_user(request)
+    rate = waiting_room.admission_rate(show_time_id)
+    redirect_url = reverse('booking_seats', args=[show_time_id])
+    if not rate:
+        return JsonResponse({'admitted': True, 'position': 0, 'eta_seconds': 0, 'redirect_url': redirect_url})
+
+    ticket = waiting_room.read_ticket(request, show_time_id)
+    new_ticket = ticket is None
+    if new_ticket:
+        ticket = waiting_room.join(show_time_id, rate)
+    payload = waiting_room.status(show_time_id, ticket, rate)
+    payload['redirect_url'] = redirect_url if payload['admitted'] else None
+    response = JsonResponse(payload)
+    if new_ticket:
+        response.set_cookie(
+            waiting_room.ticket_cookie(show_time_id), waiting_room.make_ticket(show_time_id, ticket),
+            max_age=24 * 3600, httponly=True, samesite='Lax',
+        )
+    if payload['admitted']:
+        waiting_room.set_pass(response, show_time_id, request.user.id)
+    return response
+
+
+@require_http_methods(['GET', 'POST'])
+@api_view
+@ratelimit('booking_seats')
+def bookings(request):
+    # """GET: vé của tôi (cursor). POST: đặt ghế {show_time_id, seats}"""
+    require_user(request)
+    if request.method == 'GET':
+        fields = requested_fields(request, BOOKING_FIELDS, BOOKING_DEFAULT)
+        queryset = Booking.objects.filter(user=request.user)
+        payload = keyset_page(request, queryset, ['-id'], BOOKING_FIELDS, fields)
+        return json_response(request, payload)
+
+    show_time = ShowTime.objects.select_related('screen').filter(id=request.POST.get('show_time_id') or 0).first()
+    if show_time is None:
+        raise ApiError('Không tìm thấy suất chiếu', status=404)
+    if not waiting_room.is_admitted(request, show_time.id):
+        raise ApiError('Suất chiếu đang mở bán theo hàng đợi, vui lòng vào phòng chờ', status=403)
+    try:
+        booking = claim_seats(request.user, show_time, _list_values(request, 'seats'))
+    except BookingError as e:
+        raise ApiError(str(e), status=409)
+    return JsonResponse({
+        'booking_id': booking.id,
+        'total_amount': booking.total_amount,
+        'redirect_url': reverse('booking_confirmation', args=[booking.id]),
+    }, status=201)
+
+
+PAYMENT_REDIRECTS = {
+    'bank_transfer': 'bank_transfer',
+    'momo': 'momo_payment',
+    'vnpay': 'vnpay_payment',
+    'cash': 'payment_confirmation',
+}
+
+
+@require_http_methods(['GET', 'POST'])
+@api_view
+def payments(request):
+    # """GET: thanh toán của tôi (cursor). POST: chọn phương thức {booking_id, payment_method}"""
+    require_user(request)
+    if request.method == 'GET':
+        fields = requested_fields(request, PAYMENT_FIELDS, PAYMENT_DEFAULT)
+        queryset = Payment.objects.filter(booking__user=request.user)
+        payload = keyset_page(request, queryset, ['-id'], PAYMENT_FIELDS, fields)
+        return json_response(request, payload)
+
+    booking = Booking.objects.filter(
+        id=request.POST.get('booking_id') or 0, user=request.user
+    ).first()
+    if booking is None:
+        raise ApiError('Không tìm thấy đặt vé', status=404)
+    form = PaymentMethodForm(request.POST)
+    if not form.is_valid():
+        raise ApiError('Phương thức thanh toán không hợp lệ')
+    method = form.cleaned_data['payment_method']
+    if method not in PAYMENT_REDIRECTS:
+        raise ApiError('Phương thức thanh toán này sẽ được hỗ trợ sớm nhất!')
+
+    payment, created = Payment.objects.get_or_create(
+        booking=booking,
+        defaults={
+            'amount': booking.total_amount,
+            'payment_method': method,
+            'payment_status': 'pending'
+        }
+    )
+    if not created:
+        payment.payment_method = method
+        payment.save(update_fields=['payment_method', 'updated_at'])
+    return JsonResponse({
+        'payment_id': payment.id,
+        'booking_id': booking.id,
+        'payment_status': payment.payment_status,
+        'redirect_url': reverse(PAYMENT_REDIRECTS[method], args=[booking.id]),
+    }, status=201 if created else 200)
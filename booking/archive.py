@@ -0,0 +1,153 @@
+"""
+Lưu trữ suất chiếu đã qua: chuyển ghế, booking và thanh toán ra khỏi các bảng nóng.
+
+Mỗi suất chiếu có hàng trăm dòng Seat và các bảng Seat/Booking/Payment cứ lớn
+dần. Suất chiếu cũ hơn ARCHIVE_AFTER_DAYS ngày được xử lý theo từng lô:
+- mỗi booking thành một dòng ArchivedBooking gọn (JSON các dòng gốc của booking,
+  thanh toán và các ghế của nó), tra được theo người dùng;
+- ghế không ai đặt bị bỏ hẳn (dựng lại được từ sức chứa của phòng);
+- dòng ShowTime được giữ lại và đánh dấu archived_at, vì DailySales, đánh giá
+  và báo cáo vẫn trỏ tới nó.
+
+Dữ liệu gốc được xóa bằng DELETE trực tiếp, không qua signal: xóa để lưu trữ
+không phải hủy vé, nên không trả ghế, không ghi sự kiện, không gửi thông báo và
+không tính lại doanh số. rollups.rebuild bỏ qua suất chiếu đã lưu trữ, nên ô
+DailySales của chúng giữ nguyên.
+
+Mỗi lô là một transaction gồm cả việc lưu offset (id suất chiếu cuối cùng) vào
+EventConsumer; bị dừng giữa chừng thì lần chạy sau làm tiếp từ lô kế tiếp.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import events, ticket_render
+from .models import ArchivedBooking, Booking, Notification, Payment, Seat, ShowTime
+
+CHECKPOINT = 'archive_showtimes'
+
+
+def cutoff_date(days=None):
+    days = days if days is not None else getattr(settings, 'ARCHIVE_AFTER_DAYS', 400)
+    return timezone.localdate() - timedelta(days=days)
+
+
+def _raw_delete(queryset):
+    # """DELETE ... WHERE pk IN (SELECT ...): không nạp object, không gửi signal"""
+    model = queryset.model
+    sql, params = queryset.values('pk').query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({sql})', params
+        )
+        return cursor.rowcount
+
+
+def archive_chunk(show_time_ids):
+    # """Lưu trữ các suất chiếu show_time_ids và lưu offset trong cùng transaction; trả về số dòng theo loại"""
+    Link = Booking.seats.through
+    with transaction.atomic():
+        bookings = list(Booking.objects.filter(show_time_id__in=show_time_ids).values())
+        booking_ids = [row['id'] for row in bookings]
+        payments = {row['booking_id']: row for row in Payment.objects.filter(booking_id__in=booking_ids).values()}
+        seats = {row['id']: row for row in Seat.objects.filter(
+            id__in=Link.objects.filter(booking_id__in=booking_ids).values('seat_id')
+        ).values()}
+        seats_of = {}
+        for booking_id, seat_id in Link.objects.filter(booking_id__in=booking_ids).values_list('booking_id', 'seat_id'):
+            seats_of.setdefault(booking_id, []).append(seats[seat_id])
+
+        now = timezone.now()
+        ArchivedBooking.objects.bulk_create([
+            ArchivedBooking(
+                id=row['id'], user_id=row['user_id'], show_time_id=row['show_time_id'],
+                total_amount=row['total_amount'], payment_status=row['payment_status'],
+                booking_date=row['booking_date'], archived_at=now,
+                seat_numbers=', '.join(sorted(seat['seat_number'] for seat in seats_of.get(row['id'], []))),
+                data={'booking': row, 'payment': payments.get(row['id']), 'seats': seats_of.get(row['id'], [])},
+            )
+            for row in bookings
+        ], batch_size=500)
+
+        # Thông báo cũ vẫn giữ (booking -> NULL như on_delete=SET_NULL)
+        Notification.objects.filter(booking_id__in=booking_ids).update(booking=None)
+        counts = {
+            'show_times': len(show_time_ids),
+            'bookings': len(bookings),
+            'links': _raw_delete(Link.objects.filter(
+                Q(booking__show_time_id__in=show_time_ids) | Q(seat__show_time_id__in=show_time_ids)
+            )),
+            'payments': _raw_delete(Payment.objects.filter(booking__show_time_id__in=show_time_ids)),
+        }
+        _raw_delete(Booking.objects.filter(show_time_id__in=show_time_ids))
+        counts['seats'] = _raw_delete(Seat.objects.filter(show_time_id__in=show_time_ids))
+        ShowTime.objects.filter(id__in=show_time_ids, archived_at__isnull=True).update(archived_at=now)
+        events.commit_offset(CHECKPOINT, max(show_time_ids))
+        # Xóa bằng SQL thô không gửi signal: tự dọn file vé đã render sau khi commit
+        transaction.on_commit(lambda: ticket_render.invalidate(*booking_ids))
+    return counts
+
+
+def pending_show_times(cutoff):
+    # Suất chiếu cũ chưa lưu trữ, hoặc đã lưu trữ nhưng có booking được khôi phục
+    return ShowTime.objects.filter(date__lt=cutoff).filter(
+        Q(archived_at__isnull=True) | Exists(Seat.objects.filter(show_time=OuterRef('pk')))
+    )
+
+
+def archive(days=None, chunk_size=None, max_chunks=None):
+    """
+    Lưu trữ các suất chiếu trước cutoff_date(days) theo lô chunk_size suất chiếu,
+    bắt đầu sau offset đã lưu. Trả về tổng số dòng theo loại và 'done' khi đã
+    đi hết (offset quay về 0 cho lượt sau).
+    """
+    chunk_size = chunk_size or getattr(settings, 'ARCHIVE_CHUNK_SIZE', 50)
+    show_times = pending_show_times(cutoff_date(days))
+    totals = {'show_times': 0, 'bookings': 0, 'links': 0, 'payments': 0, 'seats': 0, 'chunks': 0, 'done': False}
+    while max_chunks is None or totals['chunks'] < max_chunks:
+        ids = list(
+            show_times.filter(id__gt=events.get_offset(CHECKPOINT)).order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            events.commit_offset(CHECKPOINT, 0)
+            totals['done'] = True
+            break
+        for name, count in archive_chunk(ids).items():
+            totals[name] += count
+        totals['chunks'] += 1
+    return totals
+
+
+def _instance(model, row):
+    # Dựng lại model từ dòng values() đã qua JSON (datetime, Decimal ở dạng chuỗi)
+    fields = {field.attname: field for field in model._meta.concrete_fields}
+    return model(**{name: fields[name].to_python(value) for name, value in row.items()})
+
+
+def restore(archived_booking):
+    """
+    Đưa một booking đã lưu trữ về lại các bảng Booking/Payment/Seat (giữ nguyên id)
+    để xem chi tiết và in vé. Lần lưu trữ sau sẽ chuyển nó đi lại. Đã được khôi
+    phục rồi thì trả về booking hiện có.
+    """
+    data = archived_booking.data
+    with transaction.atomic():
+        # Bấm hai lần/hai tab: request sau thấy dòng lưu trữ đã bị request trước xóa
+        if not ArchivedBooking.objects.select_for_update().filter(pk=archived_booking.pk).exists():
+            return Booking.objects.filter(pk=archived_booking.pk).first()
+        seats = [_instance(Seat, row) for row in data['seats']]
+        # Ghế dùng chung với booking khác đã được khôi phục trước đó thì bỏ qua
+        Seat.objects.bulk_create(seats, ignore_conflicts=True)
+        booking = _instance(Booking, data['booking'])
+        Booking.objects.bulk_create([booking])
+        if data['payment']:
+            Payment.objects.bulk_create([_instance(Payment, data['payment'])])
+        Booking.seats.through.objects.bulk_create(
+            [Booking.seats.through(booking_id=booking.id, seat_id=seat.id) for seat in seats], ignore_conflicts=True
+        )
+        ArchivedBooking.objects.filter(pk=archived_booking.pk).delete()
+    return booking
@@ -0,0 +1,197 @@
+"""
+Sao lưu và khôi phục database SQLite khi hệ thống vẫn đang chạy.
+
+Chép thẳng file db.sqlite3 lúc có transaction đang ghi có thể ra bản chụp hỏng.
+Ở đây dùng backup API của SQLite (sqlite3.Connection.backup): chép từng
+BACKUP_PAGES_PER_STEP trang, nghỉ BACKUP_STEP_SLEEP giây giữa các bước để
+request đặt vé vẫn ghi được xen kẽ. Nếu có kết nối khác ghi vào database giữa
+chừng, SQLite chép lại từ đầu; bị chép lại quá BACKUP_MAX_RESTARTS lần thì chép
+nốt trong một bước (giữ khóa đọc trong thời gian chép một file local).
+
+Bản chụp được nén gzip theo luồng (không đọc cả file vào bộ nhớ) thành
+BACKUP_DIR/db-YYYYmmdd-HHMMSS.sqlite3.gz, theo giờ địa phương. PRAGMA
+integrity_check chạy trên bản chụp trong một process con, nên việc kiểm tra
+tốn CPU/IO không chiếm GIL hay kết nối database của process đang phục vụ.
+
+Khôi phục "theo thời điểm" là chọn bản sao lưu gần nhất trước thời điểm đó
+(độ mịn bằng tần suất chạy backup_db). Trước khi ghi đè, database hiện tại được
+sao lưu thành pre-restore-*.sqlite3.gz để có thể quay lại.
+"""
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+FILENAME = re.compile(r'^(db|pre-restore)-(\d{8}-\d{6})\.sqlite3\.gz$')
+TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S'
+# Chạy trong process con: chỉ mở file ở chế độ đọc
+VERIFY_SCRIPT = (
+    "import sqlite3, sys\n"
+    "connection = sqlite3.connect('file:' + sys.argv[1] + '?mode=ro', uri=True)\n"
+    "print('\\n'.join(row[0] for row in connection.execute('PRAGMA integrity_check')))\n"
+)
+
+
+class BackupError(Exception):
+    """Sao lưu/khôi phục thất bại; message hiển thị trực tiếp cho người chạy lệnh"""
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def database_path():
+    return Path(settings.DATABASES['default']['NAME'])
+
+
+def backup_dir():
+    return Path(getattr(settings, 'BACKUP_DIR', settings.BASE_DIR / 'backups'))
+
+
+def copy_database(source_path, target_path, pages=None, sleep=None):
+    """
+    Chép database bằng backup API, từng `pages` trang một và nghỉ `sleep` giây
+    giữa các bước. Trả về số lần bị chép lại do có ghi xen vào.
+    """
+    pages = pages or getattr(settings, 'BACKUP_PAGES_PER_STEP', 1024)
+    sleep = sleep if sleep is not None else getattr(settings, 'BACKUP_STEP_SLEEP', 0.05)
+    max_restarts = getattr(settings, 'BACKUP_MAX_RESTARTS', 3)
+    state = {'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        # Số trang còn lại tăng lên nghĩa là SQLite đã bắt đầu chép lại từ đầu
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > max_restarts:
+                raise _TooManyRestarts()
+        state['remaining'] = remaining
+
+    timeout = settings.DATABASES['default'].get('OPTIONS', {}).get('timeout', 20)
+    source = sqlite3.connect(source_path, timeout=timeout)
+    target = sqlite3.connect(target_path, timeout=timeout)
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=sleep)
+        except _TooManyRestarts:
+            source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return state['restarts']
+
+
+def verify(path):
+    # """PRAGMA integrity_check trong process con; trả về (True, 'ok') hoặc (False, các lỗi)"""
+    result = subprocess.run(
+        [sys.executable, '-c', VERIFY_SCRIPT, str(path)],
+        capture_output=True, text=True, timeout=getattr(settings, 'BACKUP_VERIFY_TIMEOUT', 3600),
+    )
+    output = (result.stdout or result.stderr).strip()
+    return result.returncode == 0 and output == 'ok', output
+
+
+def compress(source_path, target_path):
+    level = getattr(settings, 'BACKUP_COMPRESS_LEVEL', 6)
+    with open(source_path, 'rb') as source, gzip.open(target_path, 'wb', compresslevel=level) as target:
+        shutil.copyfileobj(source, target, length=1024 * 1024)
+
+
+def decompress(source_path, target_path):
+    opener = gzip.open if str(source_path).endswith('.gz') else open
+    with opener(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        shutil.copyfileobj(source, target, length=1024 * 1024)
+
+
+def backup(prefix='db', pages=None, sleep=None, check=True):
+    """
+    Sao lưu database vào BACKUP_DIR. Trả về dict: path, size, restarts, verified.
+    Bản chụp hỏng thì không được giữ lại (BackupError).
+    """
+    folder = backup_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    name = f'{prefix}-{timezone.localtime():{TIMESTAMP_FORMAT}}.sqlite3.gz'
+    snapshot = folder / f'.{uuid.uuid4().hex}.sqlite3'
+    partial = folder / f'.{name}.partial'
+    try:
+        restarts = copy_database(database_path(), snapshot, pages, sleep)
+        if check:
+            ok, message = verify(snapshot)
+            if not ok:
+                raise BackupError(f'Bản chụp không qua integrity_check: {message}')
+        compress(snapshot, partial)
+        # Đổi tên sau khi nén xong: file .gz trong thư mục luôn là bản đầy đủ
+        os.replace(partial, folder / name)
+    finally:
+        snapshot.unlink(missing_ok=True)
+        partial.unlink(missing_ok=True)
+    path = folder / name
+    return {'path': path, 'size': path.stat().st_size, 'restarts': restarts, 'verified': check}
+
+
+def list_backups():
+    # """Các bản sao lưu trong BACKUP_DIR: [(thời điểm, path)] từ cũ tới mới"""
+    backups = []
+    folder = backup_dir()
+    if not folder.exists():
+        return backups
+    for path in folder.iterdir():
+        match = FILENAME.match(path.name)
+        if match:
+            taken_at = timezone.make_aware(datetime.strptime(match.group(2), TIMESTAMP_FORMAT))
+            backups.append((taken_at, path))
+    return sorted(backups)
+
+
+def find_backup(at=None):
+    # """Bản sao lưu gần nhất tại hoặc trước thời điểm `at` (mặc định: mới nhất)"""
+    candidates = [path for taken_at, path in list_backups() if at is None or taken_at <= at]
+    if not candidates:
+        raise BackupError('Không có bản sao lưu nào phù hợp')
+    return candidates[-1]
+
+
+def prune(keep=None):
+    # """Giữ lại `keep` bản db-* mới nhất (không xóa bản pre-restore-*); trả về số file đã xóa"""
+    keep = keep if keep is not None else getattr(settings, 'BACKUP_KEEP', 14)
+    regular = [path for _, path in list_backups() if path.name.startswith('db-')]
+    removed = regular[:-keep] if keep else regular
+    for path in removed:
+        path.unlink()
+    return len(removed)
+
+
+def restore(path, check=True):
+    """
+    Ghi đè database hiện tại bằng bản sao lưu `path` (.sqlite3.gz hoặc .sqlite3).
+    Trả về path của bản pre-restore vừa tạo.
+    """
+    folder = backup_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    snapshot = folder / f'.{uuid.uuid4().hex}.sqlite3'
+    try:
+        decompress(path, snapshot)
+        if check:
+            ok, message = verify(snapshot)
+            if not ok:
+                raise BackupError(f'Bản sao lưu không qua integrity_check: {message}')
+        safety = backup(prefix='pre-restore', check=False)['path']
+        connections.close_all()
+        # Chép ngược bằng backup API: một bước, giữ khóa ghi trên database đang chạy nên
+        # các kết nối khác chỉ chờ chứ không đọc phải trạng thái dở dang
+        copy_database(snapshot, database_path(), pages=-1, sleep=0)
+    finally:
+        snapshot.unlink(missing_ok=True)
+    # Cache (seatmap, phòng chờ, tổng hợp đánh giá...) đang phản ánh dữ liệu trước khi khôi phục
+    cache.clear()
+    return safety
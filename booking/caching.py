@@ -0,0 +1,244 @@
+"""
+Cache dữ liệu cho các trang đọc nhiều (trang chủ, chi tiết phim, lịch chiếu, dashboard).
+
+get_or_compute(key, compute, ...) và decorator @cached lưu kết quả của compute()
+vào cache mặc định (CACHES['default']: LocMemCache là LRU trong từng process,
+đặt REDIS_URL để dùng Redis chung cho mọi process; hai backend thay nhau được
+vì module chỉ dùng get/set/add/delete/get_many/set_many). Mỗi mục lưu kèm thời
+gian tính (delta), hạn tươi và phiên bản các tag lúc tính.
+
+Chống dồn request khi mục hết hạn (cache stampede):
+- Single-flight: trong một process chỉ một thread tính cho mỗi key, các thread
+  khác chờ kết quả đó; giữa các process dùng khóa cache.add (cache chia sẻ).
+- Hết hạn sớm theo xác suất (XFetch): khi còn gần hết hạn, một request ngẫu
+  nhiên (xác suất tăng theo delta) làm mới trước, nên các mục không cùng hết hạn.
+- Stale-while-revalidate: quá hạn tươi nhưng còn trong CACHING_STALE_TIMEOUT thì
+  trả giá trị cũ ngay và làm mới ở thread nền.
+
+Xóa theo tag: mỗi tag có một phiên bản trong cache; invalidate_tags() đổi phiên
+bản nên mọi mục gắn tag đó thành cũ và được tính lại (đồng bộ) ở lần đọc sau.
+booking/signals.py gọi invalidate_tags khi Movie/Genre/ShowTime được lưu.
+
+stats() trả về số hit/miss/stale/... theo namespace, tính trong process hiện tại.
+"""
+import functools
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+COUNTERS = ('hits', 'misses', 'stale', 'early', 'coalesced', 'errors')
+MISSING = object()
+
+_flights = {}
+_flights_lock = threading.Lock()
+_metrics = defaultdict(lambda: dict.fromkeys(COUNTERS + ('computes', 'compute_seconds'), 0))
+_metrics_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _count(namespace, counter, amount=1):
+    with _metrics_lock:
+        _metrics[namespace][counter] += amount
+
+
+def stats():
+    # """Chỉ số theo namespace: hits, misses, stale, early, coalesced, errors, hit_ratio, avg_compute_ms"""
+    with _metrics_lock:
+        snapshot = {namespace: dict(counters) for namespace, counters in _metrics.items()}
+    for counters in snapshot.values():
+        reads = counters['hits'] + counters['stale'] + counters['early'] + counters['misses']
+        computed = counters.pop('computes')
+        counters['hit_ratio'] = round(1 - counters['misses'] / reads, 3) if reads else None
+        counters['avg_compute_ms'] = round(counters.pop('compute_seconds') * 1000 / computed, 1) if computed else None
+    return snapshot
+
+
+def reset_stats():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def entry_key(key):
+    return f'caching:entry:{key}'
+
+
+def lock_key(key):
+    return f'caching:lock:{key}'
+
+
+def tag_key(tag):
+    return f'caching:tag:{tag}'
+
+
+def make_key(namespace, *args, **kwargs):
+    # """namespace:arg1:arg2...; tham số dài hoặc có khoảng trắng thì băm lại (giới hạn khóa của memcached)"""
+    parts = [str(arg) for arg in args] + [f'{name}={value}' for name, value in sorted(kwargs.items())]
+    raw = ':'.join(parts)
+    if len(raw) > 200 or any(char.isspace() for char in raw):
+        raw = hashlib.md5(raw.encode()).hexdigest()
+    return f'{namespace}:{raw}' if raw else namespace
+
+
+def tag_versions(tags):
+    # """Phiên bản hiện tại của các tag; tag chưa có (hoặc bị LRU đẩy ra) thì tạo phiên bản mới"""
+    if not tags:
+        return {}
+    keys = {tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def invalidate_tags(*tags):
+    # Phiên bản theo thời gian: tag bị đẩy khỏi cache rồi tạo lại cũng không trùng phiên bản cũ
+    cache.set_many({tag_key(tag): time.time_ns() for tag in tags}, None)
+
+
+def _compute(namespace, key, compute, timeout, stale, tags):
+    # Đọc phiên bản tag trước khi tính: tag bị đổi trong lúc tính thì mục vừa lưu đã cũ ngay
+    versions = tag_versions(tags)
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    _count(namespace, 'computes')
+    _count(namespace, 'compute_seconds', delta)
+    cache.set(entry_key(key), {
+        'value': value, 'delta': delta, 'expires': time.time() + timeout, 'versions': versions,
+    }, timeout + stale)
+    return value
+
+
+def _wait_for_entry(key, tags, wait):
+    # """Chờ process khác tính xong (cache chia sẻ); hết thời gian thì MISSING"""
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(entry_key(key))
+        if entry is not None and entry['versions'] == tag_versions(tags) and entry['expires'] > time.time():
+            return entry['value']
+    return MISSING
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = MISSING
+
+
+def _single_flight(namespace, key, compute, timeout, stale, tags, wait=True):
+    """
+    Tính compute() một lần cho mỗi key dù nhiều request cùng cần. wait=False (làm
+    mới nền): có nơi khác đang tính thì bỏ qua, trả về MISSING.
+    """
+    lock_timeout = _setting('CACHING_LOCK_TIMEOUT', 10)
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        if not wait:
+            return MISSING
+        _count(namespace, 'coalesced')
+        flight.done.wait(lock_timeout)
+        # Thread tính bị lỗi hoặc quá lâu: tự tính, không cache
+        return flight.value if flight.value is not MISSING else compute()
+
+    try:
+        locked = cache.add(lock_key(key), 1, lock_timeout)
+        if not locked:
+            if not wait:
+                return MISSING
+            flight.value = _wait_for_entry(key, tags, lock_timeout)
+            if flight.value is not MISSING:
+                _count(namespace, 'coalesced')
+                return flight.value
+        try:
+            flight.value = _compute(namespace, key, compute, timeout, stale, tags)
+        finally:
+            if locked:
+                cache.delete(lock_key(key))
+        return flight.value
+    except Exception:
+        _count(namespace, 'errors')
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _refresh_in_background(namespace, key, compute, timeout, stale, tags):
+    def run():
+        try:
+            _single_flight(namespace, key, compute, timeout, stale, tags, wait=False)
+        except Exception:
+            pass  # Đã đếm vào errors; request sau sẽ thử lại
+        finally:
+            # Thread nền có kết nối database riêng
+            connection.close()
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_or_compute(key, compute, timeout=None, stale=None, tags=(), namespace=None):
+    """
+    Giá trị đã cache của `key`, hoặc compute() (single-flight) nếu chưa có, đã
+    hết hạn hẳn hoặc có tag bị invalidate. timeout: số giây còn tươi; stale: số
+    giây sau đó vẫn được trả giá trị cũ trong lúc làm mới ở nền.
+    """
+    namespace = namespace or key.split(':', 1)[0]
+    timeout = timeout if timeout is not None else _setting('CACHING_TIMEOUT', 300)
+    stale = stale if stale is not None else _setting('CACHING_STALE_TIMEOUT', 60)
+    tags = list(tags)
+
+    entry = cache.get(entry_key(key))
+    if entry is None or entry['versions'] != tag_versions(tags):
+        _count(namespace, 'misses')
+        return _single_flight(namespace, key, compute, timeout, stale, tags)
+
+    remaining = entry['expires'] - time.time()
+    if remaining <= 0:
+        _count(namespace, 'stale')
+        _refresh_in_background(namespace, key, compute, timeout, stale, tags)
+        return entry['value']
+    # XFetch: -delta * beta * ln(U) >= thời gian còn lại -> làm mới sớm
+    beta = _setting('CACHING_BETA', 1.0)
+    if entry['delta'] * beta * -math.log(1.0 - random.random()) >= remaining:
+        _count(namespace, 'early')
+        if stale:
+            _refresh_in_background(namespace, key, compute, timeout, stale, tags)
+            return entry['value']
+        return _single_flight(namespace, key, compute, timeout, stale, tags)
+    _count(namespace, 'hits')
+    return entry['value']
+
+
+def cached(namespace, timeout=None, stale=None, tags=()):
+    """
+    Decorator cache kết quả hàm theo tham số. tags là danh sách tag hoặc hàm nhận
+    cùng tham số với hàm được cache, VD tags=lambda movie_id: [f'movie:{movie_id}'].
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            return get_or_compute(
+                make_key(namespace, *args, **kwargs), lambda: func(*args, **kwargs),
+                timeout, stale, entry_tags, namespace,
+            )
+        wrapper.invalidate = lambda *args, **kwargs: cache.delete(entry_key(make_key(namespace, *args, **kwargs)))
+        return wrapper
+    return decorator
@@ -0,0 +1,19 @@
+"""
+System check của app (chạy cùng manage.py check/runserver/migrate).
+"""
+from django.core.checks import Tags, Warning, register
+
+from . import waiting_room
+
+
+@register(Tags.caches)
+def check_waiting_room_cache(app_configs, **kwargs):
+    # Mỗi worker một LocMemCache thì mỗi worker một hàng đợi: thứ tự và tốc độ vào đều sai.
+    # Chỉ cảnh báo: phòng chờ mặc định tắt, admin đã không cho bật (ShowTimeAdminForm)
+    if waiting_room.available():
+        return []
+    return [Warning(
+        'Phòng chờ cần cache dùng chung giữa các process, nhưng CACHES["default"] là cache cục bộ; không thể bật phòng chờ.',
+        hint='Đặt REDIS_URL, hoặc WAITING_ROOM_SINGLE_PROCESS = True nếu chỉ chạy một process.',
+        id='booking.W001',
+    )]
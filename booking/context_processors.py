@@ -0,0 +1,9 @@
+from .views import is_staff_or_admin
+
+
+def user_roles(request):
+    # """Quyền staff/admin của user, chỉ tính khi template thực sự dùng tới"""
+    user = getattr(request, 'user', None)
+    return {
+        'is_staff_or_admin': lambda: user is not None and is_staff_or_admin(user),
+    }
@@ -0,0 +1,131 @@
+"""
+Nhật ký sự kiện (append-only) cho Booking, Seat và Payment.
+
+Mỗi lần một trường trạng thái đổi giá trị, một dòng DomainEvent ngắn gọn được ghi
+trong cùng transaction với thay đổi: thực thể, id, suất chiếu, tên trường, giá trị
+cũ và mới. Các trường được theo dõi khai báo ở TrackedModel.TRACKED_FIELDS.
+- save() và admin (kể cả list_editable) đi qua post_save (booking/signals.py).
+- Cập nhật hàng loạt bằng queryset.update() (giữ ghế, soát vé) gọi record_many.
+
+Consumer đọc nhật ký theo offset (id tăng dần). SQLite chỉ cho một transaction
+ghi tại một thời điểm nên id commit theo đúng thứ tự và consumer không bỏ sót dòng.
+consume() gọi handler với một lô sự kiện rồi mới lưu offset, tức là giao ít nhất
+một lần: handler phải chịu được việc nhận lại một lô sau khi bị crash.
+
+Dữ liệu được "phân vùng" theo cột day: SQLite không có partition, nên prune()
+xóa cả khoảng ngày cũ theo chỉ mục day.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import seatmap
+from .models import Booking, DomainEvent, EventConsumer, Payment, Seat
+
+Event = namedtuple('Event', 'id entity entity_id show_time_id kind old new created_at')
+
+ENTITY_NAMES = {Booking: 'booking', Seat: 'seat', Payment: 'payment'}
+
+
+def _text(value):
+    return '' if value is None else str(value)[:20]
+
+
+def _show_time_id(instance):
+    if isinstance(instance, Payment):
+        # Thanh toán gắn với suất chiếu qua booking; chỉ lấy khi booking đã nạp sẵn, không truy vấn thêm
+        booking = Payment._meta.get_field('booking').get_cached_value(instance, default=None)
+        return booking.show_time_id if booking is not None else None
+    return instance.show_time_id
+
+
+def record_many(rows):
+    # """Ghi các sự kiện (entity, entity_id, show_time_id, kind, old, new); gọi trong transaction của thay đổi"""
+    now = timezone.now()
+    day = timezone.localdate(now)
+    DomainEvent.objects.bulk_create([
+        DomainEvent(day=day, entity=entity, entity_id=entity_id, show_time_id=show_time_id,
+                    kind=kind, old=_text(old), new=_text(new), created_at=now)
+        for entity, entity_id, show_time_id, kind, old, new in rows
+    ])
+
+
+def instance_saved(instance, created):
+    # """Ghi sự kiện cho các trường được theo dõi vừa đổi giá trị, rồi ghi nhớ giá trị mới"""
+    entity = ENTITY_NAMES[type(instance)]
+    tracked = getattr(instance, '_tracked', {})
+    current = {name: getattr(instance, name) for name in instance.TRACKED_FIELDS}
+    show_time_id = _show_time_id(instance)
+    rows = []
+    if created:
+        # Ghế được tạo hàng loạt bằng SQL (scheduling.create_seats); chỉ booking/thanh toán có sự kiện tạo
+        if entity != 'seat':
+            rows.append((entity, instance.pk, show_time_id, 'created', '', current[instance.TRACKED_FIELDS[0]]))
+    else:
+        for name, value in current.items():
+            if name in tracked and tracked[name] != value:
+                rows.append((entity, instance.pk, show_time_id, name, tracked[name], value))
+    if rows:
+        record_many(rows)
+    instance._tracked = current
+
+
+def instance_deleted(instance):
+    entity = ENTITY_NAMES[type(instance)]
+    record_many([(entity, instance.pk, _show_time_id(instance), 'deleted', '', '')])
+
+
+def read(after=0, limit=500, entities=None, show_time_id=None):
+    # """Các sự kiện có offset > after, theo thứ tự ghi"""
+    queryset = DomainEvent.objects.filter(id__gt=after)
+    if entities:
+        queryset = queryset.filter(entity__in=entities)
+    if show_time_id is not None:
+        queryset = queryset.filter(show_time_id=show_time_id)
+    return [Event(*row) for row in queryset.order_by('id').values_list(*Event._fields)[:limit]]
+
+
+def get_offset(name):
+    return EventConsumer.objects.filter(name=name).values_list('offset', flat=True).first() or 0
+
+
+def commit_offset(name, offset):
+    EventConsumer.objects.update_or_create(name=name, defaults={'offset': offset})
+
+
+def consume(name, handler, batch_size=500):
+    """
+    Xử lý một lô sự kiện mới của consumer `name`: handler(events) rồi lưu offset.
+    Trả về số sự kiện đã xử lý (0 nếu đã đọc hết).
+    """
+    events = read(get_offset(name), batch_size)
+    if events:
+        handler(events)
+        commit_offset(name, events[-1].id)
+    return len(events)
+
+
+def prune(days=None):
+    # """Xóa các ngày cũ hơn EVENT_LOG_RETENTION_DAYS; trả về số dòng đã xóa"""
+    days = days if days is not None else getattr(settings, 'EVENT_LOG_RETENTION_DAYS', 90)
+    cutoff = timezone.localdate() - timedelta(days=days)
+    with transaction.atomic():
+        deleted, _ = DomainEvent.objects.filter(day__lt=cutoff).delete()
+    return deleted
+
+
+def refresh_seatmaps(events):
+    # """Consumer 'seatmap': dựng lại chỉ mục ghế trống của suất chiếu có ghế được trả lại"""
+    released = {event.show_time_id for event in events
+                if event.entity == 'seat' and event.kind == 'status' and event.new == 'available'}
+    for show_time_id in released:
+        seatmap.invalidate(show_time_id)
+
+
+# Consumer có sẵn cho lệnh consume_events
+CONSUMERS = {
+    'seatmap': refresh_seatmaps,
+}
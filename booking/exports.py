@@ -0,0 +1,157 @@
+"""
+Xuất dữ liệu đặt vé/thanh toán/doanh số ra CSV dạng streaming cho bộ phận tài chính.
+
+Dữ liệu được đọc theo từng khối (keyset theo id) bằng values_list đã join sẵn
+user, suất chiếu, phim, rạp; ghế của cả khối lấy bằng một truy vấn trên bảng
+trung gian. Bộ nhớ dùng không đổi theo số dòng và mỗi khối chỉ là một lượt đọc
+ngắn nên không giữ khóa đọc SQLite suốt quá trình tải file.
+"""
+import csv
+import datetime
+import io
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Booking
+
+CHUNK_SIZE = 2000
+
+BOOKING_COLUMNS = [
+    ('id', 'Mã đặt vé'),
+    ('user__username', 'Tài khoản'),
+    ('user__email', 'Email'),
+    ('show_time__movie__title', 'Phim'),
+    ('show_time__screen__cinema__name', 'Rạp'),
+    ('show_time__screen__name', 'Phòng'),
+    ('show_time__date', 'Ngày chiếu'),
+    ('show_time__time', 'Giờ chiếu'),
+    ('total_amount', 'Tổng tiền'),
+    ('payment_status', 'Trạng thái thanh toán'),
+    ('booking_status', 'Trạng thái đặt vé'),
+    ('payment__payment_method', 'Phương thức'),
+    ('booking_date', 'Ngày đặt'),
+]
+
+PAYMENT_COLUMNS = [
+    ('id', 'Mã thanh toán'),
+    ('booking_id', 'Mã đặt vé'),
+    ('booking__user__username', 'Tài khoản'),
+    ('booking__show_time__movie__title', 'Phim'),
+    ('booking__show_time__date', 'Ngày chiếu'),
+    ('amount', 'Số tiền'),
+    ('payment_method', 'Phương thức'),
+    ('payment_status', 'Trạng thái'),
+    ('transaction_id', 'Mã giao dịch'),
+    ('bank_account__account_number', 'Tài khoản nhận'),
+    ('payment_date', 'Ngày thanh toán'),
+    ('created_at', 'Ngày tạo'),
+]
+
+SALES_COLUMNS = [
+    ('id', 'Mã dòng'),
+    ('date', 'Ngày'),
+    ('movie__title', 'Phim'),
+    ('cinema__name', 'Rạp'),
+    ('screen__name', 'Phòng'),
+    ('show_time__date', 'Ngày chiếu'),
+    ('show_time__time', 'Giờ chiếu'),
+    ('payment_method', 'Phương thức'),
+    ('bookings', 'Số đơn'),
+    ('paid_bookings', 'Đơn đã thanh toán'),
+    ('tickets', 'Số vé'),
+    ('revenue', 'Doanh thu'),
+    ('refunded_bookings', 'Đơn hoàn tiền'),
+    ('refunds', 'Tiền hoàn'),
+]
+
+
+def iter_chunks(queryset, fields, chunk_size=CHUNK_SIZE):
+    # """Đọc queryset theo từng khối id tăng dần, mỗi khối một truy vấn ngắn"""
+    queryset = queryset.order_by('id')
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list(*fields)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _format(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%d/%m/%Y %H:%M')
+    if isinstance(value, datetime.date):
+        return value.strftime('%d/%m/%Y')
+    if isinstance(value, datetime.time):
+        return value.strftime('%H:%M')
+    return value
+
+
+def booking_rows(queryset, chunk_size=CHUNK_SIZE):
+    fields = [field for field, _ in BOOKING_COLUMNS]
+    yield [label for _, label in BOOKING_COLUMNS] + ['Ghế']
+    seat_links = Booking.seats.through.objects
+    for rows in iter_chunks(queryset, fields, chunk_size):
+        # Số ghế của cả khối trong một truy vấn
+        seats = {}
+        for booking_id, seat_number in seat_links.filter(
+            booking__in=[row[0] for row in rows]
+        ).values_list('booking_id', 'seat__seat_number').order_by('booking_id', 'seat__seat_number'):
+            seats.setdefault(booking_id, []).append(seat_number)
+        for row in rows:
+            yield [_format(value) for value in row] + [', '.join(seats.get(row[0], []))]
+
+
+def payment_rows(queryset, chunk_size=CHUNK_SIZE):
+    fields = [field for field, _ in PAYMENT_COLUMNS]
+    yield [label for _, label in PAYMENT_COLUMNS]
+    for rows in iter_chunks(queryset, fields, chunk_size):
+        for row in rows:
+            yield [_format(value) for value in row]
+
+
+def sales_rows(queryset, chunk_size=CHUNK_SIZE):
+    fields = [field for field, _ in SALES_COLUMNS]
+    yield [label for _, label in SALES_COLUMNS]
+    for rows in iter_chunks(queryset, fields, chunk_size):
+        for row in rows:
+            yield [_format(value) for value in row]
+
+
+def stream_csv(rows, filename, rows_per_chunk=500):
+    # """StreamingHttpResponse CSV, có BOM UTF-8 để Excel hiển thị đúng tiếng Việt"""
+    def content():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        for i, row in enumerate(rows, 1):
+            writer.writerow(row)
+            if i % rows_per_chunk == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    response = StreamingHttpResponse(content(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_bookings(queryset):
+    filename = f'bookings_{timezone.localdate():%Y%m%d}.csv'
+    return stream_csv(booking_rows(queryset), filename)
+
+
+def export_payments(queryset):
+    filename = f'payments_{timezone.localdate():%Y%m%d}.csv'
+    return stream_csv(payment_rows(queryset), filename)
+
+
+def export_sales(queryset):
+    filename = f'sales_{timezone.localdate():%Y%m%d}.csv'
+    return stream_csv(sales_rows(queryset), filename)
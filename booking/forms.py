@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, PasswordChangeForm
 from django.contrib.auth.models import User
-from .models import Booking, Review, Movie, Seat, UserProfile, Payment, BankAccount
+from django.conf import settings
+from .models import Booking, Review, Movie, Seat, Screen, ShowTime, UserProfile, Payment, BankAccount
 
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True, widget=forms.EmailInput(attrs={
@@ -254,7 +255,9 @@ class MovieSearchForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={
             'placeholder': 'Tìm kiếm phim...',
-            'class': 'form-control'
+            'class': 'form-control',
+            'id': 'search-input',
+            'autocomplete': 'off'
         })
     )
     genre = forms.ModelChoiceField(
@@ -331,4 +334,85 @@ class VNPayPaymentForm(forms.ModelForm):
         # Tạo nội dung giao dịch mặc định
         if not self.instance.pk:
             self.fields['card_number'].initial = ''
-            self.fields['card_holder'].initial = '' 
\ No newline at end of file
+            self.fields['card_holder'].initial = '' 
+
+
+class BulkScheduleForm(forms.Form):
+    movie = forms.ModelChoiceField(queryset=Movie.objects.filter(is_active=True), label='Phim')
+    screens = forms.ModelMultipleChoiceField(
+        queryset=Screen.objects.select_related('cinema'),
+        widget=forms.CheckboxSelectMultiple(),
+        label='Phòng chiếu'
+    )
+    start_date = forms.DateField(label='Từ ngày', widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(label='Đến ngày', widget=forms.DateInput(attrs={'type': 'date'}))
+    times = forms.CharField(
+        label='Khung giờ',
+        help_text='Các giờ chiếu cách nhau bởi dấu phẩy, ví dụ: 09:00, 12:30, 19:45',
+        widget=forms.TextInput(attrs={'size': 60})
+    )
+    price = forms.DecimalField(
+        max_digits=10, decimal_places=0, required=False, label='Giá vé',
+        help_text='Để trống để dùng giá của phim'
+    )
+    buffer_minutes = forms.IntegerField(
+        min_value=0, initial=settings.SCHEDULE_BUFFER_MINUTES, label='Thời gian dọn phòng (phút)'
+    )
+
+    def clean_times(self):
+        from datetime import datetime
+        times = []
+        for value in self.cleaned_data['times'].split(','):
+            value = value.strip()
+            if not value:
+                continue
+            try:
+                times.append(datetime.strptime(value, '%H:%M').time())
+            except ValueError:
+                raise forms.ValidationError(f'Giờ chiếu không hợp lệ: {value}')
+        if not times:
+            raise forms.ValidationError('Vui lòng nhập ít nhất một khung giờ.')
+        return sorted(set(times))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            raise forms.ValidationError('Ngày kết thúc phải sau ngày bắt đầu.')
+        return cleaned_data
+
+class ShowTimeAdminForm(forms.ModelForm):
+    class Meta:
+        model = ShowTime
+        fields = '__all__'
+
+    def clean_admission_rate(self):
+        from . import waiting_room
+        admission_rate = self.cleaned_data.get('admission_rate')
+        if admission_rate and not waiting_room.available():
+            raise forms.ValidationError(
+                'Không thể bật phòng chờ: cache không dùng chung giữa các process (cần cấu hình REDIS_URL).'
+            )
+        return admission_rate
+
+    def clean(self):
+        from .scheduling import ScheduleIndex
+        cleaned_data = super().clean()
+        movie = cleaned_data.get('movie')
+        screen = cleaned_data.get('screen')
+        date = cleaned_data.get('date')
+        time = cleaned_data.get('time')
+        if movie and screen and date and time:
+            # Kiểm tra trùng lịch với các suất chiếu khác trong cùng phòng
+            index = ScheduleIndex.load(
+                [screen.id], date, date, settings.SCHEDULE_BUFFER_MINUTES,
+                exclude_ids=[self.instance.pk] if self.instance.pk else [],
+            )
+            conflict = index.find_conflict(screen.id, date, time, movie.duration)
+            if conflict is not None:
+                raise forms.ValidationError(
+                    f'Phòng {screen.name} đã có suất chiếu "{conflict.movie_title}" lúc '
+                    f'{conflict.time:%H:%M} ngày {conflict.date:%d/%m/%Y} trùng với khung giờ này.'
+                )
+        return cleaned_data
@@ -0,0 +1,214 @@
+"""
+Kiểm tra tính nhất quán giữa phòng chiếu, ghế và booking của từng suất chiếu.
+
+Các bất biến (mỗi vi phạm là một "finding" trong báo cáo):
+- seat_rows: số dòng Seat khác Screen.capacity (thiếu ghế thì không bán được,
+  thừa ghế thì có thể bán quá sức chứa).
+- overbooked: số ghế đang bị chiếm (không 'available') vượt capacity.
+- double_sold: một ghế thuộc nhiều booking còn hiệu lực.
+- sold_but_available: ghế thuộc booking còn hiệu lực nhưng đang hiện là trống,
+  người khác có thể giữ lại ghế đó (bán trùng).
+- orphaned: ghế 'booked' không thuộc booking nào còn hiệu lực (rò ghế).
+- foreign_seat: booking gắn với ghế của suất chiếu khác.
+
+Suất chiếu được chia thành các khoảng id; mỗi khoảng chỉ tốn vài truy vấn
+GROUP BY/JOIN trên chỉ mục show_time, và các khoảng chạy song song trên một
+thread pool (mỗi thread một kết nối database). Chế độ fix sửa các lỗi có cách
+sửa an toàn (seat_rows thiếu ghế theo cách đặt tên chuẩn, sold_but_available, orphaned) trong một
+transaction ngắn cho mỗi khoảng; các lỗi còn lại chỉ báo cáo để người xử lý.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from . import events, seatmap
+from .models import Booking, Seat, ShowTime
+from .scheduling import create_seats, seat_numbers
+from .services import ACTIVE_STATUSES, release_orphaned_seats
+
+CHECKS = ('seat_rows', 'overbooked', 'double_sold', 'sold_but_available', 'orphaned', 'foreign_seat')
+FIXABLE = ('seat_rows', 'sold_but_available', 'orphaned')
+# Số id ghế tối đa ghi trong mỗi finding; báo cáo của database lớn vẫn gọn
+MAX_SEAT_IDS = 50
+
+
+def _finding(show_time_id, check, seat_ids=(), **detail):
+    seat_ids = sorted(seat_ids)
+    return {'show_time_id': show_time_id, 'check': check, 'count': len(seat_ids) or None,
+            'seat_ids': seat_ids[:MAX_SEAT_IDS], **detail}
+
+
+def check_chunk(start, stop):
+    # """Các finding của suất chiếu có id trong [start, stop); trả về (số suất chiếu, danh sách finding)"""
+    # Suất chiếu đã lưu trữ (booking/archive.py) không còn ghế: không kiểm tra
+    capacities = dict(ShowTime.objects.filter(id__gte=start, id__lt=stop, archived_at__isnull=True).values_list(
+        'id', 'screen__capacity'
+    ))
+    if not capacities:
+        return 0, []
+    findings = []
+
+    seat_counts = Seat.objects.filter(show_time_id__gte=start, show_time_id__lt=stop).values('show_time_id').annotate(
+        rows=Count('id'), taken=Count('id', filter=~Q(status='available')),
+    ).order_by()
+    counted = set()
+    for row in seat_counts:
+        show_time_id, capacity = row['show_time_id'], capacities.get(row['show_time_id'])
+        counted.add(show_time_id)
+        if capacity is None:
+            continue
+        if row['rows'] != capacity:
+            findings.append(_finding(show_time_id, 'seat_rows', capacity=capacity, seat_rows=row['rows']))
+        if row['taken'] > capacity:
+            findings.append(_finding(show_time_id, 'overbooked', capacity=capacity, taken=row['taken']))
+    for show_time_id, capacity in capacities.items():
+        if show_time_id not in counted and capacity:
+            findings.append(_finding(show_time_id, 'seat_rows', capacity=capacity, seat_rows=0))
+
+    # Liên kết ghế của các booking còn hiệu lực thuộc các suất chiếu trong khoảng
+    links = Booking.seats.through.objects.filter(
+        booking__show_time_id__gte=start, booking__show_time_id__lt=stop,
+        booking__payment_status__in=ACTIVE_STATUSES,
+    ).values_list('seat_id', 'booking__show_time_id', 'seat__show_time_id', 'seat__status')
+    holders = {}
+    by_show = {}
+    for seat_id, booking_show_time_id, seat_show_time_id, status in links:
+        holders[seat_id] = holders.get(seat_id, 0) + 1
+        show = by_show.setdefault(booking_show_time_id, {'double_sold': set(), 'sold_but_available': set(),
+                                                         'foreign_seat': set()})
+        if holders[seat_id] > 1:
+            show['double_sold'].add(seat_id)
+        if status == 'available':
+            show['sold_but_available'].add(seat_id)
+        if seat_show_time_id != booking_show_time_id:
+            show['foreign_seat'].add(seat_id)
+    for show_time_id, checks in sorted(by_show.items()):
+        for check, seat_ids in checks.items():
+            if seat_ids:
+                findings.append(_finding(show_time_id, check, seat_ids))
+
+    booked = Seat.objects.filter(
+        show_time_id__gte=start, show_time_id__lt=stop, status='booked',
+    ).exclude(id__in=Booking.seats.through.objects.filter(
+        seat__show_time_id__gte=start, seat__show_time_id__lt=stop, booking__payment_status__in=ACTIVE_STATUSES,
+    ).values('seat_id')).values_list('show_time_id', 'id')
+    orphaned = {}
+    for show_time_id, seat_id in booked:
+        orphaned.setdefault(show_time_id, set()).add(seat_id)
+    for show_time_id, seat_ids in sorted(orphaned.items()):
+        findings.append(_finding(show_time_id, 'orphaned', seat_ids))
+    return len(capacities), findings
+
+
+def mark_linked_seats_booked(start, stop):
+    # """Đánh dấu 'booked' các ghế còn trống nhưng thuộc booking còn hiệu lực; trả về số ghế đã sửa"""
+    seats = list(Seat.objects.filter(
+        show_time_id__gte=start, show_time_id__lt=stop, status='available',
+        id__in=Booking.seats.through.objects.filter(
+            seat__show_time_id__gte=start, seat__show_time_id__lt=stop, booking__payment_status__in=ACTIVE_STATUSES,
+        ).values('seat_id'),
+    ).values_list('id', 'show_time_id'))
+    if not seats:
+        return 0
+    Seat.objects.filter(id__in=[seat_id for seat_id, _ in seats], status='available').update(status='booked')
+    events.record_many(('seat', seat_id, show_time_id, 'status', 'available', 'booked') for seat_id, show_time_id in seats)
+    show_time_ids = {show_time_id for _, show_time_id in seats}
+
+    def invalidate_seatmaps():
+        for show_time_id in show_time_ids:
+            seatmap.invalidate(show_time_id)
+    transaction.on_commit(invalidate_seatmaps)
+    return len(seats)
+
+
+def create_missing_seats(show_time_ids):
+    """
+    Thêm các ghế còn thiếu so với capacity (không xóa ghế thừa); trả về số ghế đã thêm.
+    Chỉ sửa suất chiếu có tên ghế theo đúng cách đặt tên của seat_numbers(): ghế nhập
+    tay theo kiểu khác ("1".."80") thì không biết ghế nào thiếu, để người xử lý.
+    """
+    capacities = dict(ShowTime.objects.filter(id__in=show_time_ids).values_list('id', 'screen__capacity'))
+    existing = {}
+    for show_time_id, seat_number in Seat.objects.filter(show_time_id__in=show_time_ids).values_list(
+        'show_time_id', 'seat_number'
+    ):
+        existing.setdefault(show_time_id, set()).add(seat_number)
+    rows = []
+    for show_time_id, capacity in capacities.items():
+        names = existing.get(show_time_id, set())
+        expected = seat_numbers(capacity)
+        if not names <= set(expected):
+            continue
+        # Tên ghế là duy nhất trong suất chiếu và đều thuộc expected: số ghế thêm đúng bằng
+        # capacity - số ghế hiện có, không bao giờ vượt sức chứa
+        rows.extend((show_time_id, number) for number in expected if number not in names)
+    created = create_seats(rows)
+    for show_time_id in {show_time_id for show_time_id, _ in rows}:
+        transaction.on_commit(lambda show_time_id=show_time_id: seatmap.invalidate(show_time_id))
+    return created
+
+
+def fix_chunk(start, stop, findings):
+    # """Sửa các finding sửa được của khoảng [start, stop) trong một transaction; trả về số đã sửa theo loại"""
+    checks = {finding['check'] for finding in findings}
+    fixed = {}
+    with transaction.atomic():
+        # Kiểm tra lại ngay trong transaction: dữ liệu có thể đã đổi từ lúc đọc
+        if 'orphaned' in checks:
+            seat_ids = Seat.objects.filter(show_time_id__gte=start, show_time_id__lt=stop, status='booked')
+            fixed['orphaned'] = release_orphaned_seats(list(seat_ids.values_list('id', flat=True)))[1]
+        if 'sold_but_available' in checks:
+            fixed['sold_but_available'] = mark_linked_seats_booked(start, stop)
+        missing = [finding['show_time_id'] for finding in findings
+                   if finding['check'] == 'seat_rows' and finding['seat_rows'] < finding['capacity']]
+        if missing:
+            fixed['seat_rows'] = create_missing_seats(missing)
+    return fixed
+
+
+def _run_chunk(start, stop, fix):
+    try:
+        show_times, findings = check_chunk(start, stop)
+        fixed = fix_chunk(start, stop, findings) if fix and any(f['check'] in FIXABLE for f in findings) else {}
+        return show_times, findings, fixed
+    finally:
+        # Mỗi thread có kết nối riêng; đóng lại để không rò kết nối khi pool kết thúc
+        connection.close()
+
+
+def run(chunk_size=None, workers=None, fix=False, start=None):
+    """
+    Kiểm tra mọi suất chiếu (id >= start) theo từng khoảng chunk_size id, song
+    song trên `workers` thread. Trả về báo cáo dạng dict, ghi được ra JSON.
+    """
+    chunk_size = chunk_size or getattr(settings, 'INTEGRITY_CHUNK_SIZE', 200)
+    workers = workers or getattr(settings, 'INTEGRITY_WORKERS', 4)
+    started = time.perf_counter()
+    report = {
+        'started_at': timezone.now().isoformat(),
+        'fix': fix,
+        'show_times': 0,
+        'chunks': 0,
+        'counts': dict.fromkeys(CHECKS, 0),
+        'fixed': dict.fromkeys(FIXABLE, 0),
+        'findings': [],
+    }
+    bounds = ShowTime.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['high'] is not None:
+        low = max(bounds['low'], start or 0)
+        ranges = [(first, first + chunk_size) for first in range(low, bounds['high'] + 1, chunk_size)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for show_times, findings, fixed in pool.map(lambda chunk: _run_chunk(*chunk, fix), ranges):
+                report['chunks'] += 1
+                report['show_times'] += show_times
+                report['findings'].extend(findings)
+                for finding in findings:
+                    report['counts'][finding['check']] += 1
+                for check, count in fixed.items():
+                    report['fixed'][check] += count
+    report['elapsed'] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking import archive
+
+
+class Command(BaseCommand):
+    help = ('Chuyển ghế, booking và thanh toán của các suất chiếu cũ sang bảng lưu trữ theo lô; '
+            'bị dừng giữa chừng thì lần chạy sau làm tiếp từ offset đã lưu')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Lưu trữ suất chiếu cũ hơn N ngày (mặc định ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Số suất chiếu mỗi lô (mặc định ARCHIVE_CHUNK_SIZE)')
+        parser.add_argument('--max-chunks', type=int, default=None,
+                            help='Dừng sau N lô (giới hạn thời gian chạy hằng đêm)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = archive.archive(options['days'], options['chunk_size'], options['max_chunks'])
+        status = 'xong' if result['done'] else 'chưa xong, chạy lại để làm tiếp'
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã lưu trữ {result['show_times']} suất chiếu trong {result['chunks']} lô: {result['bookings']} booking, "
+            f"{result['payments']} thanh toán, xóa {result['seats']} ghế ({status}, "
+            f"{time.perf_counter() - started:.1f}s)"
+        ))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from booking.models import Booking
+from booking.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = 'Dựng lại bảng tổng hợp doanh số DailySales từ dữ liệu Booking/Payment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=parse_date, help='Ngày bắt đầu (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end', type=parse_date, help='Ngày kết thúc (YYYY-MM-DD)')
+        parser.add_argument('--chunk-days', type=int, default=31)
+
+    def handle(self, *args, **options):
+        bounds = Booking.objects.aggregate(first=Min('booking_date'), last=Max('booking_date'))
+        if bounds['first'] is None:
+            self.stdout.write('Chưa có booking nào')
+            return
+        start = options['start'] or timezone.localdate(bounds['first'])
+        end = options['end'] or timezone.localdate(bounds['last'])
+        if start > end:
+            raise CommandError('--from phải trước --to')
+
+        started = time.perf_counter()
+        written = backfill(start, end, options['chunk_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{start} -> {end}: {written} dòng DailySales ({time.perf_counter() - started:.2f}s)'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking import backup
+
+
+class Command(BaseCommand):
+    help = ('Sao lưu db.sqlite3 khi hệ thống đang chạy (backup API của SQLite, chép từng đợt trang), '
+            'kiểm tra integrity_check trong process riêng và nén gzip vào BACKUP_DIR')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=None, help='Số trang mỗi bước (mặc định BACKUP_PAGES_PER_STEP)')
+        parser.add_argument('--sleep', type=float, default=None, help='Số giây nghỉ giữa các bước (mặc định BACKUP_STEP_SLEEP)')
+        parser.add_argument('--keep', type=int, default=None, help='Số bản giữ lại (mặc định BACKUP_KEEP)')
+        parser.add_argument('--no-verify', action='store_true', help='Bỏ qua integrity_check')
+
+    def handle(self, *args, **options):
+        try:
+            result = backup.backup(pages=options['pages'], sleep=options['sleep'], check=not options['no_verify'])
+        except backup.BackupError as e:
+            raise CommandError(str(e))
+        removed = backup.prune(options['keep'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã sao lưu vào {result['path']} ({result['size'] / 1024 / 1024:.1f} MB, "
+            f"{'đã kiểm tra' if result['verified'] else 'chưa kiểm tra'}, chép lại {result['restarts']} lần); "
+            f"xóa {removed} bản cũ"
+        ))
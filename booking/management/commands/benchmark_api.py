@@ -0,0 +1,64 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from booking.models import Booking, Movie, ShowTime
+
+
+class Command(BaseCommand):
+    help = 'Đo độ trễ (p50/p95/p99) và số truy vấn của từng endpoint API JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        movie = Movie.objects.filter(is_active=True, show_times__isnull=False).first()
+        show_time = ShowTime.objects.filter(seats__isnull=False).first()
+        booking = Booking.objects.select_related('user').first()
+        if not (movie and show_time and booking):
+            raise CommandError('Cần có sẵn phim, suất chiếu, ghế và booking trong database')
+
+        endpoints = [
+            ('movies', '/api/movies/', False),
+            ('movies (fields=id,title)', '/api/movies/?fields=id,title', False),
+            ('movie', f'/api/movies/{movie.id}/', False),
+            ('search', f'/api/search/?q={movie.title[:3]}', False),
+            ('showtimes', f'/api/movies/{movie.id}/showtimes/', False),
+            ('seats', f'/api/showtimes/{show_time.id}/seats/', False),
+            ('bookings', '/api/bookings/', True),
+            ('payments', '/api/payments/', True),
+        ]
+
+        client = Client()
+        client.force_login(booking.user)
+        hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+        with override_settings(RATELIMIT_ENABLE=False, ALLOWED_HOSTS=hosts):
+            self.stdout.write(f'{"endpoint":<28}{"p50":>9}{"p95":>9}{"p99":>9}{"queries":>9}')
+            for name, url, _ in endpoints:
+                # Đếm bằng execute_wrapper vì queries_log bị reset ở mỗi request_started
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *a: queries.append(sql) or execute(sql, *a)):
+                    response = client.get(url)
+                if response.status_code != 200:
+                    self.stderr.write(f'{name}: HTTP {response.status_code}')
+                    continue
+                timings = []
+                for _ in range(options['requests']):
+                    start = time.perf_counter()
+                    client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p = lambda q: timings[min(len(timings) - 1, int(len(timings) * q))]
+                self.stdout.write(
+                    f'{name:<28}{statistics.median(timings):>7.2f}ms{p(0.95):>7.2f}ms'
+                    f'{p(0.99):>7.2f}ms{len(queries):>9}'
+                )
+
+                etag = response['ETag']
+                not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                if not_modified.status_code != 304:
+                    self.stderr.write(f'{name}: ETag không khớp')
@@ -0,0 +1,52 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from booking.ratelimit import ratelimit
+
+BENCH_POLICIES = {
+    'bench': {'rate': '1000000000/m', 'key': 'user_or_ip', 'methods': ['GET']},
+}
+
+
+class Command(BaseCommand):
+    help = 'Đo chi phí (µs/request) của decorator rate limit trên cache cục bộ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50000)
+        parser.add_argument('--clients', type=int, default=1000,
+                            help='Số IP khác nhau gửi request')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        factory = RequestFactory()
+        requests = []
+        for i in range(options['clients']):
+            request = factory.get('/get-seats/1/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}')
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        def view(request):
+            return HttpResponse()
+
+        limited_view = ratelimit('bench')(view)
+
+        with override_settings(RATELIMIT_POLICIES=BENCH_POLICIES, RATELIMIT_ENABLE=True):
+            baseline = self._run(view, requests, total)
+            limited = self._run(limited_view, requests, total)
+
+        overhead = (limited - baseline) / total * 1e6
+        self.stdout.write(f'Requests: {total} từ {len(requests)} client')
+        self.stdout.write(f'Không giới hạn: {baseline / total * 1e6:.2f} µs/request')
+        self.stdout.write(f'Có rate limit:  {limited / total * 1e6:.2f} µs/request')
+        self.stdout.write(self.style.SUCCESS(f'Chi phí rate limit: {overhead:.2f} µs/request'))
+
+    def _run(self, view, requests, total):
+        count = len(requests)
+        start = time.perf_counter()
+        for i in range(total):
+            view(requests[i % count])
+        return time.perf_counter() - start
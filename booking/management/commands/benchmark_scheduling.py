@@ -0,0 +1,52 @@
+from datetime import date, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from booking.models import Cinema, Genre, Movie, Screen
+from booking.scheduling import create_schedule
+
+
+class Command(BaseCommand):
+    help = 'Đo thông lượng lên lịch chiếu hàng loạt (dữ liệu tạm, rollback sau khi đo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--screens', type=int, default=8)
+        parser.add_argument('--capacity', type=int, default=120)
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--slots', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            genre = Genre.objects.create(name='__benchmark__')
+            movie = Movie.objects.create(
+                title='Benchmark', description='', duration=120, release_date=date.today(),
+                genre=genre, rating=0, price=90000,
+            )
+            cinema = Cinema.objects.create(name='Benchmark', address='', phone='')
+            screens = [
+                Screen.objects.create(name=f'P{i + 1}', cinema=cinema, capacity=options['capacity'])
+                for i in range(options['screens'])
+            ]
+            # Các suất cách nhau 2 tiếng 30 phút, bắt đầu từ 9:00
+            times = [time(9 + (i * 150) // 60, (i * 150) % 60) for i in range(options['slots'])]
+            start_date = date.today() + timedelta(days=1)
+            end_date = start_date + timedelta(days=options['days'] - 1)
+
+            result = create_schedule(movie, screens, start_date, end_date, times,
+                                     movie.price, buffer_minutes=15)
+            transaction.set_rollback(True)
+
+        if result['conflicts']:
+            self.stderr.write(f"Trùng lịch: {len(result['conflicts'])} suất")
+            return
+        elapsed = result['elapsed']
+        self.stdout.write(
+            f"{options['screens']} phòng x {options['days']} ngày x {options['slots']} suất/ngày"
+        )
+        self.stdout.write(f"Đã tạo {result['show_times']} suất chiếu, {result['seats']} ghế "
+                          f"trong {elapsed:.2f} giây")
+        self.stdout.write(self.style.SUCCESS(
+            f"Thông lượng: {result['show_times'] / elapsed:.0f} suất/giây, "
+            f"{result['seats'] / elapsed:.0f} ghế/giây"
+        ))
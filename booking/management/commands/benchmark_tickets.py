@@ -0,0 +1,40 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from booking.tickets import make_token, verify_tokens
+
+
+class Command(BaseCommand):
+    help = 'Đo tốc độ kiểm tra chữ ký mã vé offline (số vé/giây)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=100000)
+        parser.add_argument('--batch', type=int, default=500,
+                            help='Số vé mỗi lần đồng bộ từ máy quét')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        today = date.today()
+        tokens = [
+            make_token(rng.randrange(1, 10 ** 7), rng.randrange(1, 10 ** 9),
+                       rng.randrange(1, 10 ** 6), today + timedelta(days=rng.randrange(30)))
+            for _ in range(options['tokens'])
+        ]
+        # 1% vé bị sửa để đo cả nhánh từ chối
+        for i in range(0, len(tokens), 100):
+            tokens[i] = tokens[i][:-2] + ('AA' if tokens[i][-2:] != 'AA' else 'BB')
+
+        batch = options['batch']
+        start = time.perf_counter()
+        valid = 0
+        for i in range(0, len(tokens), batch):
+            valid += sum(1 for claims in verify_tokens(tokens[i:i + batch]) if claims)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'Vé hợp lệ: {valid}/{len(tokens)} (lô {batch} vé)')
+        self.stdout.write(f'Thời gian: {elapsed:.3f} giây, '
+                          f'{elapsed / len(tokens) * 1e6:.2f} µs/vé')
+        self.stdout.write(self.style.SUCCESS(f'Thông lượng: {len(tokens) / elapsed:.0f} vé/giây'))
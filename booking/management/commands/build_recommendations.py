@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from booking.recommendations import TOP_K, build_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Tính bảng gợi ý phim tương tự từ lịch sử đặt vé và đánh giá (chạy hằng đêm)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Tính lại toàn bộ thay vì chỉ các phim có tương tác mới')
+        parser.add_argument('--since', type=parse_datetime,
+                            help='Mốc thời gian cho chế độ incremental (mặc định: lần chạy trước)')
+        parser.add_argument('--top-k', type=int, default=TOP_K)
+
+    def handle(self, *args, **options):
+        result = build_recommendations(full=options['full'], since=options['since'], top_k=options['top_k'])
+        mode = 'full' if result['full'] else 'incremental'
+        self.stdout.write(self.style.SUCCESS(
+            f"[{mode}] {result['users']} người dùng, {result['movies']} phim, "
+            f"{result['rows']} gợi ý trong {result['elapsed']:.2f}s"
+        ))
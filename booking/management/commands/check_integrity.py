@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from booking import integrity
+
+
+class Command(BaseCommand):
+    help = ('Kiểm tra sức chứa, số ghế, ghế đã bán và liên kết booking-ghế của mọi suất chiếu; '
+            'in báo cáo JSON (chạy hằng đêm, --fix để sửa các lỗi sửa được)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Số id suất chiếu mỗi khoảng (mặc định INTEGRITY_CHUNK_SIZE)')
+        parser.add_argument('--workers', type=int, default=None, help='Số thread (mặc định INTEGRITY_WORKERS)')
+        parser.add_argument('--start', type=int, default=None, help='Bắt đầu từ id suất chiếu này')
+        parser.add_argument('--fix', action='store_true',
+                            help=f'Sửa các lỗi: {", ".join(integrity.FIXABLE)}')
+        parser.add_argument('--output', default=None, help='Ghi báo cáo JSON ra file thay vì stdout')
+
+    def handle(self, *args, **options):
+        report = integrity.run(options['chunk_size'], options['workers'], options['fix'], options['start'])
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(content)
+            summary = ', '.join(f'{check} {count}' for check, count in report['counts'].items() if count) or 'không có lỗi'
+            self.stdout.write(self.style.SUCCESS(
+                f"Đã kiểm tra {report['show_times']} suất chiếu ({report['elapsed']}s): {summary}"
+            ))
+        else:
+            self.stdout.write(content)
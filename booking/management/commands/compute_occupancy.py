@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.analytics import compute_occupancy
+
+
+class Command(BaseCommand):
+    help = 'Tính bản đồ lấp đầy ghế và tải theo giờ trong tuần cho từng phòng chiếu'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help='Số ngày lịch sử (mặc định 365)')
+        parser.add_argument('--screen', type=int, nargs='*', help='Chỉ tính các phòng này')
+
+    def handle(self, *args, **options):
+        end = timezone.localdate()
+        start = end - timedelta(days=options['days'] - 1)
+        result = compute_occupancy(start, end, options['screen'] or None)
+        self.stdout.write(self.style.SUCCESS(
+            f"{start} -> {end}: {result['screens']} phòng, {result['show_times']} suất chiếu, "
+            f"{result['tickets']} vé ({result['elapsed']:.2f}s)"
+        ))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking import events
+
+
+class Command(BaseCommand):
+    help = 'Chạy consumer đọc nhật ký sự kiện từ offset đã lưu (chạy định kỳ bằng cron hoặc --interval)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumer', nargs='?', help=f'Một trong: {", ".join(events.CONSUMERS)}')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Chạy lặp lại mỗi N giây thay vì chạy một lần')
+        parser.add_argument('--prune', action='store_true',
+                            help='Xóa các ngày cũ hơn EVENT_LOG_RETENTION_DAYS')
+
+    def handle(self, *args, **options):
+        name = options['consumer']
+        if name is None and not options['prune']:
+            raise CommandError('Cần tên consumer hoặc --prune')
+        if name is not None and name not in events.CONSUMERS:
+            raise CommandError(f'Không có consumer "{name}"')
+
+        if options['prune']:
+            self.stdout.write(f'Đã xóa {events.prune()} sự kiện cũ')
+        if name is None:
+            return
+
+        handler = events.CONSUMERS[name]
+        while True:
+            total = 0
+            while True:
+                count = events.consume(name, handler, options['batch_size'])
+                if not count:
+                    break
+                total += count
+            if total:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{name}: đã xử lý {total} sự kiện, offset {events.get_offset(name)}'
+                ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
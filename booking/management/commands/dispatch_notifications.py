@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking.notifications import dispatch
+
+
+class Command(BaseCommand):
+    help = 'Gửi các thông báo đang chờ trong outbox (chạy định kỳ bằng cron hoặc --interval)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Chạy lặp lại mỗi N giây thay vì chạy một lần')
+
+    def handle(self, *args, **options):
+        while True:
+            # Gửi hết các lô đang tới hạn rồi mới nghỉ
+            while True:
+                result = dispatch(options['batch_size'])
+                if not result['claimed']:
+                    break
+                self.stdout.write(self.style.SUCCESS(
+                    f"Đã gửi {result['sent']}/{result['claimed']} thông báo, thử lại sau {result['retry']}, "
+                    f"lỗi {result['failed']}, bỏ qua {result['skipped']} ({result['elapsed']:.2f}s)"
+                ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.models import Booking
+from booking.services import MAX_TRANSITION_BATCH, transition_bookings
+
+
+class Command(BaseCommand):
+    help = 'Chuyển các booking quá hạn thanh toán sang "Hết hạn" và trả ghế (chạy định kỳ bằng cron hoặc --interval)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Chạy lặp lại mỗi N giây thay vì chạy một lần')
+
+    def handle(self, *args, **options):
+        while True:
+            expired = 0
+            # Mỗi lô một transaction; booking vừa được thanh toán giữa chừng bị UPDATE có điều kiện bỏ qua
+            while True:
+                ids = list(
+                    Booking.objects.filter(payment_status__in=['pending', 'processing'], expiry_date__lt=timezone.now())
+                    .order_by('expiry_date').values_list('id', flat=True)[:MAX_TRANSITION_BATCH]
+                )
+                if not ids:
+                    break
+                results = transition_bookings(ids, 'expired')
+                expired += sum(1 for result in results if result['success'])
+                if len(ids) < MAX_TRANSITION_BATCH:
+                    break
+            if expired:
+                self.stdout.write(self.style.SUCCESS(f'Đã chuyển {expired} booking sang hết hạn'))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,243 @@
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import time as time_of_day, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from booking import backup, seatmap, waiting_room
+from booking.models import Booking, Movie, Screen, Seat, ShowTime
+from booking.scheduling import create_seats, seat_numbers
+
+USERNAME_PREFIX = 'loadtest_wr_'
+MAX_POLL_INTERVAL = 10
+
+
+class Command(BaseCommand):
+    help = ('Mô phỏng đợt mở bán trên bản sao tạm của database: N người cùng vào trang chọn ghế và giữ '
+            'ghế, lần lượt không có và có phòng chờ; in p50/p99 và số lỗi theo loại request')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--rate', type=int, default=600, help='admission_rate (người/phút) khi bật phòng chờ')
+        parser.add_argument('--burst', type=int, default=None,
+                            help='Số người được vào ngay khi mở (mặc định: số người được vào trong 1 giây)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Số giây tối thiểu giữa hai lần hỏi vị trí')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Số process chia nhau người dùng (như nhiều worker); >1 cần cache dùng chung')
+
+    def handle(self, *args, **options):
+        if options['processes'] > 1 and not waiting_room.shared_cache():
+            raise CommandError('Nhiều process cần cache dùng chung cho hàng đợi: đặt REDIS_URL')
+        users = options['users']
+        per_second = max(options['rate'] // 60, 1)
+        burst = options['burst'] if options['burst'] is not None else per_second
+        self.stdout.write(
+            f'{users} người (mỗi người một luồng, chia cho {options["processes"]} process) cùng vào; phòng chờ '
+            f'{options["rate"]} người/phút (burst {burst}) -> đợt dồn gấp {users / per_second:.0f} lần '
+            f'số người được vào mỗi giây'
+        )
+
+        with self._throwaway_database():
+            screen = Screen.objects.filter(capacity__gt=0).first()
+            movie = Movie.objects.first()
+            if screen is None or movie is None:
+                raise CommandError('Cần có sẵn ít nhất một phim và một phòng chiếu')
+            show_time = self._create_show_time(movie, screen)
+            accounts = [User.objects.create_user(f'{USERNAME_PREFIX}{i}', password=None) for i in range(users)]
+            hosts = list(settings.ALLOWED_HOSTS) + ['testserver']
+            try:
+                # Session ký trong cookie: không ghi session của người dùng ảo vào cache dùng chung
+                with override_settings(RATELIMIT_ENABLE=False, ALLOWED_HOSTS=hosts, WAITING_ROOM_BURST=burst,
+                                       SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'):
+                    self._report('Không có phòng chờ', self._run(show_time, accounts, options, queued=False))
+                    self._reset(show_time)
+                    ShowTime.objects.filter(id=show_time.id).update(admission_rate=options['rate'])
+                    waiting_room.reset(show_time.id)
+                    self._report('Có phòng chờ', self._run(show_time, accounts, options, queued=True))
+            finally:
+                # Database tạm bị xóa; chỉ còn phải dọn khóa của suất chiếu tạm trong cache
+                waiting_room.reset(show_time.id)
+                seatmap.invalidate(show_time.id)
+
+    @contextmanager
+    def _throwaway_database(self):
+        # Chạy trên bản sao tạm: người dùng, suất chiếu và booking ảo không vào database thật
+        database = connections.settings['default']
+        source = database['NAME']
+        handle, path = tempfile.mkstemp(prefix='loadtest-', suffix='.sqlite3')
+        os.close(handle)
+        backup.copy_database(source, path)
+        connections.close_all()
+        database['NAME'] = path
+        try:
+            yield
+        finally:
+            connections.close_all()
+            database['NAME'] = source
+            os.unlink(path)
+
+    def _create_show_time(self, movie, screen):
+        # Suất chiếu tạm ở xa trong tương lai để không đụng lịch có sẵn
+        with transaction.atomic():
+            show_time = ShowTime.objects.create(
+                movie=movie, screen=screen, date=timezone.localdate() + timedelta(days=3650),
+                time=time_of_day(23, 59), price=100000,
+            )
+            create_seats((show_time.id, number) for number in seat_numbers(screen.capacity))
+        return show_time
+
+    def _reset(self, show_time):
+        Booking.objects.filter(show_time=show_time).delete()
+        Seat.objects.filter(show_time=show_time).update(status='available')
+        seatmap.invalidate(show_time.id)
+
+    def _run(self, show_time, accounts, options, queued):
+        # Mỗi process một phần người dùng, cùng bắt đầu sau một barrier chung
+        processes = options['processes']
+        shares = [list(enumerate(accounts))[k::processes] for k in range(processes)]
+        context = multiprocessing.get_context('fork')
+        gate = context.Barrier(processes)
+        results = context.Queue()
+        # Không để process con dùng chung kết nối database đã mở của process cha
+        connections.close_all()
+        workers = [
+            context.Process(target=self._worker, args=(show_time, share, options, queued, gate, results))
+            for share in shares
+        ]
+        for worker in workers:
+            worker.start()
+        parts = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+        merged = {'timings': defaultdict(list), 'errors': defaultdict(int), 'conflicts': defaultdict(int)}
+        for part in parts:
+            for name, values in merged.items():
+                for kind, value in part[name].items():
+                    values[kind] += value
+        merged['started'] = min(part['started'] for part in parts)
+        merged['elapsed'] = max(part['finished'] for part in parts) - merged['started']
+        # Lúc người cuối cùng nhận được số thứ tự: từ đó không còn đợt dồn lúc mở bán
+        merged['joined'] = max((part['joined'] for part in parts if part['joined']), default=None)
+        merged['booked'] = Booking.objects.filter(show_time=show_time).count()
+        return merged
+
+    def _worker(self, show_time, share, options, queued, gate, results):
+        seat_ids = list(Seat.objects.filter(show_time=show_time).order_by('id').values_list('id', flat=True))
+        seats_url = reverse('booking_seats', args=[show_time.id])
+        queue_url = reverse('api_queue', args=[show_time.id])
+        book_url = reverse('api_bookings')
+        poll_interval = options['poll_interval']
+
+        timings = defaultdict(list)
+        joined = []
+        errors = defaultdict(int)
+        conflicts = defaultdict(int)
+        lock = threading.Lock()
+        ready = threading.Barrier(len(share) + 1)
+        go = threading.Event()
+
+        def request(client, kind, method, url, data=None):
+            sent = time.time()
+            start = time.perf_counter()
+            try:
+                response = getattr(client, method)(url, data or {})
+            except Exception:
+                response = None
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                timings[kind].append((sent, elapsed))
+                if response is None or response.status_code >= 500:
+                    errors[kind] += 1
+                elif response.status_code == 409:
+                    conflicts[kind] += 1
+            return response
+
+        def visit(i, client):
+            first = True
+            ready.wait()
+            # Mọi người dùng bấm cùng lúc khi mở bán
+            go.wait()
+            while queued:
+                response = request(client, 'queue', 'get', queue_url)
+                if response is None or response.status_code != 200:
+                    time.sleep(poll_interval)
+                    continue
+                if first:
+                    first = False
+                    with lock:
+                        joined.append(time.time())
+                payload = response.json()
+                if payload['admitted']:
+                    break
+                # Giống trang phòng chờ: còn xa thì hỏi thưa hơn, lệch ngẫu nhiên ±25%
+                delay = min(max(payload['eta_seconds'] / 2, poll_interval), MAX_POLL_INTERVAL)
+                time.sleep(delay * random.uniform(0.75, 1.25))
+            request(client, 'seats', 'get', seats_url)
+            request(client, 'book', 'post', book_url, {
+                'show_time_id': show_time.id, 'seats': seat_ids[i % len(seat_ids)],
+            })
+            close_old_connections()
+
+        # Đăng nhập tuần tự trước (ghi last_login): 500 luồng cùng ghi sẽ chờ khóa SQLite quá timeout
+        clients = []
+        for i, account in share:
+            client = Client(raise_request_exception=False)
+            client.force_login(account)
+            clients.append((i, client))
+        close_old_connections()
+        threads = [threading.Thread(target=visit, args=(i, client)) for i, client in clients]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        gate.wait()
+        started = time.time()
+        go.set()
+        for thread in threads:
+            thread.join()
+        connections.close_all()
+        results.put({
+            'started': started,
+            'finished': time.time(),
+            'joined': max(joined, default=None),
+            'timings': dict(timings),
+            'errors': dict(errors),
+            'conflicts': dict(conflicts),
+        })
+
+    def _report(self, title, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{title}: {result["elapsed"]:.1f}s, {result["booked"]} booking thành công'
+        ))
+        self._table(result, lambda sent: True)
+        if result['joined']:
+            # Tách riêng đợt dồn lúc mở bán (mọi người cùng bốc số) khỏi giai đoạn hàng đợi chạy đều
+            self.stdout.write(
+                f'Request gửi sau khi người cuối cùng bốc số (giây thứ {result["joined"] - result["started"]:.1f}):'
+            )
+            self._table(result, lambda sent: sent >= result['joined'])
+
+    def _table(self, result, include):
+        self.stdout.write(f'{"request":<10}{"số lượng":>10}{"p50":>11}{"p99":>11}{"lỗi 5xx":>10}{"409":>7}')
+        for kind in ('queue', 'seats', 'book'):
+            timings = sorted(elapsed for sent, elapsed in result['timings'].get(kind, []) if include(sent))
+            if not timings:
+                continue
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'{kind:<10}{len(timings):>10}{statistics.median(timings):>9.1f}ms{p99:>9.1f}ms'
+                f'{result["errors"][kind]:>10}{result["conflicts"][kind]:>7}'
+            )
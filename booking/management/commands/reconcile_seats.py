@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from booking.models import Seat
+from booking.services import reconcile_seats
+
+
+class Command(BaseCommand):
+    help = ('Tìm và trả lại các ghế "Đã đặt" không thuộc booking nào còn hiệu lực. '
+            'Duyệt bảng ghế theo từng khoảng id, mỗi khoảng một transaction ngắn')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Số id ghế mỗi khoảng (mặc định SEAT_RECONCILE_CHUNK_SIZE)')
+        parser.add_argument('--start', type=int, default=None, help='Bắt đầu từ id ghế này (chạy tiếp sau khi bị dừng)')
+        parser.add_argument('--dry-run', action='store_true', help='Chỉ đếm, không sửa')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size'] or getattr(settings, 'SEAT_RECONCILE_CHUNK_SIZE', 5000)
+        bounds = Seat.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['high'] is None:
+            self.stdout.write('Không có ghế')
+            return
+        start = options['start'] if options['start'] is not None else bounds['low']
+        started = time.perf_counter()
+        checked = orphaned = 0
+        # Khoảng id cố định thay vì LIMIT: mỗi transaction làm lượng việc như nhau dù ghế đã đặt dày hay thưa
+        while start <= bounds['high']:
+            stop = start + chunk_size
+            chunk_checked, chunk_orphaned = reconcile_seats(start, stop, dry_run=options['dry_run'])
+            checked += chunk_checked
+            orphaned += chunk_orphaned
+            if chunk_orphaned:
+                self.stdout.write(f'id {start}-{stop - 1}: {chunk_orphaned} ghế mồ côi')
+            start = stop
+
+        action = 'tìm thấy' if options['dry_run'] else 'đã trả lại'
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã xét {checked} ghế đã đặt, {action} {orphaned} ghế mồ côi ({time.perf_counter() - started:.1f}s)'
+        ))
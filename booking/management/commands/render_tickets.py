@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking.models import Booking
+from booking.ticket_render import render_bookings
+
+
+class Command(BaseCommand):
+    help = 'Render trước vé PDF/PNG của các booking đã thanh toán (dùng process pool)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--booking', type=int, nargs='*', help='Chỉ render các booking này')
+        parser.add_argument('--days', type=int, default=1,
+                            help='Booking có suất chiếu trong N ngày tới (mặc định 1)')
+        parser.add_argument('--format', choices=['pdf', 'png'], nargs='*', default=['pdf', 'png'])
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--chunk', type=int, default=500)
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.filter(payment_status='paid').select_related(
+            'show_time__movie', 'show_time__screen__cinema', 'payment'
+        ).prefetch_related('seats').order_by('id')
+        if options['booking']:
+            bookings = bookings.filter(id__in=options['booking'])
+        else:
+            today = timezone.localdate()
+            bookings = bookings.filter(
+                show_time__date__range=(today, today + timedelta(days=options['days']))
+            )
+
+        start = time.perf_counter()
+        rendered = 0
+        last_id = 0
+        while True:
+            chunk = list(bookings.filter(id__gt=last_id)[:options['chunk']])
+            if not chunk:
+                break
+            rendered += render_bookings(chunk, options['format'], options['workers'])
+            last_id = chunk[-1].id
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã render {rendered} file vé trong {elapsed:.2f} giây'
+        ))
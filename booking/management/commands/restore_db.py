@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from booking import backup
+
+
+class Command(BaseCommand):
+    help = ('Khôi phục database từ một bản sao lưu: chỉ định file, hoặc --at để lấy bản gần nhất '
+            'trước thời điểm đó. Database hiện tại được sao lưu thành pre-restore-* trước khi ghi đè')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='File .sqlite3.gz (mặc định: bản mới nhất)')
+        parser.add_argument('--at', default=None, help='Thời điểm, VD "2026-10-18 23:00" (giờ địa phương)')
+        parser.add_argument('--list', action='store_true', help='Liệt kê các bản sao lưu rồi thoát')
+        parser.add_argument('--no-verify', action='store_true', help='Bỏ qua integrity_check')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Không hỏi xác nhận')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for taken_at, path in backup.list_backups():
+                self.stdout.write(f'{taken_at:%Y-%m-%d %H:%M:%S}  {path.stat().st_size / 1024 / 1024:>8.1f} MB  {path}')
+            return
+
+        at = None
+        if options['at']:
+            at = parse_datetime(options['at'])
+            if at is None:
+                raise CommandError('--at không đúng định dạng ngày giờ')
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+        try:
+            path = options['path'] or backup.find_backup(at)
+        except backup.BackupError as e:
+            raise CommandError(str(e))
+
+        if options['interactive']:
+            answer = input(f'Ghi đè {backup.database_path()} bằng {path}? Gõ "yes" để tiếp tục: ')
+            if answer != 'yes':
+                raise CommandError('Đã hủy khôi phục')
+        try:
+            safety = backup.restore(path, check=not options['no_verify'])
+        except backup.BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'Đã khôi phục từ {path}. Database trước đó được lưu ở {safety}. '
+            'Khởi động lại các process web để bỏ cache trong bộ nhớ.'
+        ))
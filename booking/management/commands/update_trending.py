@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = 'Cập nhật điểm xu hướng của phim (chạy định kỳ bằng cron hoặc --interval)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Chạy lặp lại mỗi N giây thay vì chạy một lần')
+
+    def handle(self, *args, **options):
+        while True:
+            result = update_trending()
+            if result['skipped']:
+                self.stdout.write('Đã cập nhật tới giờ hiện tại, bỏ qua')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{result['start']:%Y-%m-%d %H:%M} -> {result['end']:%Y-%m-%d %H:%M}: "
+                    f"{result['movies']} phim có hoạt động mới ({result['elapsed']:.2f}s)"
+                ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
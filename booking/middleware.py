@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.middleware import SessionMiddleware
+
+
+class LeanSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware không ghi session cho khách vãng lai xem catalog"""
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if (
+            session is not None
+            and session.accessed
+            and request.method in self.SAFE_METHODS
+            and not settings.SESSION_SAVE_EVERY_REQUEST
+            and SESSION_KEY not in session
+        ):
+            # Khách chưa đăng nhập: không tạo/cập nhật bản ghi session nào
+            session.modified = False
+        return super().process_response(request, response)
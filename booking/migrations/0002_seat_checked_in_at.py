@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seat',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, help_text='Thời điểm soát vé tại cửa', null=True),
+        ),
+    ]
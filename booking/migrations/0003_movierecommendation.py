@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_seat_checked_in_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='booking.movie')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='booking.movie')),
+            ],
+            options={
+                'verbose_name': 'Gợi ý phim',
+                'verbose_name_plural': 'Gợi ý phim',
+                'ordering': ['movie', '-score'],
+                'unique_together': {('movie', 'recommended')},
+            },
+        ),
+    ]
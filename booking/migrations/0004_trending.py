@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_movierecommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='trending_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0, editable=False, help_text='Điểm xu hướng (lệnh update_trending)'),
+        ),
+        migrations.CreateModel(
+            name='MovieActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Đầu giờ của khoảng thống kê')),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to='booking.movie')),
+            ],
+            options={
+                'verbose_name': 'Hoạt động phim theo giờ',
+                'verbose_name_plural': 'Hoạt động phim theo giờ',
+                'indexes': [models.Index(fields=['bucket'], name='booking_mov_bucket_876d1a_idx')],
+                'unique_together': {('movie', 'bucket')},
+            },
+        ),
+    ]
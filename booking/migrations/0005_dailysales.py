@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0004_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_method', models.CharField(blank=True, help_text='Để trống nếu chưa chọn phương thức', max_length=20)),
+                ('bookings', models.PositiveIntegerField(default=0, help_text='Số đơn (mọi trạng thái)')),
+                ('paid_bookings', models.PositiveIntegerField(default=0)),
+                ('tickets', models.PositiveIntegerField(default=0, help_text='Số vé đã thanh toán')),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('refunded_bookings', models.PositiveIntegerField(default=0)),
+                ('refunds', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('cinema', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='booking.cinema')),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='booking.movie')),
+                ('screen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='booking.screen')),
+                ('show_time', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='booking.showtime')),
+            ],
+            options={
+                'verbose_name': 'Doanh số theo ngày',
+                'verbose_name_plural': 'Doanh số theo ngày',
+                'ordering': ['-date', 'show_time'],
+                'indexes': [models.Index(fields=['movie', 'date'], name='booking_dai_movie_i_3ef226_idx'), models.Index(fields=['cinema', 'date'], name='booking_dai_cinema__1b8464_idx')],
+                'unique_together': {('date', 'show_time', 'payment_method')},
+            },
+        ),
+    ]
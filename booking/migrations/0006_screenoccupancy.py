@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_dailysales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreenOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('period_end', models.DateField()),
+                ('show_times', models.PositiveIntegerField(default=0, help_text='Số suất chiếu trong kỳ')),
+                ('rows', models.PositiveSmallIntegerField(default=0)),
+                ('cols', models.PositiveSmallIntegerField(default=0)),
+                ('seat_sales', models.BinaryField(help_text='Số lần bán của từng ghế, theo hàng (rows x cols)')),
+                ('hour_sold', models.BinaryField(help_text='Số vé bán theo giờ trong tuần (7 x 24)')),
+                ('hour_capacity', models.BinaryField(help_text='Số ghế mở bán theo giờ trong tuần (7 x 24)')),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('screen', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='booking.screen')),
+            ],
+            options={
+                'verbose_name': 'Tỉ lệ lấp đầy phòng chiếu',
+                'verbose_name_plural': 'Tỉ lệ lấp đầy phòng chiếu',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:03
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_screenoccupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('seat_type', 'Loại ghế (theo hàng)'), ('time', 'Ngày/giờ chiếu'), ('occupancy', 'Theo tỉ lệ lấp đầy'), ('early_bird', 'Đặt sớm')], max_length=20)),
+                ('rows', models.CharField(blank=True, help_text='Các hàng ghế, cách nhau bởi dấu phẩy. VD: G,H', max_length=200)),
+                ('weekdays', models.CharField(blank=True, help_text='0 = Thứ Hai ... 6 = Chủ nhật. VD: 5,6', max_length=20)),
+                ('start_time', models.TimeField(blank=True, help_text='Suất chiếu bắt đầu từ giờ này', null=True)),
+                ('end_time', models.TimeField(blank=True, help_text='... đến trước giờ này (có thể qua nửa đêm)', null=True)),
+                ('min_occupancy', models.DecimalField(blank=True, decimal_places=2, help_text='Áp dụng khi tỉ lệ ghế đã bán từ mức này. VD: 0.80', max_digits=3, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)])),
+                ('min_days_before', models.PositiveIntegerField(blank=True, help_text='Đặt trước ngày chiếu ít nhất N ngày', null=True)),
+                ('multiplier', models.DecimalField(decimal_places=2, default=1, help_text='Nhân giá vé. VD: 1.20', max_digits=5)),
+                ('amount', models.DecimalField(decimal_places=0, default=0, help_text='Cộng/trừ thêm (VNĐ)', max_digits=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cinema', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='booking.cinema')),
+                ('movie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='booking.movie')),
+            ],
+            options={
+                'verbose_name': 'Luật giá vé',
+                'verbose_name_plural': 'Luật giá vé',
+                'ordering': ['kind', 'name'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_pricingrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='showtime',
+            name='admission_rate',
+            field=models.PositiveIntegerField(blank=True, help_text='Phòng chờ: số người được vào trang chọn ghế mỗi phút. Để trống nếu không cần xếp hàng', null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0010_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventConsumer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Consumer sự kiện',
+                'verbose_name_plural': 'Consumer sự kiện',
+            },
+        ),
+        migrations.CreateModel(
+            name='DomainEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField(db_index=True, help_text='Ngày ghi (giờ địa phương), dùng để xóa theo ngày')),
+                ('entity', models.CharField(choices=[('booking', 'Đặt vé'), ('seat', 'Ghế'), ('payment', 'Thanh toán')], max_length=10)),
+                ('entity_id', models.PositiveIntegerField()),
+                ('show_time_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('kind', models.CharField(help_text='created, deleted, checked_in hoặc tên trường trạng thái', max_length=20)),
+                ('old', models.CharField(blank=True, max_length=20)),
+                ('new', models.CharField(blank=True, max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Sự kiện',
+                'verbose_name_plural': 'Nhật ký sự kiện',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['entity', 'entity_id'], name='event_entity_idx'), models.Index(fields=['show_time_id', 'id'], name='event_show_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:24
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0011_domain_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='showtime',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, help_text='Thời điểm ghế và booking được chuyển sang lưu trữ', null=True),
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('total_amount', models.DecimalField(decimal_places=0, max_digits=10)),
+                ('payment_status', models.CharField(choices=[('pending', 'Chờ thanh toán'), ('processing', 'Đang xử lý thanh toán'), ('paid', 'Đã thanh toán'), ('cancelled', 'Đã hủy'), ('expired', 'Hết hạn'), ('refunded', 'Đã hoàn tiền')], max_length=20)),
+                ('booking_date', models.DateTimeField()),
+                ('seat_numbers', models.CharField(blank=True, max_length=500)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Các dòng booking, payment và ghế gốc')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('show_time', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='booking.showtime')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Đặt vé đã lưu trữ',
+                'verbose_name_plural': 'Đặt vé đã lưu trữ',
+                'ordering': ['-booking_date'],
+                'indexes': [models.Index(fields=['user', '-booking_date'], name='archived_booking_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0012_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='seat_prices',
+            field=models.JSONField(blank=True, default=dict, help_text='Giá từng ghế lúc giữ ghế (số ghế -> giá)'),
+        ),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 import os
 
@@ -53,6 +55,8 @@ class Movie(models.Model):
     is_active = models.BooleanField(default=True)
     is_hot = models.BooleanField(default=False, help_text="Phim đang hot")
     views_count = models.IntegerField(default=0, help_text="Số lượt xem")
+    trending_score = models.FloatField(default=0, db_index=True, editable=False, help_text="Điểm xu hướng (lệnh update_trending)")
+    trending_at = models.DateTimeField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -111,6 +115,8 @@ class ShowTime(models.Model):
     date = models.DateField()
     time = models.TimeField()
     price = models.DecimalField(max_digits=10, decimal_places=0)
+    admission_rate = models.PositiveIntegerField(blank=True, null=True, help_text="Phòng chờ: số người được vào trang chọn ghế mỗi phút. Để trống nếu không cần xếp hàng")
+    archived_at = models.DateTimeField(blank=True, null=True, help_text="Thời điểm ghế và booking được chuyển sang lưu trữ")
     created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
@@ -121,7 +127,28 @@ class ShowTime(models.Model):
     def __str__(self):
         return f"{self.movie.title} - {self.date} {self.time}"
 
-class Seat(models.Model):
+class TrackedModel(models.Model):
+    """
+    Ghi nhớ giá trị các trường trạng thái lúc đọc từ database để post_save biết
+    trường nào vừa đổi (nhật ký sự kiện, booking/events.py). save() chạy trong
+    transaction nên các dòng do post_save ghi (sự kiện, outbox) commit cùng thay đổi.
+    """
+    TRACKED_FIELDS = ()
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked = {name: instance.__dict__[name] for name in cls.TRACKED_FIELDS if name in instance.__dict__}
+        return instance
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class Seat(TrackedModel):
     SEAT_STATUS = [
         ('available', 'Còn trống'),
         ('booked', 'Đã đặt'),
@@ -131,8 +158,11 @@ class Seat(models.Model):
     show_time = models.ForeignKey(ShowTime, on_delete=models.CASCADE, related_name='seats')
     seat_number = models.CharField(max_length=10)
     status = models.CharField(max_length=10, choices=SEAT_STATUS, default='available')
+    checked_in_at = models.DateTimeField(blank=True, null=True, help_text="Thời điểm soát vé tại cửa")
     created_at = models.DateTimeField(default=timezone.now)
     
+    TRACKED_FIELDS = ('status',)
+    
     class Meta:
         verbose_name = "Ghế"
         verbose_name_plural = "Ghế"
@@ -175,7 +205,7 @@ class BankAccount(models.Model):
     def __str__(self):
         return f"{self.get_bank_name_display()} - {self.account_number}"
 
-class Payment(models.Model):
+class Payment(TrackedModel):
     PAYMENT_METHODS = [
         ('cash', 'Tiền mặt'),
         ('bank_transfer', 'Chuyển khoản ngân hàng'),
@@ -218,6 +248,8 @@ class Payment(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
+    TRACKED_FIELDS = ('payment_status', 'payment_method')
+    
     class Meta:
         verbose_name = "Thanh toán"
         verbose_name_plural = "Thanh toán"
@@ -226,7 +258,7 @@ class Payment(models.Model):
     def __str__(self):
         return f"Payment {self.id} - {self.booking.user.username} - {self.amount} VNĐ"
 
-class Booking(models.Model):
+class Booking(TrackedModel):
     PAYMENT_STATUS = [
         ('pending', 'Chờ thanh toán'),
         ('processing', 'Đang xử lý thanh toán'),
@@ -247,12 +279,15 @@ class Booking(models.Model):
     show_time = models.ForeignKey(ShowTime, on_delete=models.CASCADE, related_name='bookings')
     seats = models.ManyToManyField(Seat, related_name='bookings')
     total_amount = models.DecimalField(max_digits=10, decimal_places=0)
+    seat_prices = models.JSONField(default=dict, blank=True, help_text="Giá từng ghế lúc giữ ghế (số ghế -> giá)")
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS, default='pending')
     booking_status = models.CharField(max_length=20, choices=BOOKING_STATUS, default='pending')
     booking_date = models.DateTimeField(default=timezone.now)
     expiry_date = models.DateTimeField(blank=True, null=True, help_text="Thời hạn thanh toán")
     updated_at = models.DateTimeField(auto_now=True)
     
+    TRACKED_FIELDS = ('payment_status', 'booking_status')
+    
     class Meta:
         verbose_name = "Đặt vé"
         verbose_name_plural = "Đặt vé"
@@ -265,6 +300,7 @@ class Booking(models.Model):
         # Tự động tạo thời hạn thanh toán (24 giờ từ khi đặt vé)
         if not self.expiry_date:
             self.expiry_date = timezone.now() + timezone.timedelta(hours=24)
+        # TrackedModel.save chạy trong transaction: outbox thông báo và sự kiện commit cùng booking
         super().save(*args, **kwargs)
     
     def is_expired(self):
@@ -290,6 +326,257 @@ class Review(models.Model):
         verbose_name_plural = "Đánh giá"
         ordering = ['-created_at']
         unique_together = ['user', 'movie']  # Mỗi user chỉ đánh giá 1 lần cho mỗi phim
+        indexes = [
+            # Phân trang keyset đánh giá của một phim (booking/reviews.py)
+            models.Index(fields=['movie', '-created_at', '-id'], name='review_movie_recent_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.movie.title} ({self.rating}/5)" 
\ No newline at end of file
+        return f"{self.user.username} - {self.movie.title} ({self.rating}/5)"
+
+
+class MovieRecommendation(models.Model):
+    # Top-K phim tương tự cho mỗi phim, tính sẵn bởi lệnh build_recommendations
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Gợi ý phim"
+        verbose_name_plural = "Gợi ý phim"
+        ordering = ['movie', '-score']
+        unique_together = ['movie', 'recommended']
+
+    def __str__(self):
+        return f"{self.movie_id} -> {self.recommended_id} ({self.score:.3f})"
+
+
+class MovieActivity(models.Model):
+    # Bộ đếm hoạt động của phim theo từng giờ (dùng tính điểm xu hướng)
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='activities')
+    bucket = models.DateTimeField(help_text="Đầu giờ của khoảng thống kê")
+    views = models.PositiveIntegerField(default=0)
+    bookings = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Hoạt động phim theo giờ"
+        verbose_name_plural = "Hoạt động phim theo giờ"
+        unique_together = ['movie', 'bucket']
+        indexes = [models.Index(fields=['bucket'])]
+
+    def __str__(self):
+        return f"{self.movie_id} @ {self.bucket:%Y-%m-%d %H:00}"
+
+
+class DailySales(models.Model):
+    # Bảng tổng hợp doanh số theo ngày đặt vé x suất chiếu x phương thức thanh toán (booking/rollups.py)
+    date = models.DateField()
+    show_time = models.ForeignKey(ShowTime, on_delete=models.CASCADE, related_name='daily_sales')
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='+')
+    cinema = models.ForeignKey(Cinema, on_delete=models.CASCADE, related_name='+')
+    screen = models.ForeignKey(Screen, on_delete=models.CASCADE, related_name='+')
+    payment_method = models.CharField(max_length=20, blank=True, help_text="Để trống nếu chưa chọn phương thức")
+    bookings = models.PositiveIntegerField(default=0, help_text="Số đơn (mọi trạng thái)")
+    paid_bookings = models.PositiveIntegerField(default=0)
+    tickets = models.PositiveIntegerField(default=0, help_text="Số vé đã thanh toán")
+    revenue = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+    refunded_bookings = models.PositiveIntegerField(default=0)
+    refunds = models.DecimalField(max_digits=14, decimal_places=0, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Doanh số theo ngày"
+        verbose_name_plural = "Doanh số theo ngày"
+        ordering = ['-date', 'show_time']
+        unique_together = ['date', 'show_time', 'payment_method']
+        indexes = [
+            models.Index(fields=['movie', 'date']),
+            models.Index(fields=['cinema', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.show_time_id} ({self.payment_method or '-'})"
+
+
+class ScreenOccupancy(models.Model):
+    # Thống kê lấp đầy của phòng chiếu (booking/analytics.py), mảng số nguyên lưu dạng bytes
+    screen = models.OneToOneField(Screen, on_delete=models.CASCADE, related_name='occupancy')
+    period_start = models.DateField()
+    period_end = models.DateField()
+    show_times = models.PositiveIntegerField(default=0, help_text="Số suất chiếu trong kỳ")
+    rows = models.PositiveSmallIntegerField(default=0)
+    cols = models.PositiveSmallIntegerField(default=0)
+    seat_sales = models.BinaryField(help_text="Số lần bán của từng ghế, theo hàng (rows x cols)")
+    hour_sold = models.BinaryField(help_text="Số vé bán theo giờ trong tuần (7 x 24)")
+    hour_capacity = models.BinaryField(help_text="Số ghế mở bán theo giờ trong tuần (7 x 24)")
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Tỉ lệ lấp đầy phòng chiếu"
+        verbose_name_plural = "Tỉ lệ lấp đầy phòng chiếu"
+
+    def __str__(self):
+        return f"{self.screen} ({self.period_start} - {self.period_end})"
+
+
+class PricingRule(models.Model):
+    # Luật điều chỉnh giá vé (booking/pricing.py); mọi điều kiện đã điền phải khớp thì luật mới áp dụng
+    RULE_KINDS = [
+        ('seat_type', 'Loại ghế (theo hàng)'),
+        ('time', 'Ngày/giờ chiếu'),
+        ('occupancy', 'Theo tỉ lệ lấp đầy'),
+        ('early_bird', 'Đặt sớm'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=20, choices=RULE_KINDS)
+    rows = models.CharField(max_length=200, blank=True, help_text="Các hàng ghế, cách nhau bởi dấu phẩy. VD: G,H")
+    weekdays = models.CharField(max_length=20, blank=True, help_text="0 = Thứ Hai ... 6 = Chủ nhật. VD: 5,6")
+    start_time = models.TimeField(blank=True, null=True, help_text="Suất chiếu bắt đầu từ giờ này")
+    end_time = models.TimeField(blank=True, null=True, help_text="... đến trước giờ này (có thể qua nửa đêm)")
+    min_occupancy = models.DecimalField(max_digits=3, decimal_places=2, blank=True, null=True,
+                                        validators=[MinValueValidator(0), MaxValueValidator(1)],
+                                        help_text="Áp dụng khi tỉ lệ ghế đã bán từ mức này. VD: 0.80")
+    min_days_before = models.PositiveIntegerField(blank=True, null=True, help_text="Đặt trước ngày chiếu ít nhất N ngày")
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, blank=True, null=True, related_name='+')
+    cinema = models.ForeignKey(Cinema, on_delete=models.CASCADE, blank=True, null=True, related_name='+')
+    multiplier = models.DecimalField(max_digits=5, decimal_places=2, default=1, help_text="Nhân giá vé. VD: 1.20")
+    amount = models.DecimalField(max_digits=10, decimal_places=0, default=0, help_text="Cộng/trừ thêm (VNĐ)")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Luật giá vé"
+        verbose_name_plural = "Luật giá vé"
+        ordering = ['kind', 'name']
+    
+    def __str__(self):
+        return self.name
+    
+    def clean(self):
+        required = {
+            'seat_type': ('rows', 'Luật loại ghế cần khai báo hàng ghế'),
+            'occupancy': ('min_occupancy', 'Luật lấp đầy cần tỉ lệ tối thiểu'),
+            'early_bird': ('min_days_before', 'Luật đặt sớm cần số ngày đặt trước'),
+        }
+        if self.kind in required:
+            field, message = required[self.kind]
+            if getattr(self, field) in (None, ''):
+                raise ValidationError({field: message})
+        if self.kind == 'time' and not (self.weekdays or self.start_time or self.end_time):
+            raise ValidationError('Luật ngày/giờ cần ít nhất ngày trong tuần hoặc khung giờ')
+
+
+class Notification(models.Model):
+    # Outbox: ghi cùng transaction với thay đổi Booking, gửi sau bởi lệnh dispatch_notifications
+    KINDS = [
+        ('booking_created', 'Giữ ghế thành công'),
+        ('payment_completed', 'Thanh toán thành công'),
+        ('booking_expired', 'Đặt vé hết hạn'),
+        ('booking_cancelled', 'Đặt vé đã hủy'),
+    ]
+    
+    STATUS = [
+        ('pending', 'Chờ gửi'),
+        ('sending', 'Đang gửi'),
+        ('sent', 'Đã gửi'),
+        ('failed', 'Gửi lỗi'),
+        ('skipped', 'Bỏ qua'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, blank=True, null=True, related_name='notifications')
+    kind = models.CharField(max_length=30, choices=KINDS)
+    dedup_key = models.CharField(max_length=100, unique=True, help_text="Mỗi sự kiện chỉ tạo một thông báo")
+    status = models.CharField(max_length=10, choices=STATUS, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name = "Thông báo"
+        verbose_name_plural = "Thông báo"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.user.username}"
+
+
+class ArchivedBooking(models.Model):
+    # Booking (kèm thanh toán và ghế) của suất chiếu đã lưu trữ (booking/archive.py); id là id booking gốc
+    id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    show_time = models.ForeignKey(ShowTime, on_delete=models.CASCADE, related_name='archived_bookings')
+    total_amount = models.DecimalField(max_digits=10, decimal_places=0)
+    payment_status = models.CharField(max_length=20, choices=Booking.PAYMENT_STATUS)
+    booking_date = models.DateTimeField()
+    seat_numbers = models.CharField(max_length=500, blank=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder, help_text="Các dòng booking, payment và ghế gốc")
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Đặt vé đã lưu trữ"
+        verbose_name_plural = "Đặt vé đã lưu trữ"
+        ordering = ['-booking_date']
+        indexes = [
+            models.Index(fields=['user', '-booking_date'], name='archived_booking_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.user.username} - {self.show_time}"
+
+
+class DomainEvent(models.Model):
+    # Nhật ký sự kiện chỉ ghi thêm (booking/events.py); id là offset cho consumer
+    ENTITIES = [
+        ('booking', 'Đặt vé'),
+        ('seat', 'Ghế'),
+        ('payment', 'Thanh toán'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    day = models.DateField(db_index=True, help_text="Ngày ghi (giờ địa phương), dùng để xóa theo ngày")
+    entity = models.CharField(max_length=10, choices=ENTITIES)
+    entity_id = models.PositiveIntegerField()
+    # Không dùng ForeignKey: sự kiện phải còn nguyên khi suất chiếu/booking bị xóa
+    show_time_id = models.PositiveIntegerField(blank=True, null=True)
+    kind = models.CharField(max_length=20, help_text="created, deleted, checked_in hoặc tên trường trạng thái")
+    old = models.CharField(max_length=20, blank=True)
+    new = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = "Sự kiện"
+        verbose_name_plural = "Nhật ký sự kiện"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['entity', 'entity_id'], name='event_entity_idx'),
+            models.Index(fields=['show_time_id', 'id'], name='event_show_time_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.entity} {self.entity_id} {self.kind}: {self.old} -> {self.new}"
+
+
+class EventConsumer(models.Model):
+    # Offset đã xử lý xong của từng consumer đọc nhật ký sự kiện
+    name = models.CharField(max_length=50, unique=True)
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Consumer sự kiện"
+        verbose_name_plural = "Consumer sự kiện"
+    
+    def __str__(self):
+        return f"{self.name} @ {self.offset}"
+
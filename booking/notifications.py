@@ -0,0 +1,188 @@
+"""
+Thông báo cho khách (email) theo mô hình transactional outbox.
+
+- Ghi: khi Booking được lưu, post_save (booking/signals.py) thêm một dòng
+  Notification trong cùng transaction với thay đổi đó. Booking rollback thì
+  thông báo cũng mất, booking commit thì thông báo chắc chắn nằm trong outbox.
+  Mỗi sự kiện có dedup_key duy nhất (VD "payment_completed:42"), INSERT trùng
+  bị bỏ qua, nên lưu lại booking nhiều lần không sinh thêm thông báo.
+  Cập nhật hàng loạt bằng queryset.update() không có signal: gọi enqueue_many.
+- Gửi: lệnh dispatch_notifications nhận một lô (đánh dấu 'sending' kèm
+  claim_token), gửi qua email backend của Django (NOTIFICATION_EMAIL_BACKEND:
+  file/console khi chạy local, SMTP khi chạy thật) và ghi kết quả từng thư ngay sau
+  khi gửi. Lỗi thì thử lại với thời gian chờ tăng dần, quá
+  NOTIFICATION_MAX_ATTEMPTS lần thì chuyển 'failed'.
+
+Request không bao giờ phải chờ gửi thư. Nếu dispatcher chết giữa chừng, các dòng
+'sending' quá NOTIFICATION_CLAIM_TIMEOUT giây được nhận lại. Thư đã gửi mà chưa kịp
+ghi 'sent' có thể được gửi lại, nhưng với cùng Message-ID để phía nhận gộp trùng.
+"""
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification
+
+# payment_status của Booking -> loại thông báo
+STATUS_KINDS = {
+    'pending': 'booking_created',
+    'paid': 'payment_completed',
+    'expired': 'booking_expired',
+    'cancelled': 'booking_cancelled',
+    'refunded': 'booking_cancelled',
+}
+
+SUBJECTS = {
+    'booking_created': 'Giữ ghế thành công - {movie}',
+    'payment_completed': 'Thanh toán thành công - {movie}',
+    'booking_expired': 'Đặt vé đã hết hạn thanh toán - {movie}',
+    'booking_cancelled': 'Đặt vé đã bị hủy - {movie}',
+}
+
+BODIES = {
+    'booking_created': (
+        'Bạn đã giữ ghế {seats} cho phim {movie} lúc {show} tại {cinema}.\n'
+        'Tổng tiền: {amount} VNĐ. Vui lòng thanh toán trước {expiry}.'
+    ),
+    'payment_completed': (
+        'Thanh toán {amount} VNĐ cho phim {movie} lúc {show} tại {cinema} đã hoàn tất.\n'
+        'Ghế: {seats}. Vé điện tử có trong mục "Vé của tôi".'
+    ),
+    'booking_expired': (
+        'Đặt vé phim {movie} lúc {show} (ghế {seats}) đã hết hạn thanh toán và ghế đã được trả lại.'
+    ),
+    'booking_cancelled': (
+        'Đặt vé phim {movie} lúc {show} (ghế {seats}) đã bị hủy.'
+    ),
+}
+
+
+def dedup_key(kind, booking_id):
+    return f'{kind}:{booking_id}'
+
+
+def enqueue_many(bookings):
+    # """Thêm thông báo ứng với trạng thái hiện tại của các booking; gọi trong transaction của thay đổi"""
+    notifications = []
+    for booking in bookings:
+        kind = STATUS_KINDS.get(booking.payment_status)
+        if kind is None:
+            continue
+        notifications.append(Notification(
+            user_id=booking.user_id, booking_id=booking.id, kind=kind, dedup_key=dedup_key(kind, booking.id),
+        ))
+    # INSERT OR IGNORE theo dedup_key: sự kiện đã có thông báo thì bỏ qua
+    Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+    return len(notifications)
+
+
+def enqueue_for_booking(booking):
+    return enqueue_many([booking])
+
+
+def retry_delay(attempts):
+    # Chờ tăng gấp đôi sau mỗi lần lỗi: 1, 2, 4, ... phút
+    return timedelta(seconds=getattr(settings, 'NOTIFICATION_RETRY_DELAY', 60) * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size, now=None):
+    # """Nhận tối đa batch_size thông báo tới hạn (kể cả lô bị bỏ dở); an toàn khi chạy nhiều dispatcher"""
+    now = now or timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'NOTIFICATION_CLAIM_TIMEOUT', 300))
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=stale)
+    ids = list(
+        Notification.objects.filter(due).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Chỉ dòng vẫn còn tới hạn mới bị nhận; dispatcher khác nhận trước thì bỏ qua
+    Notification.objects.filter(due, id__in=ids).update(status='sending', claim_token=token, claimed_at=now)
+    return list(
+        Notification.objects.filter(claim_token=token, status='sending')
+        .select_related('user', 'booking__show_time__movie', 'booking__show_time__screen__cinema')
+        .prefetch_related('booking__seats')
+        .order_by('id')
+    )
+
+
+def render(notification):
+    # """(subject, body) của thông báo, dựng từ dữ liệu booking tại lúc gửi"""
+    booking = notification.booking
+    show_time = booking.show_time
+    local_expiry = timezone.localtime(booking.expiry_date) if booking.expiry_date else None
+    values = {
+        'movie': show_time.movie.title,
+        'show': f'{show_time.time:%H:%M} {show_time.date:%d/%m/%Y}',
+        'cinema': f'{show_time.screen.cinema.name} - {show_time.screen.name}',
+        'seats': ', '.join(sorted(seat.seat_number for seat in booking.seats.all())),
+        'amount': f'{booking.total_amount:,.0f}'.replace(',', '.'),
+        'expiry': f'{local_expiry:%H:%M %d/%m/%Y}' if local_expiry else '',
+    }
+    return SUBJECTS[notification.kind].format(**values), BODIES[notification.kind].format(**values)
+
+
+def build_message(notification, connection):
+    subject, body = render(notification)
+    key = notification.dedup_key.replace(':', '.')
+    return EmailMessage(
+        subject, body, settings.DEFAULT_FROM_EMAIL, [notification.user.email], connection=connection,
+        # Cùng một thông báo luôn có cùng Message-ID, kể cả khi bị gửi lại
+        headers={'Message-ID': f'<{key}@{getattr(settings, "NOTIFICATION_MESSAGE_DOMAIN", "moviebooking")}>'},
+    )
+
+
+def _fail(notification, error):
+    # """Ghi lỗi và hẹn lần thử sau (hoặc 'failed' khi hết lượt); trả về khóa đếm trong kết quả"""
+    attempts = notification.attempts + 1
+    status = 'failed' if attempts >= getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5) else 'pending'
+    Notification.objects.filter(id=notification.id, claim_token=notification.claim_token).update(
+        status=status, attempts=attempts, claim_token='', last_error=f'{type(error).__name__}: {error}',
+        next_attempt_at=timezone.now() + retry_delay(attempts),
+    )
+    return 'failed' if status == 'failed' else 'retry'
+
+
+def dispatch(batch_size=None):
+    # """Gửi một lô thông báo tới hạn. Trả về số thư đã gửi, lỗi, bỏ qua"""
+    started = time.perf_counter()
+    batch = claim_batch(batch_size or getattr(settings, 'NOTIFICATION_BATCH_SIZE', 100))
+    result = {'claimed': len(batch), 'sent': 0, 'failed': 0, 'retry': 0, 'skipped': 0}
+    if not batch:
+        result['elapsed'] = time.perf_counter() - started
+        return result
+
+    connection = get_connection(getattr(settings, 'NOTIFICATION_EMAIL_BACKEND', None))
+    try:
+        connection.open()
+    except Exception as e:
+        # Không kết nối được máy chủ thư: cả lô chờ lần thử sau
+        for notification in batch:
+            result[_fail(notification, e)] += 1
+        result['elapsed'] = time.perf_counter() - started
+        return result
+
+    try:
+        for notification in batch:
+            rows = Notification.objects.filter(id=notification.id, claim_token=notification.claim_token)
+            if notification.booking is None or not notification.user.email:
+                rows.update(status='skipped', claim_token='')
+                result['skipped'] += 1
+                continue
+            try:
+                build_message(notification, connection).send()
+            except Exception as e:
+                result[_fail(notification, e)] += 1
+                continue
+            # Ghi 'sent' ngay sau từng thư để cửa sổ gửi trùng khi crash chỉ còn một thư
+            rows.update(status='sent', attempts=F('attempts') + 1, claim_token='', sent_at=timezone.now(), last_error='')
+            result['sent'] += 1
+    finally:
+        connection.close()
+    result['elapsed'] = time.perf_counter() - started
+    return result
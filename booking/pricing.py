@@ -0,0 +1,189 @@
+"""
+Tính giá vé động từ các luật PricingRule.
+
+Luật được biên dịch một lần thành tuple bất biến (ngày trong tuần -> frozenset,
+giờ -> số phút, hàng ghế -> frozenset) và giữ trong bộ nhớ tiến trình. Với mỗi
+suất chiếu, các luật cấp suất chiếu (ngày/giờ, lấp đầy, đặt sớm) chỉ được xét
+một lần, sau đó giá của từng hàng ghế được tính sẵn, nên báo giá một giỏ ghế chỉ
+còn là vài lần tra dict.
+
+Các luật khớp được cộng dồn: nhân tất cả multiplier, cộng tất cả amount, rồi
+làm tròn tới PRICING_ROUND_TO đồng.
+"""
+import threading
+import time
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import caching
+from .models import PricingRule, Seat
+from .scheduling import SEAT_NUMBER_RE
+
+CompiledRule = namedtuple(
+    'CompiledRule',
+    'id rows weekdays start_minute end_minute min_occupancy min_days_before movie_id cinema_id multiplier amount',
+)
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute if value is not None else None
+
+
+def _split(value):
+    return frozenset(part.strip().upper() for part in (value or '').split(',') if part.strip())
+
+
+def compile_rule(rule):
+    return CompiledRule(
+        id=rule.id,
+        rows=_split(rule.rows),
+        weekdays=frozenset(int(day) for day in _split(rule.weekdays) if day.isdigit()),
+        start_minute=_minutes(rule.start_time),
+        end_minute=_minutes(rule.end_time),
+        min_occupancy=float(rule.min_occupancy) if rule.min_occupancy is not None else None,
+        min_days_before=rule.min_days_before,
+        movie_id=rule.movie_id,
+        cinema_id=rule.cinema_id,
+        multiplier=Decimal(rule.multiplier),
+        amount=Decimal(rule.amount),
+    )
+
+
+def _in_window(minute, start, end):
+    if start is None and end is None:
+        return True
+    start = 0 if start is None else start
+    end = 24 * 60 if end is None else end
+    if start <= end:
+        return start <= minute < end
+    # Khung giờ qua nửa đêm, VD 22:00 -> 02:00
+    return minute >= start or minute < end
+
+
+class ShowContext(namedtuple('ShowContext', 'movie_id cinema_id weekday minute days_before occupancy')):
+    __slots__ = ()
+
+    def matches(self, rule):
+        return (
+            (rule.movie_id is None or rule.movie_id == self.movie_id)
+            and (rule.cinema_id is None or rule.cinema_id == self.cinema_id)
+            and (not rule.weekdays or self.weekday in rule.weekdays)
+            and _in_window(self.minute, rule.start_minute, rule.end_minute)
+            and (rule.min_occupancy is None or self.occupancy >= rule.min_occupancy)
+            and (rule.min_days_before is None or self.days_before >= rule.min_days_before)
+        )
+
+
+class ShowPrices(namedtuple('ShowPrices', 'base default rows')):
+    # """Giá của một suất chiếu: giá mặc định và giá riêng theo hàng ghế"""
+    __slots__ = ()
+
+    def price_for(self, seat_number):
+        match = SEAT_NUMBER_RE.match(seat_number or '')
+        if match is None:
+            return self.default
+        return self.rows.get(match.group(1), self.default)
+
+    def total(self, seat_numbers):
+        return sum((self.price_for(number) for number in seat_numbers), Decimal(0))
+
+
+class RuleSet:
+    def __init__(self, rules, version):
+        self.version = version
+        self.show_rules = tuple(rule for rule in rules if not rule.rows)
+        self.seat_rules = tuple(rule for rule in rules if rule.rows)
+        self.round_to = Decimal(getattr(settings, 'PRICING_ROUND_TO', 1000))
+
+    def _round(self, value):
+        value = max(value, Decimal(0))
+        return (value / self.round_to).quantize(Decimal(1), rounding=ROUND_HALF_UP) * self.round_to
+
+    def prices(self, base, context):
+        # """Áp luật cấp suất chiếu một lần, rồi tính sẵn giá cho các hàng có luật riêng"""
+        base = Decimal(base)
+        multiplier, amount = Decimal(1), Decimal(0)
+        for rule in self.show_rules:
+            if context.matches(rule):
+                multiplier *= rule.multiplier
+                amount += rule.amount
+
+        row_adjustments = {}
+        for rule in self.seat_rules:
+            if context.matches(rule):
+                for row in rule.rows:
+                    row_multiplier, row_amount = row_adjustments.get(row, (Decimal(1), Decimal(0)))
+                    row_adjustments[row] = (row_multiplier * rule.multiplier, row_amount + rule.amount)
+
+        rows = {
+            row: self._round(base * multiplier * row_multiplier + amount + row_amount)
+            for row, (row_multiplier, row_amount) in row_adjustments.items()
+        }
+        return ShowPrices(base, self._round(base * multiplier + amount), rows)
+
+
+_lock = threading.Lock()
+_state = {'rule_set': None, 'compiled_at': 0}
+
+
+def get_rule_set():
+    """
+    Bộ luật đã biên dịch; dựng lại khi phiên bản luật trong cache đổi hoặc sau PRICING_RULES_TTL giây.
+    Phiên bản là tag 'pricing' của booking/caching.py nên mọi worker dùng chung một số phiên bản.
+    """
+    ttl = getattr(settings, 'PRICING_RULES_TTL', 60)
+    version = caching.tag_versions(['pricing'])['pricing']
+    rule_set = _state['rule_set']
+    if rule_set is not None and rule_set.version == version and time.monotonic() - _state['compiled_at'] < ttl:
+        return rule_set
+    with _lock:
+        rules = [compile_rule(rule) for rule in PricingRule.objects.filter(is_active=True)]
+        _state['rule_set'] = RuleSet(rules, version)
+        _state['compiled_at'] = time.monotonic()
+        return _state['rule_set']
+
+
+def invalidate():
+    # Đổi phiên bản dùng chung: các worker khác biên dịch lại ở lần báo giá tới
+    caching.invalidate_tags('pricing')
+    _state['rule_set'] = None
+
+
+def occupancy(show_time):
+    counts = Seat.objects.filter(show_time=show_time).aggregate(
+        total=Count('id'), taken=Count('id', filter=~Q(status='available'))
+    )
+    return counts['taken'] / counts['total'] if counts['total'] else 0
+
+
+def show_context(show_time, occupancy_rate=None, today=None):
+    today = today or timezone.localdate()
+    return ShowContext(
+        movie_id=show_time.movie_id,
+        cinema_id=show_time.screen.cinema_id,
+        weekday=show_time.date.weekday(),
+        minute=_minutes(show_time.time),
+        days_before=(show_time.date - today).days,
+        occupancy=occupancy(show_time) if occupancy_rate is None else occupancy_rate,
+    )
+
+
+def quote_show(show_time, occupancy_rate=None):
+    # """Giá hiện tại của suất chiếu, tính trực tiếp (dùng khi giữ ghế)"""
+    return get_rule_set().prices(show_time.price, show_context(show_time, occupancy_rate))
+
+
+def seat_prices(show_time):
+    # """Giá của suất chiếu cho trang chọn ghế, cache ngắn theo suất chiếu và phiên bản luật"""
+    rule_set = get_rule_set()
+    key = f'pricing:show:{show_time.id}:{rule_set.version}'
+    prices = cache.get(key)
+    if prices is None:
+        prices = rule_set.prices(show_time.price, show_context(show_time))
+        cache.set(key, prices, getattr(settings, 'PRICING_CACHE_TIMEOUT', 60))
+    return prices
@@ -0,0 +1,135 @@
+"""
+Giới hạn tần suất request (rate limiting) theo user/IP.
+
+Dùng thuật toán sliding window counter: mỗi key giữ bộ đếm của cửa sổ hiện tại
+và cửa sổ trước, ước lượng số request trong một chu kỳ trượt bằng trung bình
+có trọng số. Mỗi lần kiểm tra chỉ tốn một get_many và một incr trên cache cục bộ.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+DEFAULT_POLICIES = {
+    'login': {'rate': '10/m', 'key': 'ip', 'methods': ['POST']},
+    'register': {'rate': '5/h', 'key': 'ip', 'methods': ['POST']},
+    'booking_seats': {'rate': '10/m', 'key': 'user_or_ip', 'methods': ['POST']},
+    'get_seats': {'rate': '60/m', 'key': 'user_or_ip', 'methods': ['GET']},
+    # Máy soát vé gửi liên tục ở cửa rạp; chặn việc dò mã vé hàng loạt
+    'check_in': {'rate': '120/m', 'key': 'user_or_ip', 'methods': ['POST']},
+}
+
+
+def parse_rate(rate):
+    # """'10/m' -> (10, 60)"""
+    count, _, period = rate.partition('/')
+    unit = period[-1]
+    multiplier = int(period[:-1]) if len(period) > 1 else 1
+    return int(count), PERIODS[unit] * multiplier
+
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def _key_ip(request):
+    return 'ip:' + get_client_ip(request)
+
+
+def _key_user(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return None
+
+
+def _key_user_or_ip(request):
+    return _key_user(request) or _key_ip(request)
+
+
+KEY_FUNCTIONS = {
+    'ip': _key_ip,
+    'user': _key_user,
+    'user_or_ip': _key_user_or_ip,
+}
+
+
+def get_policy(name):
+    # settings.RATELIMIT_POLICIES chỉ ghi đè (từng trường) hoặc thêm policy so với DEFAULT_POLICIES
+    policy = {**DEFAULT_POLICIES.get(name, {}), **getattr(settings, 'RATELIMIT_POLICIES', {}).get(name, {})}
+    if 'rate' not in policy:
+        raise KeyError(name)
+    limit, period = parse_rate(policy['rate'])
+    return {
+        'limit': limit,
+        'period': period,
+        'key': KEY_FUNCTIONS[policy.get('key', 'user_or_ip')],
+        'methods': policy.get('methods'),
+    }
+
+
+def hit(cache_key, limit, period, now=None):
+    # """Ghi nhận 1 request. Trả về (được phép?, số giây nên chờ)"""
+    cache = caches[getattr(settings, 'RATELIMIT_CACHE', 'default')]
+    if now is None:
+        now = time.time()
+    window = int(now // period)
+    current_key = f'rl:{cache_key}:{window}'
+    previous_key = f'rl:{cache_key}:{window - 1}'
+
+    counts = cache.get_many([current_key, previous_key])
+    current = counts.get(current_key, 0)
+    previous = counts.get(previous_key, 0)
+    elapsed = (now % period) / period
+    if previous * (1 - elapsed) + current >= limit:
+        return False, max(1, int(period - now % period))
+
+    if current:
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, period * 2)
+    elif not cache.add(current_key, 1, period * 2):
+        cache.incr(current_key)
+    return True, 0
+
+
+def too_many_requests(request, retry_after):
+    message = 'Bạn thao tác quá nhanh, vui lòng thử lại sau ít phút!'
+    wants_json = (
+        request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('Accept', '')
+    )
+    if request.path_info.startswith('/api/'):
+        # Cùng dạng lỗi với booking/api.py
+        response = JsonResponse({'detail': message}, status=429)
+    elif wants_json:
+        response = JsonResponse({'success': False, 'error': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(policy_name):
+    # """Decorator giới hạn tần suất cho view theo policy (DEFAULT_POLICIES, ghi đè bởi settings.RATELIMIT_POLICIES)"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if getattr(settings, 'RATELIMIT_ENABLE', True):
+                policy = get_policy(policy_name)
+                if policy['methods'] is None or request.method in policy['methods']:
+                    key = policy['key'](request)
+                    if key is not None:
+                        allowed, retry_after = hit(
+                            f'{policy_name}:{key}', policy['limit'], policy['period']
+                        )
+                        if not allowed:
+                            return too_many_requests(request, retry_after)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,169 @@
+"""
+Gợi ý "phim bạn có thể thích" theo kiểu item-item.
+
+Mỗi người dùng là một tập phim đã tương tác: đã đặt vé (trừ vé hủy/hết hạn/hoàn
+tiền) hoặc đã đánh giá từ 3 sao trở lên. Đánh giá 1-2 sao loại phim đó khỏi tập.
+Độ tương tự giữa hai phim là cosine trên vector nhị phân người dùng:
+
+    sim(i, j) = co(i, j) / sqrt(n_i * n_j) * co(i, j) / (co(i, j) + SHRINKAGE)
+
+Trong đó co là số người xem cả hai phim, n là số người xem từng phim. SHRINKAGE
+làm giảm điểm của các cặp có ít người xem chung.
+
+Mỗi hàng được tính qua chỉ mục ngược (phim -> người dùng -> phim) bằng dict
+thuần Python, vì dự án không phụ thuộc NumPy/SciPy. Kết quả top-K lưu vào
+bảng MovieRecommendation và được đọc qua cache.
+"""
+import heapq
+import math
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Booking, Movie, MovieRecommendation, Review
+
+TOP_K = 20
+SHRINKAGE = 5
+# Bỏ qua tài khoản tương tác quá nhiều phim (staff/thử nghiệm): tốn O(n^2) mà ít giá trị
+MAX_ITEMS_PER_USER = 200
+INACTIVE_PAYMENT_STATUSES = ['cancelled', 'expired', 'refunded']
+
+
+def cache_timeout():
+    return getattr(settings, 'RECOMMENDATION_CACHE_TIMEOUT', 3600)
+
+
+def load_interactions():
+    # """Trả về dict user_id -> set(movie_id)"""
+    baskets = defaultdict(set)
+    bookings = Booking.objects.exclude(payment_status__in=INACTIVE_PAYMENT_STATUSES).values_list(
+        'user_id', 'show_time__movie_id'
+    ).distinct().iterator(chunk_size=10000)
+    for user_id, movie_id in bookings:
+        baskets[user_id].add(movie_id)
+
+    disliked = []
+    for user_id, movie_id, rating in Review.objects.values_list('user_id', 'movie_id', 'rating').iterator(chunk_size=10000):
+        if rating >= 3:
+            baskets[user_id].add(movie_id)
+        else:
+            disliked.append((user_id, movie_id))
+    for user_id, movie_id in disliked:
+        baskets[user_id].discard(movie_id)
+    return baskets
+
+
+def compute_neighbours(baskets, movie_ids=None, top_k=TOP_K):
+    # """Tính top-K hàng xóm cho các phim movie_ids (mặc định: tất cả). Trả về dict movie_id -> [(id, score)]"""
+    users_by_movie = defaultdict(list)
+    for user_id, movies in baskets.items():
+        if len(movies) > MAX_ITEMS_PER_USER:
+            continue
+        for movie_id in movies:
+            users_by_movie[movie_id].append(user_id)
+
+    if movie_ids is None:
+        movie_ids = list(users_by_movie)
+
+    neighbours = {}
+    for movie_id in movie_ids:
+        co_counts = defaultdict(int)
+        for user_id in users_by_movie.get(movie_id, ()):
+            for other_id in baskets[user_id]:
+                co_counts[other_id] += 1
+        co_counts.pop(movie_id, None)
+
+        count = len(users_by_movie.get(movie_id, ()))
+        scored = []
+        for other_id, co in co_counts.items():
+            similarity = co / math.sqrt(count * len(users_by_movie[other_id]))
+            scored.append((similarity * co / (co + SHRINKAGE), other_id))
+        neighbours[movie_id] = [(other_id, score) for score, other_id in heapq.nlargest(top_k, scored)]
+    return neighbours
+
+
+def touched_movies(since):
+    # """Các phim có đặt vé hoặc đánh giá mới kể từ since"""
+    movie_ids = set(Booking.objects.filter(updated_at__gte=since).values_list('show_time__movie_id', flat=True).distinct())
+    movie_ids.update(Review.objects.filter(updated_at__gte=since).values_list('movie_id', flat=True).distinct())
+    return movie_ids
+
+
+def last_computed_at():
+    return MovieRecommendation.objects.aggregate(last=Max('computed_at'))['last']
+
+
+def build_recommendations(full=False, since=None, top_k=TOP_K):
+    # """
+    # Tính lại bảng gợi ý. Mặc định chỉ tính lại các phim có tương tác mới kể từ lần chạy trước;
+    # full=True tính lại toàn bộ (hàng của các phim không đổi vẫn có thể lệch nhẹ giữa các lần full).
+    # """
+    started = time.perf_counter()
+    now = timezone.now()
+    if not full:
+        since = since or last_computed_at()
+        if since is None:
+            full = True
+
+    baskets = load_interactions()
+    movie_ids = None if full else touched_movies(since)
+    neighbours = compute_neighbours(baskets, movie_ids, top_k)
+    active_ids = set(Movie.objects.filter(is_active=True).values_list('id', flat=True))
+
+    rows = [
+        MovieRecommendation(movie_id=movie_id, recommended_id=other_id, score=score, computed_at=now)
+        for movie_id, items in neighbours.items() if movie_id in active_ids
+        for other_id, score in items if other_id in active_ids
+    ]
+    with transaction.atomic():
+        if full:
+            MovieRecommendation.objects.all().delete()
+        else:
+            MovieRecommendation.objects.filter(movie_id__in=list(neighbours)).delete()
+        MovieRecommendation.objects.bulk_create(rows, batch_size=2000)
+
+    cache.delete_many([f'recs:movie:{movie_id}' for movie_id in neighbours])
+    return {
+        'full': full,
+        'users': len(baskets),
+        'movies': len(neighbours),
+        'rows': len(rows),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def similar_movies(movie_id, limit=6):
+    # """Phim tương tự (đã tính sẵn), có cache"""
+    key = f'recs:movie:{movie_id}'
+    movies = cache.get(key)
+    if movies is None:
+        ids = list(MovieRecommendation.objects.filter(movie_id=movie_id).order_by('-score').values_list('recommended_id', flat=True)[:TOP_K])
+        by_id = Movie.objects.filter(id__in=ids, is_active=True).in_bulk()
+        movies = [by_id[other_id] for other_id in ids if other_id in by_id]
+        cache.set(key, movies, cache_timeout())
+    return movies[:limit]
+
+
+def recommended_for_user(user, limit=6):
+    # """Cộng điểm hàng xóm của các phim user đã xem, bỏ các phim đã xem"""
+    if not user.is_authenticated:
+        return []
+    key = f'recs:user:{user.id}'
+    movies = cache.get(key)
+    if movies is None:
+        seen = set(Booking.objects.filter(user=user).exclude(payment_status__in=INACTIVE_PAYMENT_STATUSES).values_list('show_time__movie_id', flat=True))
+        seen.update(Review.objects.filter(user=user).values_list('movie_id', flat=True))
+        scores = defaultdict(float)
+        rows = MovieRecommendation.objects.filter(movie_id__in=seen).exclude(recommended_id__in=seen).values_list('recommended_id', 'score')
+        for other_id, score in rows:
+            scores[other_id] += score
+        ids = heapq.nlargest(limit, scores, key=scores.get)
+        by_id = Movie.objects.filter(id__in=ids, is_active=True).in_bulk()
+        movies = [by_id[other_id] for other_id in ids if other_id in by_id]
+        cache.set(key, movies, getattr(settings, 'RECOMMENDATION_USER_CACHE_TIMEOUT', 600))
+    return movies
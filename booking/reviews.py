@@ -0,0 +1,75 @@
+"""
+Danh sách đánh giá theo trang (keyset) và khối tổng hợp đánh giá của phim.
+
+Trang đánh giá đi theo chỉ mục (movie, -created_at, -id): mỗi trang là một lần
+quét REVIEWS_PER_PAGE dòng kể từ cursor, không OFFSET, không đếm, kèm
+select_related('user__profile') để template không truy vấn thêm cho từng dòng.
+Khối tổng hợp (số đánh giá, điểm trung bình, phân bố 1-5 sao) là một GROUP BY
+theo rating, được cache theo phim và xóa khi có đánh giá thay đổi.
+Vì vậy chi phí trang chi tiết phim như nhau dù phim có 10 hay 100k đánh giá.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Review
+
+REVIEWS_PER_PAGE = 10
+
+
+def summary_key(movie_id):
+    return f'reviews:summary:{movie_id}'
+
+
+def review_summary(movie_id):
+    # """{'count', 'average', 'histogram': [{'stars', 'count', 'percent'}, ...] từ 5 tới 1 sao}"""
+    key = summary_key(movie_id)
+    summary = cache.get(key)
+    if summary is None:
+        counts = dict(
+            Review.objects.filter(movie_id=movie_id).values_list('rating').annotate(total=Count('id')).order_by()
+        )
+        total = sum(counts.values())
+        summary = {
+            'count': total,
+            'average': round(sum(stars * n for stars, n in counts.items()) / total, 1) if total else 0,
+            'histogram': [
+                {'stars': stars, 'count': counts.get(stars, 0),
+                 'percent': round(counts.get(stars, 0) * 100 / total) if total else 0}
+                for stars in range(5, 0, -1)
+            ],
+        }
+        cache.set(key, summary, getattr(settings, 'REVIEW_SUMMARY_CACHE_TIMEOUT', 600))
+    return summary
+
+
+def invalidate(movie_id):
+    cache.delete(summary_key(movie_id))
+
+
+def review_page(movie_id, after=None, limit=REVIEWS_PER_PAGE):
+    """
+    Một trang đánh giá mới nhất trước. `after` là khóa [created_at, id] của dòng
+    cuối trang trước. Trả về (danh sách Review, khóa của trang sau hoặc None).
+    """
+    queryset = Review.objects.filter(movie_id=movie_id).select_related('user__profile').order_by('-created_at', '-id')
+    if after:
+        created_at, review_id = after
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=review_id))
+    reviews = list(queryset[:limit + 1])
+    if len(reviews) <= limit:
+        return reviews, None
+    last = reviews[limit - 1]
+    # isoformat giữ đủ micro giây (DjangoJSONEncoder cắt còn mili giây, sẽ làm lệch khóa)
+    return reviews[:limit], [last.created_at.isoformat(), last.id]
+
+
+def parse_key(values):
+    # """Khóa [created_at, id] từ cursor; None nếu sai định dạng"""
+    if not isinstance(values, list) or len(values) != 2:
+        return None
+    created_at = parse_datetime(values[0]) if isinstance(values[0], str) else None
+    if created_at is None or not isinstance(values[1], int):
+        return None
+    return [created_at, values[1]]
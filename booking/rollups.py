@@ -0,0 +1,138 @@
+"""
+Bảng tổng hợp doanh số DailySales.
+
+Mỗi dòng là một ô (ngày đặt vé, suất chiếu, phương thức thanh toán) kèm sẵn phim,
+rạp, phòng chiếu. Báo cáo theo phim/rạp/phòng/phương thức chỉ cần GROUP BY trên
+bảng này, số dòng tỉ lệ với số ngày x suất chiếu thay vì số booking.
+
+Ô nào có Booking/Payment thay đổi sẽ được tính lại từ dữ liệu gốc sau khi
+transaction commit (xem booking/signals.py). Tính lại cả ô thay vì cộng/trừ
+chênh lệch nên kết quả luôn khớp dữ liệu gốc, chạy lại bao nhiêu lần cũng được.
+Lệnh backfill_sales dựng lại các ô cho một khoảng ngày.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear, TruncDate
+from django.utils import timezone
+
+from .models import Booking, DailySales, ShowTime
+
+METRICS = ['bookings', 'paid_bookings', 'tickets', 'revenue', 'refunded_bookings', 'refunds']
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def aggregate_sales(start_date, end_date, show_time_ids=None):
+    # """Tính các ô trong [start_date, end_date] từ bảng Booking; trả về dict (ngày, suất, phương thức) -> chỉ số"""
+    bookings = Booking.objects.filter(
+        booking_date__gte=day_start(start_date),
+        booking_date__lt=day_start(end_date + timedelta(days=1)),
+    )
+    if show_time_ids is not None:
+        bookings = bookings.filter(show_time_id__in=show_time_ids)
+
+    cells = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    paid = Q(payment_status='paid')
+    refunded = Q(payment_status='refunded')
+    rows = bookings.annotate(
+        day=TruncDate('booking_date'),
+        method=Coalesce('payment__payment_method', Value('')),
+    ).values_list('day', 'show_time_id', 'method').annotate(
+        total=Count('id'),
+        paid_count=Count('id', filter=paid),
+        paid_amount=Sum('total_amount', filter=paid),
+        refunded_count=Count('id', filter=refunded),
+        refunded_amount=Sum('total_amount', filter=refunded),
+    ).order_by()
+    for day, show_time_id, method, total, paid_count, paid_amount, refunded_count, refunded_amount in rows:
+        cells[day, show_time_id, method].update(
+            bookings=total,
+            paid_bookings=paid_count,
+            revenue=paid_amount or 0,
+            refunded_bookings=refunded_count,
+            refunds=refunded_amount or 0,
+        )
+
+    # Đếm vé riêng qua bảng trung gian để SUM(total_amount) ở trên không bị nhân bản theo số ghế
+    tickets = Booking.seats.through.objects.filter(booking__in=bookings.filter(paid)).annotate(
+        day=TruncDate('booking__booking_date'),
+        method=Coalesce('booking__payment__payment_method', Value('')),
+    ).values_list('day', 'booking__show_time_id', 'method').annotate(total=Count('id')).order_by()
+    for day, show_time_id, method, total in tickets:
+        cells[day, show_time_id, method]['tickets'] = total
+    return cells
+
+
+def rebuild(start_date, end_date, show_time_ids=None):
+    # """Ghi đè các ô DailySales trong khoảng ngày (và các suất chiếu nếu có)"""
+    cells = aggregate_sales(start_date, end_date, show_time_ids)
+    # Suất chiếu đã lưu trữ (booking/archive.py) không còn booking gốc: giữ nguyên ô doanh số của chúng
+    dimensions = {
+        show_time_id: (movie_id, screen_id, cinema_id)
+        for show_time_id, movie_id, screen_id, cinema_id in ShowTime.objects.filter(
+            id__in={show_time_id for _, show_time_id, _ in cells}, archived_at__isnull=True,
+        ).values_list('id', 'movie_id', 'screen_id', 'screen__cinema_id')
+    }
+    rows = []
+    for (day, show_time_id, method), metrics in cells.items():
+        if show_time_id not in dimensions:
+            continue
+        movie_id, screen_id, cinema_id = dimensions[show_time_id]
+        rows.append(DailySales(
+            date=day, show_time_id=show_time_id, movie_id=movie_id, screen_id=screen_id,
+            cinema_id=cinema_id, payment_method=method, **metrics
+        ))
+
+    existing = DailySales.objects.filter(date__range=(start_date, end_date), show_time__archived_at__isnull=True)
+    if show_time_ids is not None:
+        existing = existing.filter(show_time_id__in=show_time_ids)
+    with transaction.atomic():
+        existing.delete()
+        DailySales.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def refresh_booking(booking_id=None, booking_date=None, show_time_id=None):
+    # """Tính lại ô chứa một booking (gọi sau commit)"""
+    if booking_date is None:
+        row = Booking.objects.filter(id=booking_id).values_list('booking_date', 'show_time_id').first()
+        if row is None:
+            return
+        booking_date, show_time_id = row
+    day = timezone.localdate(booking_date)
+    rebuild(day, day, [show_time_id])
+
+
+def backfill(start_date, end_date, chunk_days=31):
+    # """Dựng lại DailySales theo từng khối ngày; trả về số dòng đã ghi"""
+    written = 0
+    current = start_date
+    while current <= end_date:
+        chunk_end = min(current + timedelta(days=chunk_days - 1), end_date)
+        written += rebuild(current, chunk_end)
+        current = chunk_end + timedelta(days=1)
+    return written
+
+
+def totals(queryset):
+    result = queryset.aggregate(**{metric: Sum(metric) for metric in METRICS})
+    return {metric: value or 0 for metric, value in result.items()}
+
+
+def sales_by(field, start_date, end_date, limit=None):
+    # """Doanh số gộp theo một chiều (movie, cinema, screen, payment_method, date) trong khoảng ngày"""
+    rows = DailySales.objects.filter(date__range=(start_date, end_date)).values(field).annotate(
+        tickets_total=Sum('tickets'), revenue_total=Sum('revenue'), refunds_total=Sum('refunds'),
+    ).order_by('-revenue_total')
+    return rows[:limit] if limit else rows
+
+
+def monthly_bookings(since_date):
+    return DailySales.objects.filter(date__gte=since_date).values(
+        year=ExtractYear('date'), month=ExtractMonth('date')
+    ).annotate(count=Sum('bookings')).order_by('year', 'month')
@@ -0,0 +1,231 @@
+"""
+Lên lịch suất chiếu hàng loạt.
+
+Sinh các suất chiếu cho một phim trên nhiều phòng, nhiều ngày và nhiều khung giờ,
+kiểm tra trùng lịch theo thời lượng phim (Movie.duration) rồi tạo toàn bộ ShowTime
+và Seat bằng vài lệnh bulk insert trong một transaction.
+"""
+import re
+import time as time_module
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .models import Seat, ShowTime
+
+SEAT_BATCH_SIZE = 2000
+SEAT_NUMBER_RE = re.compile(r'^([A-Z]+)(\d+)$')
+
+
+def row_label(index):
+    # """0 -> A, 25 -> Z, 26 -> AA ..."""
+    label = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord('A') + remainder) + label
+    return label
+
+
+def parse_seat_number(seat_number):
+    # """'B3' -> (1, 2): chỉ số hàng và cột tính từ 0; None nếu không đúng dạng"""
+    match = SEAT_NUMBER_RE.match(seat_number or '')
+    if match is None:
+        return None
+    row = 0
+    for char in match.group(1):
+        row = row * 26 + ord(char) - ord('A') + 1
+    return row - 1, int(match.group(2)) - 1
+
+
+def seat_numbers(capacity, seats_per_row=None):
+    # """Danh sách số ghế (A1, A2, ..., B1, ...) cho phòng có `capacity` ghế"""
+    if seats_per_row is None:
+        seats_per_row = getattr(settings, 'SEATS_PER_ROW', 10)
+    return [
+        f'{row_label(i // seats_per_row)}{i % seats_per_row + 1}'
+        for i in range(capacity)
+    ]
+
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class ScheduledShow(namedtuple('ScheduledShow', 'id screen_id date time duration movie_title')):
+    # """Bản ghi gọn của một suất chiếu đã có trong chỉ mục"""
+    __slots__ = ()
+
+
+class ScheduleIndex:
+    """
+    Chỉ mục khoảng thời gian chiếm phòng, chia theo (phòng, ngày).
+
+    Mỗi bucket giữ các khoảng [bắt đầu, kết thúc) tính bằng phút từ 0h của ngày đó,
+    sắp xếp theo giờ bắt đầu, kèm mảng `reach` (kết thúc lớn nhất tính tới vị trí i).
+    Kiểm tra trùng chỉ cần tra hash + bisect trên bucket của ngày đó và hai ngày
+    liền kề (suất chiếu khuya có thể kéo sang ngày hôm sau), nên chi phí không
+    tăng theo tổng số suất chiếu của phòng.
+    """
+
+    def __init__(self, buffer_minutes=0):
+        self.buffer_minutes = buffer_minutes
+        self._buckets = {}
+
+    @classmethod
+    def load(cls, screen_ids, first_date, last_date, buffer_minutes=0, exclude_ids=()):
+        # """Nạp các suất chiếu đã có của các phòng trong khoảng ngày (±1 ngày) bằng 1 truy vấn"""
+        index = cls(buffer_minutes)
+        rows = ShowTime.objects.filter(
+            screen_id__in=screen_ids,
+            date__range=(first_date - timedelta(days=1), last_date + timedelta(days=1)),
+        ).exclude(id__in=exclude_ids).values_list(
+            'id', 'screen_id', 'date', 'time', 'movie__duration', 'movie__title'
+        )
+        for row in rows:
+            index.add(ScheduledShow(*row))
+        return index
+
+    def span(self, time, duration):
+        start = time.hour * 60 + time.minute
+        return start, start + duration + self.buffer_minutes
+
+    def find_conflict(self, screen_id, date, time, duration):
+        # """Trả về ScheduledShow bị trùng với suất chiếu dự kiến, hoặc None"""
+        start, end = self.span(time, duration)
+        conflict = self._find((screen_id, date), start, end)
+        if conflict is None:
+            conflict = self._find(
+                (screen_id, date - timedelta(days=1)),
+                start + MINUTES_PER_DAY, end + MINUTES_PER_DAY,
+            )
+        if conflict is None and end > MINUTES_PER_DAY:
+            conflict = self._find(
+                (screen_id, date + timedelta(days=1)),
+                start - MINUTES_PER_DAY, end - MINUTES_PER_DAY,
+            )
+        return conflict
+
+    def add(self, show):
+        start, end = self.span(show.time, show.duration)
+        starts, ends, reach, shows = self._buckets.setdefault(
+            (show.screen_id, show.date), ([], [], [], [])
+        )
+        pos = bisect_right(starts, start)
+        starts.insert(pos, start)
+        ends.insert(pos, end)
+        shows.insert(pos, show)
+        reach.insert(pos, end)
+        previous = reach[pos - 1] if pos else end
+        for i in range(pos, len(reach)):
+            previous = max(previous, ends[i])
+            reach[i] = previous
+
+    def _find(self, key, start, end):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None
+        starts, ends, reach, shows = bucket
+        # Chỉ các khoảng bắt đầu trước `end` mới có thể giao nhau
+        pos = bisect_left(starts, end)
+        if pos == 0 or reach[pos - 1] <= start:
+            return None
+        for i in range(pos - 1, -1, -1):
+            if ends[i] > start:
+                return shows[i]
+        return None
+
+
+def find_conflicts(show_times, buffer_minutes=0, index=None):
+    # """Tìm các suất chiếu mới bị trùng phòng với suất đã có hoặc với nhau"""
+    if not show_times:
+        return []
+    if index is None:
+        index = ScheduleIndex.load(
+            {st.screen_id for st in show_times},
+            min(st.date for st in show_times),
+            max(st.date for st in show_times),
+            buffer_minutes,
+            exclude_ids=[st.id for st in show_times if st.id],
+        )
+
+    conflicts = []
+    for st in show_times:
+        duration = st.movie.duration
+        clash = index.find_conflict(st.screen_id, st.date, st.time, duration)
+        if clash is not None:
+            conflicts.append((st, clash))
+        else:
+            index.add(ScheduledShow(st.id, st.screen_id, st.date, st.time, duration, st.movie.title))
+    return conflicts
+
+
+def build_show_times(movie, screens, start_date, end_date, times, price):
+    # """Sinh các ShowTime (chưa lưu) cho mọi phòng x ngày x khung giờ"""
+    show_times = []
+    day = start_date
+    while day <= end_date:
+        for screen in screens:
+            for slot in sorted(times):
+                show_times.append(ShowTime(
+                    movie=movie, screen=screen, date=day, time=slot, price=price
+                ))
+        day += timedelta(days=1)
+    return show_times
+
+
+def create_schedule(movie, screens, start_date, end_date, times, price, buffer_minutes=0):
+    """
+    Tạo lịch chiếu hàng loạt. Trả về dict gồm danh sách xung đột (nếu có,
+    không tạo gì cả) hoặc số suất chiếu/ghế đã tạo và thời gian thực hiện.
+    """
+    started = time_module.perf_counter()
+    show_times = build_show_times(movie, screens, start_date, end_date, times, price)
+    numbers_by_screen = {screen.id: seat_numbers(screen.capacity) for screen in screens}
+    with transaction.atomic():
+        # Kiểm tra trùng lịch trong cùng transaction với insert (BEGIN IMMEDIATE giữ khóa ghi):
+        # lần lên lịch khác hay admin không chen được suất chiếu vào giữa lúc kiểm tra và lúc tạo
+        conflicts = find_conflicts(show_times, buffer_minutes)
+        if conflicts:
+            return {'conflicts': conflicts, 'show_times': 0, 'seats': 0,
+                    'elapsed': time_module.perf_counter() - started}
+        created = ShowTime.objects.bulk_create(show_times)
+        seat_count = create_seats(
+            (st.id, number) for st in created for number in numbers_by_screen[st.screen_id]
+        )
+        # bulk_create không gửi post_save: tự làm mới lịch chiếu đã cache của phim
+        transaction.on_commit(lambda: caching.invalidate_tags(f'movie:{movie.id}'))
+
+    return {'conflicts': [], 'show_times': len(created), 'seats': seat_count,
+            'elapsed': time_module.perf_counter() - started}
+
+
+def create_seats(rows):
+    """
+    Insert ghế trống từ các cặp (show_time_id, seat_number) bằng executemany.
+    Bỏ qua việc khởi tạo model Seat vì mỗi suất chiếu có hàng trăm ghế.
+    """
+    connection = transaction.get_connection()
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    sql = 'INSERT INTO {} ({}, {}, {}, {}) VALUES (%s, %s, %s, %s)'.format(
+        connection.ops.quote_name(Seat._meta.db_table),
+        *(connection.ops.quote_name(Seat._meta.get_field(name).column)
+          for name in ('show_time', 'seat_number', 'status', 'created_at')),
+    )
+    count = 0
+    batch = []
+    with connection.cursor() as cursor:
+        for show_time_id, number in rows:
+            batch.append((show_time_id, number, 'available', created_at))
+            if len(batch) >= SEAT_BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            count += len(batch)
+    return count
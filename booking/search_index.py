@@ -0,0 +1,167 @@
+"""
+Chỉ mục tìm kiếm theo tiền tố (autocomplete) giữ trong bộ nhớ tiến trình.
+
+Mỗi phim sinh ra vài khóa đã chuẩn hóa (bỏ dấu, chữ thường): tên đầy đủ, phần
+tên bắt đầu từ mỗi từ ("avengers endgame" -> "endgame") và tên thể loại. Các khóa
+nằm trong một mảng đã sắp xếp, tra cứu tiền tố bằng bisect nên không chạm database.
+
+Chỉ mục được cập nhật từng phim qua signal khi Movie/Genre thay đổi (xem
+booking/signals.py). Các tiến trình khác không nhận được signal nên chỉ mục
+cũng tự dựng lại sau SEARCH_INDEX_TTL giây.
+"""
+import math
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from decimal import Decimal
+
+from django.conf import settings
+from django.urls import reverse
+
+# Loại khớp: ưu tiên khớp đầu tên phim, rồi đầu một từ trong tên, rồi thể loại
+MATCH_TITLE = 0
+MATCH_WORD = 1
+MATCH_GENRE = 2
+
+
+def normalize(text):
+    # """Bỏ dấu tiếng Việt, chữ thường, gộp khoảng trắng: 'Nhà Bà Nữ' -> 'nha ba nu'"""
+    text = (text or '').replace('đ', 'd').replace('Đ', 'D')
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+def movie_keys(title, genre):
+    # """Các khóa (khóa, loại khớp) của một phim"""
+    keys = set()
+    words = normalize(title).split()
+    for position in range(len(words)):
+        keys.add((' '.join(words[position:]), MATCH_TITLE if position == 0 else MATCH_WORD))
+    genre = normalize(genre)
+    if genre:
+        keys.add((genre, MATCH_GENRE))
+    return keys
+
+
+def movie_weight(views_count, rating):
+    # """Độ ưu tiên: lượt xem (thang log) cộng điểm đánh giá"""
+    return math.log1p(max(views_count or 0, 0)) + float(rating or 0)
+
+
+def movie_doc(movie_id, title, genre_id, genre, poster, rating, views_count):
+    return {
+        'id': movie_id,
+        'title': title,
+        'genre_id': genre_id,
+        'genre': genre,
+        'poster': f'{settings.MEDIA_URL}{poster}' if poster else None,
+        'rating': Decimal(str(rating or 0)),
+        'views_count': views_count,
+        'url': reverse('movie_detail', args=[movie_id]),
+    }
+
+
+class SearchIndex:
+    # """Mảng (khóa, movie_id, loại khớp) đã sắp xếp + tài liệu hiển thị của từng phim"""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._entries = []
+        self._keys = {}
+        self._docs = {}
+        self._weights = {}
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def build(self, rows=None):
+        # """Dựng lại toàn bộ từ database (hoặc từ rows đã có sẵn)"""
+        if rows is None:
+            from .models import Movie
+            rows = Movie.objects.filter(is_active=True).values_list(
+                'id', 'title', 'genre_id', 'genre__name', 'poster', 'rating', 'views_count'
+            )
+        entries, keys, docs, weights = [], {}, {}, {}
+        for row in rows:
+            doc = movie_doc(*row)
+            doc_keys = movie_keys(doc['title'], doc['genre'])
+            entries.extend((key, doc['id'], kind) for key, kind in doc_keys)
+            keys[doc['id']] = doc_keys
+            docs[doc['id']] = doc
+            weights[doc['id']] = movie_weight(doc['views_count'], doc['rating'])
+        entries.sort()
+        with self._lock:
+            self._entries, self._keys, self._docs, self._weights = entries, keys, docs, weights
+            self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        built_at = self._built_at
+        if built_at is None or (self.ttl and time.monotonic() - built_at > self.ttl):
+            self.build()
+
+    def _remove_locked(self, movie_id):
+        for key, kind in self._keys.pop(movie_id, ()):
+            position = bisect_left(self._entries, (key, movie_id, kind))
+            if position < len(self._entries) and self._entries[position] == (key, movie_id, kind):
+                del self._entries[position]
+        self._docs.pop(movie_id, None)
+        self._weights.pop(movie_id, None)
+
+    def update(self, movie):
+        # """Cập nhật một phim sau khi lưu: chỉ đổi khóa khi tên/thể loại thay đổi"""
+        if self._built_at is None:
+            return
+        if not movie.is_active:
+            self.remove(movie.id)
+            return
+        with self._lock:
+            current = self._docs.get(movie.id)
+            if current is not None and current['genre_id'] == movie.genre_id:
+                genre = current['genre']
+            else:
+                genre = movie.genre.name
+            doc = movie_doc(movie.id, movie.title, movie.genre_id, genre,
+                            movie.poster.name if movie.poster else None,
+                            movie.rating, movie.views_count)
+            new_keys = movie_keys(doc['title'], doc['genre'])
+            if new_keys != self._keys.get(movie.id):
+                self._remove_locked(movie.id)
+                for key, kind in new_keys:
+                    insort(self._entries, (key, movie.id, kind))
+                self._keys[movie.id] = new_keys
+            self._docs[movie.id] = doc
+            self._weights[movie.id] = movie_weight(doc['views_count'], doc['rating'])
+
+    def remove(self, movie_id):
+        with self._lock:
+            self._remove_locked(movie_id)
+
+    def invalidate(self):
+        # """Buộc dựng lại ở lần tra cứu tiếp theo (ví dụ khi đổi tên thể loại)"""
+        self._built_at = None
+
+    def search(self, query, limit=8):
+        # """Gợi ý theo tiền tố, xếp theo loại khớp rồi độ ưu tiên"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        self._ensure_built()
+        with self._lock:
+            best = {}
+            position = bisect_left(self._entries, (prefix,))
+            entries = self._entries
+            while position < len(entries) and entries[position][0].startswith(prefix):
+                _, movie_id, kind = entries[position]
+                if kind < best.get(movie_id, MATCH_GENRE + 1):
+                    best[movie_id] = kind
+                position += 1
+            ranked = sorted(best, key=lambda movie_id: (best[movie_id], -self._weights[movie_id], movie_id))
+            return [self._docs[movie_id] for movie_id in ranked[:limit]]
+
+
+index = SearchIndex(ttl=getattr(settings, 'SEARCH_INDEX_TTL', 300))
+
+
+def search(query, limit=8):
+    return index.search(query, limit)
@@ -0,0 +1,127 @@
+"""
+Tìm N ghế trống liền nhau tốt nhất cho nhóm khách.
+
+Mỗi suất chiếu có một chỉ mục "đoạn trống" theo hàng: hàng -> danh sách
+(cột bắt đầu, độ dài) của các dãy ghế trống liên tiếp. Với mỗi đoạn đủ dài, vị
+trí tốt nhất là vị trí gần giữa màn hình nhất, tính được trực tiếp (O(1)). Vì vậy
+một truy vấn chỉ duyệt qua các đoạn, không duyệt từng ghế, kể cả với phòng 500 ghế.
+
+Chỉ mục nằm trong cache và được cập nhật sau mỗi lần giữ ghế (mark_taken).
+Kết quả chỉ là gợi ý: trước khi trả về, các ghế được kiểm tra lại trong database
+và việc giữ ghế thật vẫn dùng UPDATE có điều kiện trong claim_seats.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Seat
+from .scheduling import parse_seat_number
+
+# Hàng lý tưởng nằm ở khoảng 60% chiều sâu phòng (tính từ màn hình)
+IDEAL_ROW_RATIO = 0.6
+# Lệch một hàng "tệ" bằng lệch bao nhiêu cột
+ROW_WEIGHT = 1.5
+
+
+def cache_key(show_time_id):
+    return f'seatmap:show:{show_time_id}'
+
+
+def build_index(show_time_id):
+    # """Dựng chỉ mục từ bảng Seat: bố cục ghế và các đoạn trống theo hàng"""
+    layout = {}
+    free = {}
+    for seat_id, seat_number, status in Seat.objects.filter(show_time_id=show_time_id).values_list(
+        'id', 'seat_number', 'status'
+    ):
+        position = parse_seat_number(seat_number)
+        if position is None:
+            continue
+        row, col = position
+        layout.setdefault(row, {})[col] = (seat_id, seat_number)
+        if status == 'available':
+            free.setdefault(row, set()).add(col)
+
+    runs = {}
+    for row, cols in free.items():
+        row_runs = []
+        for col in sorted(cols):
+            if row_runs and row_runs[-1][0] + row_runs[-1][1] == col:
+                row_runs[-1][1] += 1
+            else:
+                row_runs.append([col, 1])
+        runs[row] = [tuple(run) for run in row_runs]
+
+    index = {
+        'layout': layout,
+        'runs': runs,
+        'rows': max(layout) + 1 if layout else 0,
+        'cols': max(max(cols) for cols in layout.values()) + 1 if layout else 0,
+    }
+    cache.set(cache_key(show_time_id), index, getattr(settings, 'SEATMAP_CACHE_TIMEOUT', 300))
+    return index
+
+
+def get_index(show_time_id):
+    index = cache.get(cache_key(show_time_id))
+    if index is None:
+        index = build_index(show_time_id)
+    return index
+
+
+def mark_taken(show_time_id, seat_numbers):
+    # """Cắt các đoạn trống chứa những ghế vừa được giữ (gọi sau commit)"""
+    index = cache.get(cache_key(show_time_id))
+    if index is None:
+        return
+    for seat_number in seat_numbers:
+        position = parse_seat_number(seat_number)
+        if position is None:
+            continue
+        row, col = position
+        row_runs = index['runs'].get(row, [])
+        for i, (start, length) in enumerate(row_runs):
+            if start <= col < start + length:
+                parts = [(start, col - start), (col + 1, start + length - col - 1)]
+                row_runs[i:i + 1] = [part for part in parts if part[1] > 0]
+                break
+    cache.set(cache_key(show_time_id), index, getattr(settings, 'SEATMAP_CACHE_TIMEOUT', 300))
+
+
+def invalidate(show_time_id):
+    cache.delete(cache_key(show_time_id))
+
+
+def best_block(index, count):
+    # """(điểm, hàng, cột bắt đầu) của khối count ghế liền nhau tốt nhất; None nếu không có"""
+    centre = (index['cols'] - 1) / 2
+    ideal_row = (index['rows'] - 1) * IDEAL_ROW_RATIO
+    best = None
+    for row, row_runs in index['runs'].items():
+        row_penalty = ROW_WEIGHT * abs(row - ideal_row)
+        for start, length in row_runs:
+            if length < count:
+                continue
+            # Vị trí trong đoạn có tâm khối gần tâm màn hình nhất
+            offset = round(centre - (count - 1) / 2)
+            offset = min(max(offset, start), start + length - count)
+            candidate = (abs(offset + (count - 1) / 2 - centre) + row_penalty, row, offset)
+            if best is None or candidate < best:
+                best = candidate
+    return best
+
+
+def find_best_seats(show_time_id, count):
+    # """Danh sách (seat_id, seat_number) của khối tốt nhất, đã kiểm tra lại trong database"""
+    index = get_index(show_time_id)
+    for attempt in range(2):
+        block = best_block(index, count)
+        if block is None:
+            return []
+        _, row, start = block
+        seats = [index['layout'][row][col] for col in range(start, start + count)]
+        still_free = Seat.objects.filter(id__in=[seat_id for seat_id, _ in seats], status='available').count()
+        if still_free == count:
+            return seats
+        # Chỉ mục cũ (tiến trình khác đã giữ ghế): dựng lại một lần rồi thử lại
+        index = build_index(show_time_id)
+    return []
@@ -0,0 +1,237 @@
+"""
+Nghiệp vụ đặt vé dùng chung cho view HTML, API JSON và admin.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import events, notifications, pricing, rollups, seatmap
+from .models import Booking, Payment, Seat
+
+
+class BookingError(Exception):
+    """Lỗi nghiệp vụ khi đặt vé; message hiển thị trực tiếp cho người dùng"""
+
+
+def parse_ids(values, message='Có ghế không tồn tại!'):
+    try:
+        return list(dict.fromkeys(int(value) for value in values))
+    except (TypeError, ValueError):
+        raise BookingError(message)
+
+
+def claim_seats(user, show_time, seat_ids):
+    # """Giữ ghế và tạo booking trong một transaction; lỗi nghiệp vụ -> BookingError"""
+    seat_ids = parse_ids(seat_ids)
+    if not seat_ids:
+        raise BookingError('Vui lòng chọn ít nhất một ghế!')
+
+    with transaction.atomic():
+        seats = list(Seat.objects.filter(id__in=seat_ids, show_time=show_time))
+        if len(seats) != len(seat_ids):
+            raise BookingError('Có ghế không tồn tại!')
+        for seat in seats:
+            if seat.status != 'available':
+                raise BookingError(f'Ghế {seat.seat_number} đã được đặt!')
+
+        # Giá tính lại phía server theo luật và tỉ lệ lấp đầy tại thời điểm giữ ghế
+        prices = pricing.quote_show(show_time)
+
+        # Cập nhật có điều kiện: hai người cùng giữ một ghế thì chỉ một người thành công
+        updated = Seat.objects.filter(id__in=seat_ids, status='available').update(status='booked')
+        if updated != len(seats):
+            raise BookingError('Có ghế vừa được người khác đặt, vui lòng chọn lại!')
+        # update() không gửi post_save: ghi sự kiện đổi trạng thái ghế trực tiếp
+        events.record_many(('seat', seat.id, show_time.id, 'status', seat.status, 'booked') for seat in seats)
+
+        # Lưu giá từng ghế để vé in đúng số tiền đã trả (giá động theo hàng ghế)
+        seat_prices = {seat.seat_number: prices.price_for(seat.seat_number) for seat in seats}
+        booking = Booking.objects.create(
+            user=user,
+            show_time=show_time,
+            total_amount=sum(seat_prices.values()),
+            seat_prices={number: str(price) for number, price in seat_prices.items()},
+            payment_status='pending',
+            booking_status='pending'
+        )
+        booking.seats.set(seats)
+        seat_numbers = [seat.seat_number for seat in seats]
+        transaction.on_commit(lambda: seatmap.mark_taken(show_time.id, seat_numbers))
+    return booking
+
+
+# Máy trạng thái thanh toán của booking: trạng thái hiện tại -> các trạng thái được chuyển tới
+TRANSITIONS = {
+    'pending': {'processing', 'paid', 'cancelled', 'expired'},
+    'processing': {'pending', 'paid', 'cancelled', 'expired'},
+    'paid': {'refunded'},
+    'cancelled': set(),
+    'expired': set(),
+    'refunded': set(),
+}
+# booking_status và payment_status của Payment đi kèm mỗi trạng thái (giống update_booking_status cũ)
+BOOKING_STATUS_FOR = {'paid': 'confirmed', 'cancelled': 'cancelled', 'refunded': 'cancelled', 'expired': 'cancelled'}
+PAYMENT_STATUS_FOR = {
+    'pending': 'pending', 'processing': 'processing', 'paid': 'completed',
+    'cancelled': 'cancelled', 'expired': 'cancelled', 'refunded': 'refunded',
+}
+# Các trạng thái trả ghế về trống
+RELEASING_STATUSES = {'cancelled', 'expired', 'refunded'}
+ACTIVE_STATUSES = ['pending', 'processing', 'paid']
+MAX_TRANSITION_BATCH = 500
+
+
+def _free_seats(seats):
+    # """Đưa các ghế (id, show_time_id, status) về trống, bỏ dấu soát vé, ghi sự kiện và làm mới seatmap sau commit"""
+    Seat.objects.filter(id__in=[seat_id for seat_id, _, _ in seats]).exclude(status='available').update(
+        status='available', checked_in_at=None
+    )
+    events.record_many(('seat', seat_id, show_time_id, 'status', status, 'available') for seat_id, show_time_id, status in seats)
+    show_time_ids = {show_time_id for _, show_time_id, _ in seats}
+
+    def invalidate_seatmaps():
+        for show_time_id in show_time_ids:
+            seatmap.invalidate(show_time_id)
+    transaction.on_commit(invalidate_seatmaps)
+
+
+def release_seats(booking_ids):
+    """
+    Trả ghế của các booking về 'available' (gọi trong transaction). Ghế đã thuộc
+    một booking khác còn hiệu lực thì giữ nguyên. Trả về số ghế đã trả.
+    """
+    links = list(Booking.seats.through.objects.filter(booking_id__in=booking_ids).values_list('seat_id', flat=True))
+    if not links:
+        return 0
+    held_elsewhere = Booking.seats.through.objects.filter(
+        seat_id__in=links, booking__payment_status__in=ACTIVE_STATUSES
+    ).exclude(booking_id__in=booking_ids).values_list('seat_id', flat=True)
+    seats = list(
+        Seat.objects.filter(id__in=links).exclude(status='available').exclude(id__in=list(held_elsewhere))
+        .values_list('id', 'show_time_id', 'status')
+    )
+    if seats:
+        _free_seats(seats)
+    return len(seats)
+
+
+def release_orphaned_seats(seat_ids, dry_run=False):
+    """
+    Trong các ghế seat_ids, trả lại những ghế 'booked' không thuộc booking nào còn
+    hiệu lực (ghế "mồ côi"). Ghế 'reserved' do nhân viên giữ tay nên không đụng tới.
+    Trả về (số ghế 'booked' đã xét, số ghế mồ côi).
+    """
+    with transaction.atomic():
+        seats = list(Seat.objects.filter(id__in=seat_ids, status='booked').values_list('id', 'show_time_id', 'status'))
+        if not seats:
+            return 0, 0
+        held = set(Booking.seats.through.objects.filter(
+            seat_id__in=[seat_id for seat_id, _, _ in seats], booking__payment_status__in=ACTIVE_STATUSES
+        ).values_list('seat_id', flat=True))
+        orphaned = [seat for seat in seats if seat[0] not in held]
+        if orphaned and not dry_run:
+            _free_seats(orphaned)
+    return len(seats), len(orphaned)
+
+
+def reconcile_seats(start, stop, dry_run=False):
+    # """release_orphaned_seats cho các ghế có id trong [start, stop), trong một transaction ngắn"""
+    with transaction.atomic():
+        seat_ids = list(Seat.objects.filter(id__gte=start, id__lt=stop, status='booked').values_list('id', flat=True))
+        return release_orphaned_seats(seat_ids, dry_run)
+
+
+def transition_bookings(booking_ids, new_status):
+    """
+    Chuyển nhiều booking (và Payment của chúng) sang `new_status` trong một
+    transaction bằng UPDATE có điều kiện theo trạng thái cũ. Trả về kết quả theo
+    đúng thứ tự booking_ids: {'id', 'success', 'old_status' | 'error'}.
+    """
+    if new_status not in TRANSITIONS:
+        raise BookingError('Trạng thái không hợp lệ')
+    booking_ids = parse_ids(booking_ids, 'Mã booking không hợp lệ!')
+    if len(booking_ids) > MAX_TRANSITION_BATCH:
+        raise BookingError(f'Tối đa {MAX_TRANSITION_BATCH} booking mỗi lần')
+
+    labels = dict(Booking.PAYMENT_STATUS)
+    results = {booking_id: {'id': booking_id, 'success': False, 'error': 'Không tìm thấy booking'}
+               for booking_id in booking_ids}
+    now = timezone.now()
+    with transaction.atomic():
+        rows = Booking.objects.filter(id__in=booking_ids).values_list(
+            'id', 'user_id', 'show_time_id', 'booking_date', 'payment_status', 'booking_status'
+        )
+        by_old_status = {}
+        for booking_id, user_id, show_time_id, booking_date, old_status, old_booking_status in rows:
+            if old_status == new_status:
+                results[booking_id] = {'id': booking_id, 'success': False,
+                                       'error': f'Đã ở trạng thái {labels[new_status]}'}
+            elif new_status not in TRANSITIONS.get(old_status, ()):
+                results[booking_id] = {'id': booking_id, 'success': False,
+                                       'error': f'Không thể chuyển từ {labels.get(old_status, old_status)} sang {labels[new_status]}'}
+            else:
+                by_old_status.setdefault(old_status, []).append(
+                    (booking_id, user_id, show_time_id, booking_date, old_booking_status)
+                )
+
+        booking_status = BOOKING_STATUS_FOR.get(new_status, 'pending')
+        changed = []
+        for old_status, group in by_old_status.items():
+            ids = [booking_id for booking_id, *_ in group]
+            count = Booking.objects.filter(id__in=ids, payment_status=old_status).update(
+                payment_status=new_status, booking_status=booking_status, updated_at=now
+            )
+            updated = set(ids)
+            if count != len(ids):
+                # Có booking bị đổi trạng thái giữa lúc đọc và lúc UPDATE: chỉ tính các dòng chính UPDATE này ghi
+                updated = set(Booking.objects.filter(
+                    id__in=ids, payment_status=new_status, updated_at=now
+                ).values_list('id', flat=True))
+            for booking_id, user_id, show_time_id, booking_date, old_booking_status in group:
+                if booking_id not in updated:
+                    results[booking_id] = {'id': booking_id, 'success': False,
+                                           'error': 'Trạng thái booking vừa thay đổi, vui lòng thử lại'}
+                    continue
+                results[booking_id] = {'id': booking_id, 'success': True, 'old_status': old_status}
+                changed.append((booking_id, user_id, show_time_id, booking_date, old_status, old_booking_status))
+        if not changed:
+            return [results[booking_id] for booking_id in booking_ids]
+
+        changed_ids = [booking_id for booking_id, *_ in changed]
+        payment_status = PAYMENT_STATUS_FOR[new_status]
+        payment_rows = list(
+            Payment.objects.filter(booking_id__in=changed_ids).exclude(payment_status=payment_status)
+            .values_list('id', 'booking__show_time_id', 'payment_status')
+        )
+        payment_updates = {'payment_status': payment_status, 'updated_at': now}
+        if new_status == 'paid':
+            payment_updates['payment_date'] = now
+        Payment.objects.filter(id__in=[payment_id for payment_id, _, _ in payment_rows]).update(**payment_updates)
+
+        if new_status in RELEASING_STATUSES:
+            release_seats(changed_ids)
+
+        # update() không gửi signal: tự ghi nhật ký sự kiện, outbox thông báo và làm mới doanh số
+        event_rows = []
+        for booking_id, user_id, show_time_id, booking_date, old_status, old_booking_status in changed:
+            event_rows.append(('booking', booking_id, show_time_id, 'payment_status', old_status, new_status))
+            if old_booking_status != booking_status:
+                event_rows.append(('booking', booking_id, show_time_id, 'booking_status', old_booking_status, booking_status))
+        event_rows.extend(
+            ('payment', payment_id, show_time_id, 'payment_status', old, payment_status)
+            for payment_id, show_time_id, old in payment_rows
+        )
+        events.record_many(event_rows)
+        notifications.enqueue_many(
+            Booking(id=booking_id, user_id=user_id, payment_status=new_status)
+            for booking_id, user_id, *_ in changed
+        )
+        show_times_by_day = {}
+        for _, _, show_time_id, booking_date, _, _ in changed:
+            show_times_by_day.setdefault(timezone.localdate(booking_date), set()).add(show_time_id)
+
+        def refresh_rollups():
+            for day, show_time_ids in show_times_by_day.items():
+                rollups.rebuild(day, day, list(show_time_ids))
+        transaction.on_commit(refresh_rollups)
+    return [results[booking_id] for booking_id in booking_ids]
+
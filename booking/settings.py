@@ -31,7 +31,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'booking.middleware.LeanSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -52,6 +52,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'booking.context_processors.user_roles',
             ],
         },
     },
@@ -64,9 +65,142 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Giữ khóa ghi ngay từ BEGIN: transaction đọc-rồi-ghi (claim_seats) sẽ chờ tới lượt
+        # thay vì lỗi "database is locked" khi nâng khóa giữa chừng
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Authentication: nạp UserProfile cùng User trong một truy vấn
+AUTHENTICATION_BACKENDS = [
+    'booking.backends.ProfileModelBackend',
+    # Giữ lại: session đăng nhập trước đây lưu tên backend này, bỏ đi thì mọi người bị đăng xuất
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Cache: mặc định LocMemCache (LRU trong từng process). Đặt REDIS_URL để mọi process dùng chung
+# Redis: single-flight giữa các process, xóa theo tag, giới hạn tốc độ và phòng chờ mới có hiệu lực toàn hệ thống
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'moviebooking',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'moviebooking',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Cache dữ liệu trang (booking/caching.py): số giây còn tươi, số giây được trả giá trị cũ trong lúc
+# làm mới ở nền, hệ số hết hạn sớm (XFetch, 0 = tắt) và thời gian tối đa chờ một lần tính
+CACHING_TIMEOUT = 300
+CACHING_STALE_TIMEOUT = 60
+CACHING_BETA = 1.0
+CACHING_LOCK_TIMEOUT = 10
+
+# Sessions: có cache dùng chung (Redis) thì đọc từ cache, chỉ ghi xuống DB khi session thay đổi.
+# Với LocMemCache, đăng xuất ở một worker không xóa được bản session đã cache ở các worker khác,
+# nên lưu session trong cookie đã ký (session chỉ chứa thông tin đăng nhập): không đọc/ghi DB
+if os.environ.get('REDIS_URL'):
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+
+# Messages lưu trong cookie để trang của khách không phải ghi session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Rate limiting (booking/ratelimit.py): số request cho phép trên mỗi user/IP
+RATELIMIT_ENABLE = True
+RATELIMIT_CACHE = 'default'
+# Ghi đè hoặc thêm policy so với ratelimit.DEFAULT_POLICIES, VD: {'login': {'rate': '20/m'}}
+RATELIMIT_POLICIES = {}
+
+# Số ghế mỗi hàng khi tự sinh ghế cho suất chiếu (A1..A10, B1..)
+SEATS_PER_ROW = 10
+
+# Thời gian dọn phòng giữa hai suất chiếu liên tiếp (phút)
+SCHEDULE_BUFFER_MINUTES = 15
+
+# Khóa ký mã vé QR (booking/tickets.py); để trống sẽ dẫn xuất từ SECRET_KEY
+TICKET_SIGNING_KEY = os.environ.get('TICKET_SIGNING_KEY', '')
+
+# Render vé PDF/PNG (booking/ticket_render.py): thư mục cache và font có dấu tiếng Việt
+TICKET_RENDER_DIR = BASE_DIR / 'media' / 'tickets'
+TICKET_FONT_PATH = os.environ.get('TICKET_FONT_PATH', '')
+
+# Chỉ mục autocomplete trong bộ nhớ (booking/search_index.py) tự dựng lại sau N giây
+SEARCH_INDEX_TTL = 300
+
+# Cache khối tổng hợp đánh giá theo phim (booking/reviews.py), giây
+REVIEW_SUMMARY_CACHE_TIMEOUT = 600
+
+# Cache gợi ý phim (booking/recommendations.py), tính bằng giây
+RECOMMENDATION_CACHE_TIMEOUT = 3600
+RECOMMENDATION_USER_CACHE_TIMEOUT = 600
+
+# Điểm xu hướng (booking/trending.py): chu kỳ bán rã và thời gian giữ bộ đếm theo giờ
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_ACTIVITY_RETENTION_DAYS = 90
+
+# Giá vé động (booking/pricing.py): làm tròn (VNĐ), thời gian giữ bộ luật đã biên dịch và cache giá theo suất chiếu (giây)
+PRICING_ROUND_TO = 1000
+PRICING_RULES_TTL = 60
+PRICING_CACHE_TIMEOUT = 60
+
+# Chỉ mục đoạn ghế trống theo hàng cho API best-seats (booking/seatmap.py), giây
+SEATMAP_CACHE_TIMEOUT = 300
+
+# Phòng chờ (booking/waiting_room.py): hạn của vé vào (giây) và số người được vào ngay khi mở (None = bằng admission_rate)
+WAITING_ROOM_PASS_TTL = 600
+WAITING_ROOM_BURST = None
+# Số thứ tự và giờ mở hàng đợi nằm trong cache: nhiều worker thì cache phải dùng chung (REDIS_URL).
+# True = chỉ chạy một process (runserver) nên cho phép dùng LocMemCache; nếu không, admin không cho bật phòng chờ
+WAITING_ROOM_SINGLE_PROCESS = DEBUG
+
+# Thông báo qua outbox (booking/notifications.py, lệnh dispatch_notifications).
+# Local ghi thư ra file trong EMAIL_FILE_PATH; production đặt NOTIFICATION_EMAIL_BACKEND là SMTP backend
+NOTIFICATION_EMAIL_BACKEND = os.environ.get('NOTIFICATION_EMAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend')
+EMAIL_FILE_PATH = BASE_DIR / 'media' / 'emails'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'MovieBooking <no-reply@moviebooking.local>')
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_MAX_ATTEMPTS = 5
+# Lần thử lại thứ n chờ NOTIFICATION_RETRY_DELAY * 2^(n-1) giây
+NOTIFICATION_RETRY_DELAY = 60
+# Lô 'sending' quá N giây (dispatcher chết giữa chừng) được nhận lại
+NOTIFICATION_CLAIM_TIMEOUT = 300
+
+# Nhật ký sự kiện (booking/events.py): số ngày giữ lại trước khi consume_events --prune xóa
+EVENT_LOG_RETENTION_DAYS = 90
+
+# Lệnh reconcile_seats: số id ghế xét trong mỗi transaction
+SEAT_RECONCILE_CHUNK_SIZE = 5000
+
+# Lệnh check_integrity (booking/integrity.py): số id suất chiếu mỗi khoảng và số thread chạy song song
+INTEGRITY_CHUNK_SIZE = 200
+INTEGRITY_WORKERS = 4
+
+# Lưu trữ (booking/archive.py, lệnh archive_showtimes): suất chiếu cũ hơn N ngày, mỗi lô N suất chiếu.
+# Giữ lâu hơn khoảng lịch sử của compute_occupancy (365 ngày)
+ARCHIVE_AFTER_DAYS = 400
+ARCHIVE_CHUNK_SIZE = 50
+
+# Sao lưu online (booking/backup.py, lệnh backup_db/restore_db): mỗi bước chép N trang rồi nghỉ N giây;
+# bị ghi xen vào quá BACKUP_MAX_RESTARTS lần thì chép nốt trong một bước. Giữ BACKUP_KEEP bản mới nhất
+BACKUP_DIR = BASE_DIR / 'backups'
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.05
+BACKUP_MAX_RESTARTS = 3
+BACKUP_KEEP = 14
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,146 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching, events, notifications, pricing, reviews, rollups, search_index, services, ticket_render, waiting_room
+from .models import Booking, Genre, Movie, Payment, PricingRule, Review, Seat, ShowTime
+
+
+@receiver(post_save, sender=Movie)
+def movie_saved(sender, instance, **kwargs):
+    # Cập nhật chỉ mục tìm kiếm sau khi transaction commit (không áp dụng thay đổi bị rollback)
+    transaction.on_commit(lambda: search_index.index.update(instance))
+
+
+@receiver(post_delete, sender=Movie)
+def movie_deleted(sender, instance, **kwargs):
+    movie_id = instance.id
+    transaction.on_commit(lambda: search_index.index.remove(movie_id))
+
+
+@receiver(post_save, sender=Genre)
+def genre_saved(sender, instance, created, **kwargs):
+    # Đổi tên thể loại ảnh hưởng nhiều phim: dựng lại chỉ mục ở lần tra cứu sau
+    if not created:
+        transaction.on_commit(search_index.index.invalidate)
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def movie_changed(sender, instance, **kwargs):
+    # Danh sách phim trang chủ và lịch chiếu đã cache của phim (booking/caching.py)
+    movie_id = instance.id
+    transaction.on_commit(lambda: caching.invalidate_tags('movies', f'movie:{movie_id}'))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: caching.invalidate_tags('movies'))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    # Tính lại ô doanh số chứa booking này sau khi commit
+    booking_date, show_time_id = instance.booking_date, instance.show_time_id
+    transaction.on_commit(lambda: rollups.refresh_booking(booking_date=booking_date, show_time_id=show_time_id))
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, **kwargs):
+    # Ghi outbox ngay (không on_commit): Booking.save bọc trong atomic nên cùng transaction với booking
+    notifications.enqueue_for_booking(instance)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def booking_tickets_changed(sender, instance, **kwargs):
+    # Xóa file vé đã render sau khi commit; lần in sau render lại từ dữ liệu mới
+    booking_id = instance.id
+    transaction.on_commit(lambda: ticket_render.invalidate(booking_id))
+
+
+@receiver(m2m_changed, sender=Booking.seats.through)
+def booking_seats_changed(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Booking):
+        booking_changed(Booking, instance)
+        booking_tickets_changed(Booking, instance)
+
+
+@receiver(post_save, sender=Seat)
+@receiver(pre_delete, sender=Seat)
+def seat_tickets_changed(sender, instance, **kwargs):
+    # Số ghế in trên vé của các booking giữ ghế này; lúc xóa phải đọc trước khi liên kết bị xóa theo
+    booking_ids = list(instance.bookings.values_list('id', flat=True))
+    if booking_ids:
+        transaction.on_commit(lambda: ticket_render.invalidate(*booking_ids))
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def payment_changed(sender, instance, **kwargs):
+    # Đổi phương thức thanh toán chuyển booking sang ô khác; booking đã bị xóa thì bỏ qua
+    booking_id = instance.booking_id
+    transaction.on_commit(lambda: rollups.refresh_booking(booking_id))
+
+
+@receiver(post_save, sender=PricingRule)
+@receiver(post_delete, sender=PricingRule)
+def pricing_rule_changed(sender, instance, **kwargs):
+    # Biên dịch lại bộ luật giá ở lần báo giá tiếp theo
+    transaction.on_commit(pricing.invalidate)
+
+
+@receiver(post_save, sender=ShowTime)
+def show_time_saved(sender, instance, **kwargs):
+    # admission_rate được cache cho hàng đợi; đọc lại sau khi sửa suất chiếu
+    show_time_id = instance.id
+    transaction.on_commit(lambda: waiting_room.reset_rate(show_time_id))
+
+
+@receiver(post_save, sender=ShowTime)
+@receiver(post_delete, sender=ShowTime)
+def show_time_changed(sender, instance, **kwargs):
+    movie_id = instance.movie_id
+    transaction.on_commit(lambda: caching.invalidate_tags(f'movie:{movie_id}'))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    movie_id = instance.movie_id
+    transaction.on_commit(lambda: reviews.invalidate(movie_id))
+
+
+@receiver(post_save, sender=Booking)
+def booking_released(sender, instance, created, **kwargs):
+    # Booking vừa sang hủy/hết hạn/hoàn tiền qua save() (admin, view): trả ghế trong cùng transaction.
+    # Phải đăng ký trước tracked_saved, vì tracked_saved ghi đè _tracked bằng giá trị mới
+    old_status = getattr(instance, '_tracked', {}).get('payment_status')
+    if (not created and instance.payment_status in services.RELEASING_STATUSES
+            and old_status not in services.RELEASING_STATUSES):
+        services.release_seats([instance.id])
+
+
+@receiver(pre_delete, sender=Booking)
+def booking_deleting(sender, instance, **kwargs):
+    # Xóa booking còn hiệu lực: trả ghế trước khi liên kết ghế bị xóa theo
+    if instance.payment_status not in services.RELEASING_STATUSES:
+        services.release_seats([instance.id])
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Seat)
+@receiver(post_save, sender=Payment)
+def tracked_saved(sender, instance, created, **kwargs):
+    # Ghi nhật ký sự kiện trong transaction của save (TrackedModel.save)
+    events.instance_saved(instance, created)
+
+
+@receiver(post_delete, sender=Booking)
+@receiver(post_delete, sender=Seat)
+@receiver(post_delete, sender=Payment)
+def tracked_deleted(sender, instance, **kwargs):
+    events.instance_deleted(instance)
+
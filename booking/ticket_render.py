@@ -0,0 +1,197 @@
+"""
+Render vé ra PNG/PDF phía server, có cache file theo nội dung.
+
+Tên file là hash SHA-256 của toàn bộ dữ liệu in trên vé (phim, rạp, suất chiếu,
+ghế, mã QR...), nên khi booking thay đổi thì hash đổi và vé được render lại; in
+lại vé không đổi chỉ là đọc file có sẵn. Render hàng loạt (vé nhóm cho email,
+kiosk) chạy trong process pool qua render_bookings().
+"""
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+
+from .tickets import ticket_tokens
+
+try:
+    import qrcode
+except ImportError:  # QR chỉ hiển thị dạng chữ nếu chưa cài thư viện qrcode
+    qrcode = None
+
+RENDER_VERSION = 1
+FORMATS = {'png': 'image/png', 'pdf': 'application/pdf'}
+TICKET_SIZE = (800, 360)
+
+
+def cache_dir():
+    return Path(getattr(settings, 'TICKET_RENDER_DIR', Path(settings.MEDIA_ROOT) / 'tickets'))
+
+
+def ticket_data(booking):
+    # """Dữ liệu in trên từng vé (mỗi ghế một vé) của booking"""
+    show_time = booking.show_time
+    payment = getattr(booking, 'payment', None)
+    return [
+        {
+            'booking_id': booking.id,
+            'movie': show_time.movie.title,
+            'cinema': show_time.screen.cinema.name,
+            'screen': show_time.screen.name,
+            'date': show_time.date.strftime('%d/%m/%Y'),
+            'time': show_time.time.strftime('%H:%M'),
+            'seat': seat.seat_number,
+            # Booking cũ (trước giá động) không lưu giá từng ghế: giá phẳng của suất chiếu
+            'price': f'{Decimal(booking.seat_prices.get(seat.seat_number, show_time.price)):,.0f} VNĐ',
+            'payment_method': payment.get_payment_method_display() if payment else '',
+            'token': token,
+        }
+        for seat, token in ticket_tokens(booking)
+    ]
+
+
+def content_hash(tickets, fmt):
+    payload = json.dumps([RENDER_VERSION, fmt, tickets], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def cache_path(booking_id, tickets, fmt):
+    return cache_dir() / f'{booking_id % 256:02x}' / f'{booking_id}-{content_hash(tickets, fmt)}.{fmt}'
+
+
+FONT_CANDIDATES = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+    'C:/Windows/Fonts/arial.ttf',
+]
+
+
+@lru_cache(maxsize=None)
+def _font(size):
+    # Font mặc định của Pillow không có dấu tiếng Việt, ưu tiên font TrueType
+    from PIL import ImageFont
+    candidates = [getattr(settings, 'TICKET_FONT_PATH', '')] + FONT_CANDIDATES
+    for font_path in candidates:
+        if font_path and os.path.exists(font_path):
+            return ImageFont.truetype(font_path, size)
+    return ImageFont.load_default(size)
+
+
+def render_ticket_image(ticket):
+    # """Vẽ một vé (một ghế); hàm thuần, chạy được trong process con"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', TICKET_SIZE, 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, TICKET_SIZE[0], 60], fill='#e50914')
+    draw.text((24, 14), ticket['movie'][:40], fill='white', font=_font(30))
+
+    label, value = _font(16), _font(22)
+    rows = [
+        ('Rạp', f"{ticket['cinema']} - {ticket['screen']}"),
+        ('Suất chiếu', f"{ticket['time']}  {ticket['date']}"),
+        ('Ghế', ticket['seat']),
+        ('Giá vé', ticket['price']),
+        ('Thanh toán', ticket['payment_method']),
+    ]
+    y = 80
+    for name, text in rows:
+        draw.text((24, y), name, fill='#6c757d', font=label)
+        draw.text((160, y - 3), text, fill='#212529', font=value)
+        y += 44
+    draw.text((24, TICKET_SIZE[1] - 34), f"Mã đặt vé #{ticket['booking_id']}", fill='#e50914', font=label)
+
+    box = 220
+    left, top = TICKET_SIZE[0] - box - 24, 80
+    if qrcode is not None:
+        qr = qrcode.make(ticket['token'], border=1).convert('RGB').resize((box, box))
+        image.paste(qr, (left, top))
+    else:
+        draw.rectangle([left, top, left + box, top + box], outline='#dee2e6', width=2)
+        token = ticket['token']
+        for line, start in enumerate(range(0, len(token), 12)):
+            draw.text((left + 12, top + 12 + line * 24), token[start:start + 12],
+                      fill='#212529', font=label)
+    return image
+
+
+def render(tickets, fmt):
+    # """Ghép các vé của một booking: PNG xếp dọc, PDF mỗi vé một trang"""
+    from PIL import Image
+
+    images = [render_ticket_image(ticket) for ticket in tickets]
+    buffer = io.BytesIO()
+    if fmt == 'pdf':
+        images[0].save(buffer, format='PDF', save_all=True, append_images=images[1:], resolution=150)
+    else:
+        sheet = Image.new('RGB', (TICKET_SIZE[0], TICKET_SIZE[1] * len(images)), 'white')
+        for i, image in enumerate(images):
+            sheet.paste(image, (0, i * TICKET_SIZE[1]))
+        sheet.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_to_file(job):
+    # """(tickets, fmt, path) -> path; hàm thuần để chạy trong process pool"""
+    tickets, fmt, path = job
+    _write(path, render(tickets, fmt))
+    return path
+
+
+def _write(path, content):
+    # Ghi file tạm rồi rename để tiến trình khác không đọc phải file dở dang
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'{path.suffix}.{os.getpid()}.tmp')
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+    # Xóa các bản render cũ của cùng booking/định dạng
+    for stale in path.parent.glob(f'{path.name.split("-")[0]}-*{path.suffix}'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+def get_ticket_file(booking, fmt):
+    # """Đường dẫn file vé đã render (render và lưu cache nếu chưa có)"""
+    tickets = ticket_data(booking)
+    if not tickets:
+        return None
+    path = cache_path(booking.id, tickets, fmt)
+    if not path.exists():
+        render_to_file((tickets, fmt, path))
+    return path
+
+
+def render_bookings(bookings, formats=('pdf', 'png'), workers=None):
+    """
+    Render trước vé cho nhiều booking (email, kiosk) bằng process pool.
+    Bỏ qua các vé đã có trong cache. Trả về số file đã render mới.
+    """
+    jobs = []
+    for booking in bookings:
+        tickets = ticket_data(booking)
+        if not tickets:
+            continue
+        for fmt in formats:
+            path = cache_path(booking.id, tickets, fmt)
+            if not path.exists():
+                jobs.append((tickets, fmt, path))
+    if not jobs:
+        return 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(render_to_file, jobs, chunksize=8):
+            pass
+    return len(jobs)
+
+
+def invalidate(*booking_ids):
+    # """Xóa mọi bản render của các booking (booking đổi/bị xóa, lưu trữ)"""
+    for booking_id in booking_ids:
+        folder = cache_dir() / f'{booking_id % 256:02x}'
+        for path in folder.glob(f'{booking_id}-*'):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,145 @@
+"""
+Điểm xu hướng (trending) của phim từ hoạt động gần đây, giảm dần theo thời gian.
+
+Hoạt động được đếm theo từng giờ trong MovieActivity: lượt xem ghi trực tiếp
+khi mở trang phim, đặt vé và đánh giá được lệnh update_trending gom từ bảng
+Booking/Review. Điểm của một phim là
+
+    score = sum(trọng số * số lượng * exp(-lambda * tuổi của giờ đó))
+
+với lambda = ln 2 / TRENDING_HALF_LIFE_HOURS. Nhờ tính chất của hàm mũ, mỗi lần
+chạy chỉ cần nhân điểm cũ với exp(-lambda * thời gian trôi qua) rồi cộng thêm các
+giờ mới, không phải quét lại toàn bộ lịch sử.
+"""
+import math
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Booking, Movie, MovieActivity, Review
+
+WEIGHTS = {'views': 1.0, 'bookings': 5.0, 'reviews': 3.0}
+BUCKET = timedelta(hours=1)
+# Lần chạy đầu tiên chỉ xét hoạt động trong khoảng này
+INITIAL_WINDOW = timedelta(days=7)
+# Điểm nhỏ hơn ngưỡng này được đưa về 0 để phim cũ rời khỏi danh sách
+MIN_SCORE = 0.01
+HOT_CACHE_TIMEOUT = 300
+
+
+def bucket_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def decay_rate():
+    return math.log(2) / (getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24) * 3600)
+
+
+def record_view(movie_id):
+    # """Tăng bộ đếm lượt xem của giờ hiện tại"""
+    bucket = bucket_start(timezone.now())
+    updated = MovieActivity.objects.filter(movie_id=movie_id, bucket=bucket).update(views=F('views') + 1)
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            MovieActivity.objects.create(movie_id=movie_id, bucket=bucket, views=1)
+    except IntegrityError:
+        # Request khác vừa tạo dòng của giờ này
+        MovieActivity.objects.filter(movie_id=movie_id, bucket=bucket).update(views=F('views') + 1)
+
+
+def collect_events(start, end):
+    # """Gom số đặt vé/đánh giá theo phim và giờ trong [start, end) vào MovieActivity"""
+    counts = defaultdict(lambda: {'bookings': 0, 'reviews': 0})
+    bookings = Booking.objects.filter(booking_date__gte=start, booking_date__lt=end).annotate(
+        hour=TruncHour('booking_date')
+    ).values_list('show_time__movie_id', 'hour').annotate(total=Count('id'))
+    for movie_id, hour, total in bookings:
+        counts[movie_id, hour]['bookings'] = total
+    reviews = Review.objects.filter(created_at__gte=start, created_at__lt=end).annotate(
+        hour=TruncHour('created_at')
+    ).values_list('movie_id', 'hour').annotate(total=Count('id'))
+    for movie_id, hour, total in reviews:
+        counts[movie_id, hour]['reviews'] = total
+    if not counts:
+        return 0
+
+    existing = {
+        (row.movie_id, row.bucket): row
+        for row in MovieActivity.objects.filter(bucket__gte=start, bucket__lt=end)
+    }
+    to_create, to_update = [], []
+    for (movie_id, hour), values in counts.items():
+        row = existing.get((movie_id, hour))
+        if row is None:
+            to_create.append(MovieActivity(movie_id=movie_id, bucket=hour, **values))
+        else:
+            row.bookings, row.reviews = values['bookings'], values['reviews']
+            to_update.append(row)
+    MovieActivity.objects.bulk_create(to_create, batch_size=1000)
+    MovieActivity.objects.bulk_update(to_update, ['bookings', 'reviews'], batch_size=1000)
+    return len(counts)
+
+
+def update_trending(now=None):
+    # """Cập nhật điểm xu hướng tới đầu giờ hiện tại (chỉ xét các giờ đã kết thúc)"""
+    started = time.perf_counter()
+    end = bucket_start(now or timezone.now())
+    rate = decay_rate()
+    with transaction.atomic():
+        # Đọc mốc trong transaction (khóa ghi của SQLite): hai lượt chạy cùng lúc không cùng giảm điểm một khoảng
+        last = Movie.objects.aggregate(last=Max('trending_at'))['last']
+        start = last or end - INITIAL_WINDOW
+        if start >= end:
+            return {'skipped': True, 'movies': 0, 'elapsed': time.perf_counter() - started}
+
+        collect_events(start, end)
+
+        contributions = defaultdict(float)
+        rows = MovieActivity.objects.filter(bucket__gte=start, bucket__lt=end).values_list(
+            'movie_id', 'bucket', 'views', 'bookings', 'reviews'
+        )
+        for movie_id, bucket, views, bookings, reviews in rows:
+            age = (end - bucket - BUCKET).total_seconds()
+            weight = WEIGHTS['views'] * views + WEIGHTS['bookings'] * bookings + WEIGHTS['reviews'] * reviews
+            contributions[movie_id] += weight * math.exp(-rate * age)
+
+        # Giảm điểm mọi phim bằng một câu UPDATE, rồi cộng phần đóng góp mới
+        factor = math.exp(-rate * (end - last).total_seconds()) if last else 0
+        Movie.objects.update(trending_score=F('trending_score') * factor, trending_at=end)
+        movies = Movie.objects.filter(id__in=list(contributions)).only('id', 'trending_score')
+        for movie in movies:
+            movie.trending_score += contributions[movie.id]
+        Movie.objects.bulk_update(movies, ['trending_score'], batch_size=1000)
+        Movie.objects.filter(trending_score__gt=0, trending_score__lt=MIN_SCORE).update(trending_score=0)
+
+    retention = getattr(settings, 'TRENDING_ACTIVITY_RETENTION_DAYS', 90)
+    MovieActivity.objects.filter(bucket__lt=end - timedelta(days=retention)).delete()
+    cache.delete_many([f'trending:hot:{limit}' for limit in (5, 6, 10)])
+    return {
+        'skipped': False,
+        'start': start,
+        'end': end,
+        'movies': len(contributions),
+        'elapsed': time.perf_counter() - started,
+    }
+
+
+def hot_movies(limit=6):
+    # """Danh sách phim xu hướng đã tính sẵn (có cache); chưa có điểm thì dùng các phim đánh dấu hot"""
+    key = f'trending:hot:{limit}'
+    movies = cache.get(key)
+    if movies is None:
+        movies = list(Movie.objects.filter(is_active=True, trending_score__gt=0).order_by('-trending_score')[:limit])
+        if not movies:
+            movies = list(Movie.objects.filter(is_active=True, is_hot=True).order_by('-views_count')[:limit])
+        cache.set(key, movies, HOT_CACHE_TIMEOUT)
+    return movies
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from django.contrib import admin
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -8,6 +8,7 @@ urlpatterns = [
     path('movie/<int:movie_id>/', views.movie_detail, name='movie_detail'),
     path('movie/<int:movie_id>/booking/', views.booking_info, name='booking_info'),
     path('booking/<int:show_time_id>/', views.booking_seats, name='booking_seats'),
+    path('booking/<int:show_time_id>/queue/', views.waiting_room, name='waiting_room'),
     path('booking/confirmation/<int:booking_id>/', views.booking_confirmation, name='booking_confirmation'),
     path('payment/method/<int:booking_id>/', views.payment_method, name='payment_method'),
     path('payment/bank-transfer/<int:booking_id>/', views.bank_transfer, name='bank_transfer'),
@@ -15,16 +16,35 @@ urlpatterns = [
     path('payment/vnpay/<int:booking_id>/', views.vnpay_payment, name='vnpay_payment'),
     path('payment/confirmation/<int:booking_id>/', views.payment_confirmation, name='payment_confirmation'),
     path('print-ticket/<int:booking_id>/', views.print_ticket, name='print_ticket'),
+    path('print-ticket/<int:booking_id>/<str:fmt>/', views.download_ticket, name='download_ticket'),
     path('my-bookings/', views.my_bookings, name='my_bookings'),
+    path('my-bookings/archived/<int:booking_id>/restore/', views.restore_archived_booking, name='restore_archived_booking'),
     path('login/', views.custom_login, name='login'),
     path('register/', views.register, name='register'),
     path('profile/', views.profile, name='profile'),
     path('change-password/', views.change_password, name='change_password'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/occupancy/', views.occupancy_dashboard, name='occupancy_dashboard'),
+    path('admin-dashboard/cache-stats/', views.cache_stats, name='cache_stats'),
     path('admin-dashboard/booking/<int:booking_id>/update-status/', views.update_booking_status, name='update_booking_status'),
+    path('admin-dashboard/bookings/update-status/', views.update_booking_statuses, name='update_booking_statuses'),
     path('review/<int:movie_id>/', views.add_review, name='add_review'),
     path('review/<int:review_id>/edit/', views.edit_review, name='edit_review'),
     path('review/<int:review_id>/delete/', views.delete_review, name='delete_review'),
     path('get-seats/<int:show_time_id>/', views.get_seats_ajax, name='get_seats_ajax'),
+    path('checkin/', views.check_in_ticket, name='check_in_ticket'),
     path('logout/', views.custom_logout, name='logout'),
+    
+    # API JSON cho front-end
+    path('api/movies/', api.movies, name='api_movies'),
+    path('api/movies/<int:movie_id>/', api.movie, name='api_movie'),
+    path('api/movies/<int:movie_id>/showtimes/', api.showtimes, name='api_showtimes'),
+    path('api/movies/<int:movie_id>/reviews/', api.movie_reviews, name='api_movie_reviews'),
+    path('api/search/', api.search, name='api_search'),
+    path('api/showtimes/<int:show_time_id>/seats/', api.seats, name='api_seats'),
+    path('api/showtimes/<int:show_time_id>/best-seats/', api.best_seats, name='api_best_seats'),
+    path('api/showtimes/<int:show_time_id>/seat-events/', api.seat_events, name='api_seat_events'),
+    path('api/showtimes/<int:show_time_id>/queue/', api.queue, name='api_queue'),
+    path('api/bookings/', api.bookings, name='api_bookings'),
+    path('api/payments/', api.payments, name='api_payments'),
 ] 
\ No newline at end of file
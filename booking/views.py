@@ -3,55 +3,93 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg, Count
+from django.db.models import Q, Avg, Count, F
 from django.utils import timezone
 from .models import *
 from .forms import *
+from .api import encode_cursor
+from .ratelimit import ratelimit
+from .reviews import review_page, review_summary
+from .services import BookingError, claim_seats, transition_bookings
+from .tickets import MAX_BATCH_SIZE, check_in, ticket_tokens
+from .waiting_room import is_admitted, waiting_room_required
+from . import analytics, archive, caching, pricing, recommendations, rollups, ticket_render, trending
 
 # """Kiểm tra user có phải là staff hoặc admin không"""
 def is_staff_or_admin(user):
-    return user.is_authenticated and (user.is_staff or hasattr(user, 'profile') and user.profile.user_type in ['staff', 'admin'])
+    if not user.is_authenticated:
+        return False
+    # Ghi nhớ kết quả trên chính object user (sống trong 1 request)
+    cached = getattr(user, '_is_staff_or_admin', None)
+    if cached is None:
+        cached = user.is_staff or (hasattr(user, 'profile') and user.profile.user_type in ['staff', 'admin'])
+        user._is_staff_or_admin = cached
+    return cached
 
 
+# Thứ tự sắp xếp danh sách phim ở trang chủ (MovieSearchForm.sort_by)
+MOVIE_ORDERINGS = {
+    'latest': '-release_date',
+    'rating': '-rating',
+    'views': '-views_count',
+    'price_low': 'price',
+    'price_high': '-price',
+}
+
+def filter_movies(search, genre_id, sort_by):
+    # """Danh sách phim đang chiếu theo bộ lọc của trang chủ"""
+    movies = Movie.objects.filter(is_active=True).select_related('genre')
+    if search:
+        movies = movies.filter(
+            Q(title__icontains=search) | 
+            Q(description__icontains=search)
+        )
+    if genre_id:
+        movies = movies.filter(genre_id=genre_id)
+    if sort_by in MOVIE_ORDERINGS:
+        movies = movies.order_by(MOVIE_ORDERINGS[sort_by])
+    return list(movies)
+
+@caching.cached('home_movies', timeout=120, tags=['movies'])
+def movie_list(genre_id, sort_by):
+    # """Danh sách phim của trang chủ khi không tìm kiếm (có cache, xóa khi phim/thể loại đổi)"""
+    # Chỉ cache theo genre_id/sort_by đã qua form nên số khóa có giới hạn. Từ khóa tìm kiếm
+    # tự do không cache: ?search= ngẫu nhiên sẽ đẩy khóa phòng chờ, rate limit ra khỏi cache
+    return filter_movies('', genre_id, sort_by)
+
+@caching.cached('show_times', tags=lambda movie_id: [f'movie:{movie_id}'])
+def movie_show_times(movie_id):
+    # """Các suất chiếu của phim (có cache, xóa khi phim hoặc suất chiếu của phim đổi)"""
+    return list(ShowTime.objects.filter(movie_id=movie_id).select_related('screen__cinema').order_by('date', 'time'))
+
+@caching.cached('genres', timeout=3600, tags=['movies'])
+def genre_list():
+    return list(Genre.objects.all())
+
+def record_movie_view(movie):
+    # Tăng lượt xem bằng UPDATE (không save(): không gửi post_save, không xóa cache phim mỗi lượt xem)
+    Movie.objects.filter(id=movie.id).update(views_count=F('views_count') + 1)
+    movie.views_count += 1
+    trending.record_view(movie.id)
+
 def home(request):
     #Trang chủ hiển thị danh sách phim
-    movies = Movie.objects.filter(is_active=True)
-    
     # Xử lý tìm kiếm và lọc
     search_form = MovieSearchForm(request.GET)
     if search_form.is_valid():
-        search = search_form.cleaned_data.get('search')
         genre = search_form.cleaned_data.get('genre')
+        search = search_form.cleaned_data.get('search')
+        genre_id = genre.id if genre else None
         sort_by = search_form.cleaned_data.get('sort_by', 'latest')
-        
-        if search:
-            movies = movies.filter(
-                Q(title__icontains=search) | 
-                Q(description__icontains=search)
-            )
-        
-        if genre:
-            movies = movies.filter(genre=genre)
-        
-         # Sắp xếp
-        if sort_by == 'latest':
-            movies = movies.order_by('-release_date')
-        elif sort_by == 'rating':
-            movies = movies.order_by('-rating')
-        elif sort_by == 'views':
-            movies = movies.order_by('-views_count')
-        elif sort_by == 'price_low':
-            movies = movies.order_by('price')
-        elif sort_by == 'price_high':
-            movies = movies.order_by('-price')
+        movies = filter_movies(search, genre_id, sort_by) if search else movie_list(genre_id, sort_by)
     else:
-        movies = movies.order_by('-release_date')
+        movies = movie_list(None, 'latest')
 
-         # Phim hot
-    hot_movies = Movie.objects.filter(is_active=True, is_hot=True).order_by('-views_count')[:6]
+         # Phim hot: danh sách xu hướng đã tính sẵn (lệnh update_trending)
+    hot_movies = trending.hot_movies(6)
     
     # Phân trang
     paginator = Paginator(movies, 8)
@@ -61,8 +99,9 @@ def home(request):
     context = {
         'page_obj': page_obj,
         'search_form': search_form,
-        'genres': Genre.objects.all(),
+        'genres': genre_list(),
         'hot_movies': hot_movies,
+        'recommended_movies': recommendations.recommended_for_user(request.user),
     }
     return render(request, 'registration/home.html', context)
 
@@ -70,11 +109,11 @@ def movie_detail(request, movie_id):
     # """Chi tiết phim"""
     movie = get_object_or_404(Movie, id=movie_id)
     # Tăng lượt xem
-    movie.views_count += 1
-    movie.save()
+    record_movie_view(movie)
     
-    show_times = ShowTime.objects.filter(movie=movie).order_by('date', 'time')
-    reviews = Review.objects.filter(movie=movie).order_by('-created_at')
+    show_times = movie_show_times(movie.id)
+    # Chỉ trang đầu; các trang sau tải qua /api/movies/<id>/reviews/
+    reviews, next_key = review_page(movie.id)
     
     # Kiểm tra user đã đánh giá chưa
     user_review = None
@@ -98,7 +137,8 @@ def movie_detail(request, movie_id):
             # Cập nhật rating trung bình của phim
             avg_rating = Review.objects.filter(movie=movie).aggregate(Avg('rating'))['rating__avg']
             movie.rating = round(avg_rating, 1) if avg_rating else 0
-            movie.save()
+            # Chỉ ghi rating: không ghi đè lượt xem/điểm xu hướng do F() và update_trending ghi song song
+            movie.save(update_fields=['rating', 'updated_at'])
             
             messages.success(request, 'Đánh giá của bạn đã được cập nhật!')
             return redirect('movie_detail', movie_id=movie.id)
@@ -113,8 +153,11 @@ def movie_detail(request, movie_id):
         'movie': movie,
         'show_times': show_times,
         'reviews': reviews,
+        'next_cursor': encode_cursor(next_key) if next_key else None,
+        'review_summary': review_summary(movie.id),
         'user_review': user_review,
         'review_form': review_form,
+        'similar_movies': recommendations.similar_movies(movie.id),
     }
     
     return render(request, 'booking/movie_detail.html', context)
@@ -124,11 +167,10 @@ def booking_info(request, movie_id):
     movie = get_object_or_404(Movie, id=movie_id)
     
     # Tăng lượt xem
-    movie.views_count += 1
-    movie.save()
+    record_movie_view(movie)
     
     # Lấy tất cả suất chiếu của phim này
-    show_times = ShowTime.objects.filter(movie=movie).order_by('date', 'time')
+    show_times = movie_show_times(movie.id)
     
     # Nhóm suất chiếu theo ngày
     show_times_by_date = {}
@@ -146,67 +188,46 @@ def booking_info(request, movie_id):
     return render(request, 'booking/booking_info.html', context)
 
 @login_required
+@ratelimit('booking_seats')
+@waiting_room_required
 def booking_seats(request, show_time_id):
     # """Đặt ghế cho suất chiếu"""
-    show_time = get_object_or_404(ShowTime, id=show_time_id)
+    show_time = get_object_or_404(ShowTime.objects.select_related('movie', 'screen__cinema'), id=show_time_id)
     
     if request.method == 'POST':
         try:
-            # Lấy danh sách seat IDs từ form
-            seat_ids = request.POST.getlist('seats')
-            
-            if not seat_ids:
-                messages.error(request, 'Vui lòng chọn ít nhất một ghế!')
-                return redirect('booking_seats', show_time_id=show_time_id)
-            
-            # Lấy các seat objects
-            selected_seats = Seat.objects.filter(id__in=seat_ids, show_time=show_time)
-            
-            # Kiểm tra số lượng ghế
-            if len(selected_seats) != len(seat_ids):
-                messages.error(request, 'Có ghế không tồn tại!')
-                return redirect('booking_seats', show_time_id=show_time_id)
-            
-            # Kiểm tra ghế có còn trống không
-            for seat in selected_seats:
-                if seat.status != 'available':
-                    messages.error(request, f'Ghế {seat.seat_number} đã được đặt!')
-                    return redirect('booking_seats', show_time_id=show_time_id)
-            
-            # Tạo booking
-            total_amount = show_time.price * len(selected_seats)
-            booking = Booking.objects.create(
-                user=request.user,
-                show_time=show_time,
-                total_amount=total_amount,
-                payment_status='pending',
-                booking_status='pending'
-            )
-            
-            # Thêm ghế vào booking
-            booking.seats.set(selected_seats)
-            
-            # Cập nhật trạng thái ghế
-            for seat in selected_seats:
-                seat.status = 'booked'
-                seat.save()
-            
-            messages.success(request, 'Đặt vé thành công!')
-            return redirect('booking_confirmation', booking_id=booking.id)
-                
+            booking = claim_seats(request.user, show_time, request.POST.getlist('seats'))
+        except BookingError as e:
+            messages.error(request, str(e))
+            return redirect('booking_seats', show_time_id=show_time_id)
         except Exception as e:
             messages.error(request, f'Có lỗi xảy ra: {str(e)}')
             return redirect('booking_seats', show_time_id=show_time_id)
+        
+        messages.success(request, 'Đặt vé thành công!')
+        return redirect('booking_confirmation', booking_id=booking.id)
     
-    # Lấy danh sách ghế
-    seats = Seat.objects.filter(show_time=show_time).order_by('seat_number')
+    # Lấy danh sách ghế kèm giá từng ghế (giá động theo luật PricingRule)
+    seats = list(Seat.objects.filter(show_time=show_time).order_by('seat_number'))
+    prices = pricing.seat_prices(show_time)
+    for seat in seats:
+        seat.price = prices.price_for(seat.seat_number)
     
     context = {
         'show_time': show_time,
         'seats': seats,
+        'prices': prices,
     }
     return render(request, 'booking/booking_seats.html', context)
 
+@login_required
+def waiting_room(request, show_time_id):
+    # """Phòng chờ trước trang chọn ghế (suất chiếu có admission_rate); trang tự hỏi vị trí qua /api/"""
+    show_time = get_object_or_404(ShowTime.objects.select_related('movie', 'screen__cinema'), id=show_time_id)
+    if is_admitted(request, show_time_id):
+        return redirect('booking_seats', show_time_id=show_time_id)
+    return render(request, 'booking/waiting_room.html', {'show_time': show_time})
+
 @login_required
 def booking_confirmation(request, booking_id):
     # """Xác nhận đặt vé"""
@@ -396,6 +417,7 @@ def payment_confirmation(request, booking_id):
     context = {
         'booking': booking,
         'payment': payment,
+        'tickets': ticket_tokens(booking) if booking.payment_status == 'paid' else [],
     }
     return render(request, 'booking/payment_confirmation.html', context)
 
@@ -403,14 +425,70 @@ def payment_confirmation(request, booking_id):
 def print_ticket(request, booking_id):
     # """In vé xem phim"""
     booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-    return render(request, 'booking/print_ticket.html', {'booking': booking})
+    context = {
+        'booking': booking,
+        'tickets': ticket_tokens(booking) if booking.payment_status == 'paid' else [],
+    }
+    return render(request, 'booking/print_ticket.html', context)
+
+@login_required
+def download_ticket(request, booking_id, fmt):
+    # """Tải vé dạng PDF/PNG được render phía server (có cache)"""
+    if fmt not in ticket_render.FORMATS:
+        raise Http404
+    booking = get_object_or_404(
+        Booking.objects.select_related('show_time__movie', 'show_time__screen__cinema', 'payment'),
+        id=booking_id, user=request.user
+    )
+    if booking.payment_status != 'paid':
+        messages.error(request, 'Vé chỉ được xuất sau khi thanh toán hoàn tất!')
+        return redirect('print_ticket', booking_id=booking_id)
+    
+    path = ticket_render.get_ticket_file(booking, fmt)
+    if path is None:
+        messages.error(request, 'Đơn đặt vé không có ghế nào để xuất vé!')
+        return redirect('print_ticket', booking_id=booking_id)
+    try:
+        ticket_file = open(path, 'rb')
+    except FileNotFoundError:
+        # File cache vừa bị dọn giữa lúc kiểm tra và lúc mở: render lại
+        try:
+            ticket_file = open(ticket_render.get_ticket_file(booking, fmt), 'rb')
+        except FileNotFoundError:
+            messages.error(request, 'Không thể xuất vé lúc này, vui lòng thử lại!')
+            return redirect('print_ticket', booking_id=booking_id)
+    return FileResponse(
+        ticket_file,
+        content_type=ticket_render.FORMATS[fmt],
+        filename=f've-{booking.id}.{fmt}',
+    )
 
 @login_required
 def my_bookings(request):
     # """Danh sách đặt vé của người dùng"""
     bookings = Booking.objects.filter(user=request.user).order_by('-booking_date')
-    return render(request, 'booking/my_bookings.html', {'bookings': bookings})
+    # Vé của suất chiếu đã lưu trữ: chỉ đọc từ bảng lưu trữ, khôi phục khi cần xem chi tiết
+    archived_bookings = ArchivedBooking.objects.filter(user=request.user).select_related(
+        'show_time__movie', 'show_time__screen__cinema'
+    ).order_by('-booking_date')
+    return render(request, 'booking/my_bookings.html', {
+        'bookings': bookings,
+        'archived_bookings': archived_bookings,
+    })
 
+@login_required
+@require_POST
+def restore_archived_booking(request, booking_id):
+    # """Khôi phục một vé đã lưu trữ của người dùng rồi mở trang chi tiết"""
+    archived_booking = ArchivedBooking.objects.filter(id=booking_id, user=request.user).first()
+    if archived_booking is None:
+        # Đã được khôi phục bởi request trước (bấm hai lần, hai tab)
+        get_object_or_404(Booking, id=booking_id, user=request.user)
+    else:
+        archive.restore(archived_booking)
+    return redirect('booking_confirmation', booking_id=booking_id)
+
+@ratelimit('register')
 def register(request):
     # """Đăng ký tài khoản"""
     if request.method == 'POST':
@@ -424,6 +502,7 @@ def register(request):
     
     return render(request, 'registration/register.html', {'form': form})
 
+@ratelimit('login')
 def custom_login(request):
     # """View login tùy chỉnh"""
     if request.user.is_authenticated:
@@ -503,7 +582,7 @@ def add_review(request, movie_id):
             # Cập nhật rating trung bình của phim
             avg_rating = Review.objects.filter(movie=movie).aggregate(Avg('rating'))['rating__avg']
             movie.rating = round(avg_rating, 1) if avg_rating else 0
-            movie.save()
+            movie.save(update_fields=['rating', 'updated_at'])
             
             messages.success(request, 'Đánh giá đã được thêm thành công!')
             return redirect('movie_detail', movie_id=movie_id)
@@ -529,7 +608,7 @@ def edit_review(request, review_id):
             # Cập nhật rating trung bình của phim
             avg_rating = Review.objects.filter(movie=review.movie).aggregate(Avg('rating'))['rating__avg']
             review.movie.rating = round(avg_rating, 1) if avg_rating else 0
-            review.movie.save()
+            review.movie.save(update_fields=['rating', 'updated_at'])
             
             messages.success(request, 'Đánh giá đã được cập nhật thành công!')
             return redirect('movie_detail', movie_id=review.movie.id)
@@ -555,7 +634,7 @@ def delete_review(request, review_id):
     movie = review.movie
     avg_rating = Review.objects.filter(movie=movie).aggregate(Avg('rating'))['rating__avg']
     movie.rating = round(avg_rating, 1) if avg_rating else 0
-    movie.save()
+    movie.save(update_fields=['rating', 'updated_at'])
     
     messages.success(request, 'Đã xóa bình luận!')
     return redirect('movie_detail', movie_id=movie_id)
@@ -565,7 +644,31 @@ def delete_review(request, review_id):
 def admin_dashboard(request):
     # """Dashboard cho admin/staff"""
     from django.utils import timezone
-    from datetime import datetime, timedelta
+    from datetime import timedelta
+    
+    # Đặt vé gần đây
+    recent_bookings = Booking.objects.select_related(
+        'user', 'show_time__movie', 'show_time__movie__genre'
+    ).prefetch_related('seats').order_by('-booking_date')[:10]
+    
+    # Người dùng mới (7 ngày gần nhất)
+    week_ago = timezone.now() - timedelta(days=7)
+    recent_users = UserProfile.objects.filter(
+        created_at__gte=week_ago
+    ).select_related('user').order_by('-created_at')[:5]
+    
+    context = dict(
+        dashboard_stats(),
+        recent_bookings=recent_bookings,
+        hot_movies=trending.hot_movies(5),
+        recent_users=recent_users,
+    )
+    return render(request, 'registration/admin_dashboard.html', context)
+
+@caching.cached('dashboard', timeout=60, stale=120)
+def dashboard_stats():
+    # """Các số liệu tổng hợp của dashboard; chấp nhận trễ tối đa vài phút nên không gắn tag"""
+    from datetime import timedelta
     
     # Thống kê cơ bản
     total_movies = Movie.objects.count()
@@ -576,68 +679,63 @@ def admin_dashboard(request):
     today = timezone.now().date()
     today_bookings = Booking.objects.filter(booking_date__date=today).count()
     
-    # Thống kê trạng thái thanh toán chi tiết
-    paid_bookings = Booking.objects.filter(payment_status='paid').count()
-    processing_bookings = Booking.objects.filter(payment_status='processing').count()
-    pending_bookings = Booking.objects.filter(payment_status='pending').count()
-    expired_bookings = Booking.objects.filter(payment_status='expired').count()
-    cancelled_bookings = Booking.objects.filter(payment_status='cancelled').count()
-    refunded_bookings = Booking.objects.filter(payment_status='refunded').count()
+    # Thống kê trạng thái thanh toán chi tiết: một truy vấn GROUP BY thay cho sáu COUNT
+    status_counts = dict(Booking.objects.values_list('payment_status').annotate(total=Count('id')).order_by())
     
     # Tính phần trăm
     total_booking_count = total_bookings if total_bookings > 0 else 1
-    paid_percentage = (paid_bookings / total_booking_count) * 100
-    processing_percentage = (processing_bookings / total_booking_count) * 100
-    pending_percentage = (pending_bookings / total_booking_count) * 100
-    expired_percentage = (expired_bookings / total_booking_count) * 100
-    cancelled_percentage = (cancelled_bookings / total_booking_count) * 100
-    refunded_percentage = (refunded_bookings / total_booking_count) * 100
-    
-    # Đặt vé gần đây
-    recent_bookings = Booking.objects.select_related(
-        'user', 'show_time__movie', 'show_time__movie__genre'
-    ).prefetch_related('seats').order_by('-booking_date')[:10]
-    
-    # Thống kê theo tháng (6 tháng gần nhất)
-    six_months_ago = timezone.now() - timedelta(days=180)
-    monthly_stats = Booking.objects.filter(
-        booking_date__gte=six_months_ago
-    ).values('booking_date__month').annotate(
-        count=Count('id')
-    ).order_by('booking_date__month')
-    
-    # Phim hot
-    hot_movies = Movie.objects.filter(is_hot=True, is_active=True).order_by('-views_count')[:5]
-    
-    # Người dùng mới (7 ngày gần nhất)
-    week_ago = timezone.now() - timedelta(days=7)
-    recent_users = UserProfile.objects.filter(
-        created_at__gte=week_ago
-    ).select_related('user').order_by('-created_at')[:5]
-    
-    context = {
+    stats = {
         'total_movies': total_movies,
         'total_bookings': total_bookings,
         'total_users': total_users,
         'today_bookings': today_bookings,
-        'paid_bookings': paid_bookings,
-        'processing_bookings': processing_bookings,
-        'pending_bookings': pending_bookings,
-        'expired_bookings': expired_bookings,
-        'cancelled_bookings': cancelled_bookings,
-        'refunded_bookings': refunded_bookings,
-        'paid_percentage': round(paid_percentage, 1),
-        'processing_percentage': round(processing_percentage, 1),
-        'pending_percentage': round(pending_percentage, 1),
-        'expired_percentage': round(expired_percentage, 1),
-        'cancelled_percentage': round(cancelled_percentage, 1),
-        'refunded_percentage': round(refunded_percentage, 1),
-        'recent_bookings': recent_bookings,
-        'monthly_stats': monthly_stats,
-        'hot_movies': hot_movies,
-        'recent_users': recent_users,
     }
-    return render(request, 'registration/admin_dashboard.html', context)
+    for status in ('paid', 'processing', 'pending', 'expired', 'cancelled', 'refunded'):
+        count = status_counts.get(status, 0)
+        stats[f'{status}_bookings'] = count
+        stats[f'{status}_percentage'] = round(count / total_booking_count * 100, 1)
+    
+    # Thống kê theo tháng (6 tháng gần nhất), đọc từ bảng tổng hợp DailySales
+    six_months_ago = timezone.now() - timedelta(days=180)
+    stats['monthly_stats'] = list(rollups.monthly_bookings(timezone.localdate(six_months_ago)))
+    
+    # Doanh thu 30 ngày gần nhất theo phim, rạp, phương thức thanh toán
+    sales_end = timezone.localdate()
+    sales_start = sales_end - timedelta(days=29)
+    method_labels = dict(Payment.PAYMENT_METHODS)
+    stats.update(
+        sales_totals=rollups.totals(DailySales.objects.filter(date__range=(sales_start, sales_end))),
+        revenue_by_movie=list(rollups.sales_by('movie__title', sales_start, sales_end, limit=5)),
+        revenue_by_cinema=list(rollups.sales_by('cinema__name', sales_start, sales_end, limit=5)),
+        revenue_by_method=[
+            dict(row, label=method_labels.get(row['payment_method'], 'Chưa chọn'))
+            for row in rollups.sales_by('payment_method', sales_start, sales_end)
+        ],
+    )
+    return stats
+
+@login_required
+@user_passes_test(is_staff_or_admin)
+def cache_stats(request):
+    # """Chỉ số cache (hit/miss/stale...) của process đang phục vụ request"""
+    return JsonResponse({'namespaces': caching.stats()})
+
+@login_required
+@user_passes_test(is_staff_or_admin)
+def occupancy_dashboard(request):
+    # """Bản đồ lấp đầy ghế và tải theo giờ trong tuần của từng phòng (lệnh compute_occupancy)"""
+    occupancies = ScreenOccupancy.objects.select_related('screen__cinema').order_by('screen__cinema__name', 'screen__name')
+    selected = None
+    screen_id = request.GET.get('screen')
+    for occupancy in occupancies:
+        if selected is None or str(occupancy.screen_id) == screen_id:
+            selected = occupancy
+    
+    context = {
+        'occupancies': occupancies,
+        'heatmap': analytics.heatmap(selected) if selected else None,
+    }
+    return render(request, 'registration/occupancy_dashboard.html', context)
 
 @login_required
 @user_passes_test(is_staff_or_admin)
@@ -661,33 +759,82 @@ def update_booking_status(request, booking_id):
     else:
         new_status = request.POST.get('status')
     
-    if new_status in dict(Booking.PAYMENT_STATUS):
-        booking.payment_status = new_status
-        
-        # Cập nhật trạng thái booking tương ứng
-        if new_status == 'paid':
-            booking.booking_status = 'confirmed'
-        elif new_status == 'cancelled':
-            booking.booking_status = 'cancelled'
-        elif new_status == 'refunded':
-            booking.booking_status = 'cancelled'
-        else:
-            booking.booking_status = 'pending'
-        
-        booking.save()
-        
-        return JsonResponse({
-            'success': True,
-            'message': f'Đã cập nhật trạng thái thành: {dict(Booking.PAYMENT_STATUS)[new_status]}',
-            'new_status': new_status,
-            'new_status_display': dict(Booking.PAYMENT_STATUS)[new_status]
-        })
-    else:
+    try:
+        result = transition_bookings([booking.id], new_status)[0]
+    except BookingError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    if not result['success']:
+        return JsonResponse({'success': False, 'error': result['error']}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'Đã cập nhật trạng thái thành: {dict(Booking.PAYMENT_STATUS)[new_status]}',
+        'new_status': new_status,
+        'new_status_display': dict(Booking.PAYMENT_STATUS)[new_status]
+    })
+
+@login_required
+@user_passes_test(is_staff_or_admin)
+@require_POST
+def update_booking_statuses(request):
+    # """Chuyển trạng thái nhiều booking một lần: {"ids": [...], "status": "paid"} -> kết quả từng booking"""
+    import json
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Dữ liệu JSON không hợp lệ'}, status=400)
+    if not isinstance(data, dict) or not isinstance(data.get('ids'), list):
+        return JsonResponse({'success': False, 'error': 'Cần danh sách ids'}, status=400)
+    
+    try:
+        results = transition_bookings(data['ids'], data.get('status'))
+    except BookingError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({
+        'success': True,
+        'updated': sum(1 for result in results if result['success']),
+        'results': results,
+    })
+
+@ratelimit('check_in')
+@login_required
+@user_passes_test(is_staff_or_admin)
+@require_POST
+def check_in_ticket(request):
+    """API soát vé: nhận {"token": ...} hoặc {"tokens": [...]} từ máy quét"""
+    import json
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Dữ liệu JSON không hợp lệ'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'success': False, 'error': 'Dữ liệu JSON không hợp lệ'}, status=400)
+    
+    tokens = data.get('tokens')
+    if tokens is None:
+        tokens = [data.get('token')]
+    if not isinstance(tokens, list) or not tokens:
+        return JsonResponse({'success': False, 'error': 'Thiếu mã vé'}, status=400)
+    if len(tokens) > MAX_BATCH_SIZE:
         return JsonResponse({
             'success': False,
-            'error': 'Trạng thái không hợp lệ'
+            'error': f'Tối đa {MAX_BATCH_SIZE} vé mỗi lần đồng bộ'
         }, status=400)
+    
+    show_time_id = data.get('show_time_id')
+    if show_time_id is not None and not isinstance(show_time_id, int):
+        return JsonResponse({'success': False, 'error': 'Suất chiếu không hợp lệ'}, status=400)
+    
+    results = check_in(tokens, show_time_id=show_time_id)
+    return JsonResponse({
+        'success': True,
+        'admitted': sum(1 for result in results if result['status'] == 'admitted'),
+        'results': results,
+    })
 
+@ratelimit('get_seats')
 def get_seats_ajax(request, show_time_id):
     """API để lấy trạng thái ghế"""
     show_time = get_object_or_404(ShowTime, id=show_time_id)
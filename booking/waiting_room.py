@@ -0,0 +1,186 @@
+"""
+Phòng chờ (hàng đợi vào trang chọn ghế) cho các suất chiếu mở bán "nóng".
+
+Bật bằng ShowTime.admission_rate (người/phút). Người vào phòng chờ nhận một số
+thứ tự tăng dần (cache.incr), giống máy bốc số. Số người đã được vào tại thời
+điểm t được tính từ mốc (đã vào, lúc ghi) lưu ở lần bốc số gần nhất:
+
+    đã vào = min(đã vào lúc ghi + admission_rate * (t - lúc ghi) / 60,
+                 số đã bốc + WAITING_ROOM_BURST)
+
+(như token bucket cỡ WAITING_ROOM_BURST). Vì vậy không cần tiến trình nền, và vị trí/ETA chỉ là phép tính trên cache.
+Số thứ tự nằm trong cookie đã ký, hàng đợi không ghi gì vào database hay session.
+Khi tới lượt, người dùng nhận "vé vào" (cookie ký kèm user id, hết hạn sau
+WAITING_ROOM_PASS_TTL giây). booking_seats và API đặt vé chỉ chấp nhận request có
+vé vào hợp lệ, nên database chỉ nhận một luồng đều thay vì cả đám đông cùng lúc.
+
+Hàng đợi chỉ đúng khi mọi worker dùng chung một cache: với LocMemCache mỗi
+process có số thứ tự và đồng hồ mở riêng. Khi đó (trừ WAITING_ROOM_SINGLE_PROCESS)
+admin không cho đặt admission_rate và manage.py check cảnh báo booking.W001.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.shortcuts import redirect
+
+from .models import ShowTime
+
+TICKET_SALT = 'booking.waiting_room.ticket'
+PASS_SALT = 'booking.waiting_room.pass'
+RATE_CACHE_TIMEOUT = 60
+# Cache chỉ nằm trong một process
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache():
+    # """True nếu cache mặc định dùng chung giữa các process (Redis, Memcached...)"""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def available():
+    # """True nếu mọi worker thấy cùng một hàng đợi (cache dùng chung, hoặc chỉ chạy một process)"""
+    return getattr(settings, 'WAITING_ROOM_SINGLE_PROCESS', False) or shared_cache()
+
+
+def _key(show_time_id, name):
+    return f'waiting_room:{show_time_id}:{name}'
+
+
+def ticket_cookie(show_time_id):
+    return f'wr_ticket_{show_time_id}'
+
+
+def pass_cookie(show_time_id):
+    return f'wr_pass_{show_time_id}'
+
+
+def pass_ttl():
+    return getattr(settings, 'WAITING_ROOM_PASS_TTL', 600)
+
+
+def admission_rate(show_time_id):
+    # """Người/phút của suất chiếu; 0 nếu không bật phòng chờ (cache để hàng đợi không chạm database)"""
+    key = _key(show_time_id, 'rate')
+    rate = cache.get(key)
+    if rate is None:
+        rate = ShowTime.objects.filter(id=show_time_id).values_list('admission_rate', flat=True).first() or 0
+        cache.set(key, rate, RATE_CACHE_TIMEOUT)
+    return rate
+
+
+def reset_rate(show_time_id):
+    cache.delete(_key(show_time_id, 'rate'))
+
+
+def reset(show_time_id):
+    # """Xóa cả hàng đợi của suất chiếu (số đã bốc, mốc đã vào)"""
+    cache.delete_many([_key(show_time_id, name) for name in ('rate', 'tail', 'admitted')])
+
+
+def burst_size(rate):
+    burst = getattr(settings, 'WAITING_ROOM_BURST', None)
+    return rate if burst is None else burst
+
+
+def _mark(show_time_id, rate, now):
+    """
+    (số đã vào, thời điểm) tại now, hoặc None nếu hàng đợi chưa mở. Thời điểm
+    không lùi dù now được đo trước lần ghi của request khác.
+    """
+    state_key, tail_key = _key(show_time_id, 'admitted'), _key(show_time_id, 'tail')
+    found = cache.get_many([state_key, tail_key])
+    if state_key not in found:
+        return None
+    admitted, at = found[state_key]
+    admitted = min(admitted + max(now - at, 0) * rate / 60, found.get(tail_key, 0) + burst_size(rate))
+    return admitted, max(now, at)
+
+
+def admitted_until(show_time_id, rate, now=None):
+    """
+    Số thứ tự lớn nhất đã được vào. Từ mốc ghi gần nhất (số đã vào, thời điểm),
+    mỗi phút có thêm `rate` người được vào, nhưng không vượt quá số người đã bốc
+    số + burst: hàng đợi vắng lâu không tích lũy suất vào cho đợt dồn sau.
+    """
+    mark = _mark(show_time_id, rate, now or time.time())
+    return int(mark[0]) if mark else 0
+
+
+def join(show_time_id, rate):
+    # """Bốc số thứ tự tiếp theo (bắt đầu từ 1); mở hàng đợi nếu đây là người đầu tiên"""
+    now = time.time()
+    state_key, tail_key = _key(show_time_id, 'admitted'), _key(show_time_id, 'tail')
+    mark = _mark(show_time_id, rate, now)
+    if mark is None:
+        cache.add(state_key, (burst_size(rate), now), None)
+    else:
+        # Ghi mốc trước khi bốc số: phần tích lũy vượt quá số người đã bốc số + burst bị bỏ đi
+        cache.set(state_key, mark, None)
+    try:
+        return cache.incr(tail_key)
+    except ValueError:
+        # Người đầu tiên, hoặc khóa vừa bị đẩy khỏi cache
+        cache.add(tail_key, 0, None)
+        return cache.incr(tail_key)
+
+
+def status(show_time_id, ticket, rate):
+    position = max(ticket - admitted_until(show_time_id, rate), 0)
+    return {
+        'ticket': ticket,
+        'position': position,
+        'admitted': position == 0,
+        'eta_seconds': int(position * 60 / rate) if rate else 0,
+    }
+
+
+def make_ticket(show_time_id, ticket):
+    return signing.dumps([show_time_id, ticket], salt=TICKET_SALT)
+
+
+def read_ticket(request, show_time_id):
+    try:
+        signed_show_time_id, ticket = signing.loads(request.COOKIES.get(ticket_cookie(show_time_id), ''), salt=TICKET_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    return ticket if signed_show_time_id == show_time_id else None
+
+
+def make_pass(show_time_id, user_id):
+    return signing.dumps([show_time_id, user_id], salt=PASS_SALT)
+
+
+def is_admitted(request, show_time_id):
+    # """True nếu suất chiếu không có phòng chờ hoặc request mang vé vào hợp lệ của đúng user"""
+    if not admission_rate(show_time_id):
+        return True
+    try:
+        signed_show_time_id, user_id = signing.loads(
+            request.COOKIES.get(pass_cookie(show_time_id), ''), salt=PASS_SALT, max_age=pass_ttl()
+        )
+    except (signing.BadSignature, ValueError, TypeError):
+        return False
+    return signed_show_time_id == show_time_id and user_id == request.user.id
+
+
+def set_pass(response, show_time_id, user_id):
+    response.set_cookie(
+        pass_cookie(show_time_id), make_pass(show_time_id, user_id),
+        max_age=pass_ttl(), httponly=True, samesite='Lax',
+    )
+
+
+def waiting_room_required(view_func):
+    # """Chuyển người chưa có vé vào sang trang phòng chờ của suất chiếu"""
+    @wraps(view_func)
+    def wrapper(request, show_time_id, *args, **kwargs):
+        if not is_admitted(request, show_time_id):
+            return redirect('waiting_room', show_time_id=show_time_id)
+        return view_func(request, show_time_id, *args, **kwargs)
+    return wrapper
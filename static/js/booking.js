@@ -233,6 +233,7 @@ class BookingSystem {
         const formData = new FormData(form);
         
         // Thêm thông tin ghế
+        formData.append('show_time_id', form.dataset.showTimeId);
         formData.append('seats', JSON.stringify(Array.from(this.selectedSeats)));
         formData.append('total_price', this.calculateTotalPrice());
 
@@ -360,7 +361,9 @@ class BookingSystem {
      */
     async checkSeatAvailability() {
         try {
-            const response = await fetch('/api/seats/availability/');
+            const form = document.querySelector('#booking-form');
+            if (!form || !form.dataset.showTimeId) return;
+            const response = await fetch(`/api/showtimes/${form.dataset.showTimeId}/seats/`);
             const data = await response.json();
             
             this.updateSeatAvailability(data);
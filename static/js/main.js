@@ -16,6 +16,7 @@ class MovieBookingApp {
         this.cache = new Map();
         this.debounceTimers = new Map();
         this.loadingStates = new Set();
+        this.moviesCursor = undefined; // cursor trang kế tiếp của /api/movies/, null = hết phim
     }
 
     /**
@@ -69,7 +70,7 @@ class MovieBookingApp {
         if (searchInput) {
             searchInput.addEventListener('input', this.debounce((e) => {
                 this.performSearch(e.target.value);
-            }, 300));
+            }, 150));
         }
     }
 
@@ -198,12 +199,15 @@ class MovieBookingApp {
      * Search với debounce
      */
     async performSearch(query) {
-        if (query.length < 2) return;
+        if (query.trim().length < 1) {
+            this.updateSearchResults([]);
+            return;
+        }
 
         try {
             this.showLoading('search-results');
-            const results = await this.apiCall(`/api/search/?q=${encodeURIComponent(query)}`);
-            this.updateSearchResults(results);
+            const data = await this.apiCall(`/api/search/?q=${encodeURIComponent(query)}`);
+            this.updateSearchResults(data.results);
         } catch (error) {
             this.showError('Tìm kiếm thất bại');
         } finally {
@@ -215,13 +219,14 @@ class MovieBookingApp {
      * Load thêm phim
      */
     async loadMoreMovies() {
-        if (this.loadingStates.has('movies')) return;
+        if (this.loadingStates.has('movies') || this.moviesCursor === null) return;
 
         try {
             this.loadingStates.add('movies');
-            const page = Math.floor(document.querySelectorAll('.movie-card').length / 12) + 1;
-            const movies = await this.apiCall(`/api/movies/?page=${page}`);
-            this.appendMovies(movies);
+            const query = this.moviesCursor ? `?cursor=${encodeURIComponent(this.moviesCursor)}` : '';
+            const data = await this.apiCall(`/api/movies/${query}`);
+            this.moviesCursor = data.next_cursor;
+            this.appendMovies(data.results);
         } catch (error) {
             this.showError('Không thể tải thêm phim');
         } finally {
@@ -310,11 +315,13 @@ class MovieBookingApp {
         const container = document.getElementById('search-results');
         if (container) {
             container.innerHTML = results.map(movie => `
-                <div class="movie-card animate-on-scroll">
-                    <img data-src="${movie.poster}" alt="${movie.title}" class="lazy">
-                    <h3>${movie.title}</h3>
-                    <p>${movie.description}</p>
-                </div>
+                <a href="${movie.url}" class="list-group-item list-group-item-action d-flex align-items-center">
+                    ${movie.poster ? `<img src="${movie.poster}" alt="${movie.title}" width="32" height="48" class="me-2 rounded">` : ''}
+                    <div>
+                        <div class="fw-semibold">${movie.title}</div>
+                        <small class="text-muted">${movie.genre} · ${movie.rating}/5</small>
+                    </div>
+                </a>
             `).join('');
         }
     }
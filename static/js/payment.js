@@ -274,6 +274,7 @@ class PaymentSystem {
             
             const formData = new FormData(form);
             formData.append('payment_method', this.selectedMethod);
+            formData.append('booking_id', document.querySelector('[data-booking-id]')?.dataset.bookingId);
             formData.append('amount', this.getPaymentAmount());
             
             // Thêm security token
@@ -311,7 +312,7 @@ class PaymentSystem {
         
         // Redirect đến trang xác nhận
         setTimeout(() => {
-            window.location.href = `/payment/confirmation/${result.payment_id}/`;
+            window.location.href = result.redirect_url;
         }, 1500);
     }
 